@@ -8,12 +8,15 @@ from scripts.SharePoint_Connector import *
 from collections import deque
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 
 def main():
     try:
         cache_file_path = r'cache\azure_arc_server_cache.json'
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"{script_name} executed, getting Azure Arc Server information.")
         logger.info(f"Initializing Azure Connector and retreiving Access Token.")
@@ -63,6 +66,8 @@ def main():
         logger.error(f"Error occured in main: {e}: Exit Code 1")
         logger.error("Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 
 exit_code = main()
@@ -8,12 +8,15 @@ from scripts.SharePoint_Connector import *
 from collections import deque
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 
 def main():
     try:
         cache_file_path = r'cache\azure_license_usage_cache.json'
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"{script_name} executed, getting license usage information.")
         logger.info(f"Initializing Azure Connector and retreiving Access Token.")
@@ -25,7 +28,7 @@ def main():
         logger.info(f"Initializing SharePoint Connector and retreiving Access Token.")
         sharepoint_connector_o = SharePoint_Connector(logger)
         logger.info(f"Retrieving cached information.")
-        cached_info = sharepoint_connector_o.get_item_ids('INFAzureLicenseUsage')
+        cached_info = sharepoint_connector_o.get_item_changes('INFAzureLicenseUsage')
         for item in cached_info.values():
             for key, value in item.items():
                 if isinstance(value,float):
@@ -54,9 +57,10 @@ def main():
         logger.info(f"Main: Formatted and batched {len(formatted_deque)} items for SharePoint")
         logger.info(f"Main: Uploading {len(formatted_deque)} batches to SharePoint.")
 
-        sharepoint_connector_o.batch_upload(formatted_deque)
+        upload_results = sharepoint_connector_o.batch_upload(formatted_deque)
         logger.info("Main: Uploaded items to SharePoint.")
 
+        update_cache(cache_response, sharepoint_connector_o.get_uploaded_items(upload_results), 'Unique_ID')
         write_to_json(cache_response, cache_file_path)
 
         logger.info("ETL Completed successfully: Exit Code 0")
@@ -65,6 +69,8 @@ def main():
         logger.error(f"Error occured in main: {e}: Exit Code 1")
         logger.error("Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 
 exit_code = main()
@@ -8,6 +8,8 @@ from scripts.SharePoint_Connector import *
 from collections import deque
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 def clean_items(azure_dict:dict) -> dict:
     """
     Takes in an azure dict, cleans and renames keys, returns a dict in sharepoint format.
@@ -67,6 +69,7 @@ def main():
         cache_file_path = r'cache\azure_user_info_cache.json'
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"{script_name} executed, getting user information and license information.")
         logger.info(f"Initializing Azure Connector and retirieving Access Token.")
@@ -94,7 +97,7 @@ def main():
         # logger.info(f"Data: {json.dumps(azure_user_info_dict,indent=4)}")
         
         sharepoint_connector_o = SharePoint_Connector(logger)
-        cached_sharepoint_items = sharepoint_connector_o.get_item_ids('COT_Employees')
+        cached_sharepoint_items = sharepoint_connector_o.get_item_changes('COT_Employees')
         # logger.info(f"SP: {json.dumps(cached_sharepoint_items,indent=4)}")
 
         azure_user_info_dict, cached_sharepoint_items = reformat_dict(cached_sharepoint_items, azure_user_info_dict, 'Azure_Id')
@@ -125,9 +128,10 @@ def main():
         #Uploads to SharePoint the batched deque
         logger.info(f"Uploading {len(batched_queue)} batches to SharePoint.")
 
-        sharepoint_connector_o.batch_upload(batched_queue)
+        upload_results = sharepoint_connector_o.batch_upload(batched_queue)
 
         logger.info(f"Updating cache with new info...")
+        update_cache(current_data, sharepoint_connector_o.get_uploaded_items(upload_results), 'Unique_ID')
         
         write_to_json(current_data, cache_file_path)
         
@@ -137,6 +141,8 @@ def main():
         logger.error(f"Error occured in main: {e}: Exit Code 1")
         logger.error("Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 
 exit_code = main()
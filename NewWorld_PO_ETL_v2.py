@@ -10,6 +10,8 @@ from utils.Logger import *
 from scripts.SharePoint_Connector import *
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 def extract_po_information(logger)-> list:
         """
         Executes a stored procedure to retrieve PO Alert information from SQL Server nwdb01dvt in databse LOGOSDB.
@@ -231,6 +233,7 @@ def main():
         cache_file_path = r"cache/po_info_cache.json"
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"Current working directory: {os.getcwd()}")
         logger.info(f"{script_name} executed, getting SQL Data.")
@@ -243,7 +246,7 @@ def main():
         formatted_po_info = remove_blanks(formatted_po_info)
         logger.info(json.dumps(formatted_po_info,indent=4))
         sharepoint_connector_o = SharePoint_Connector(logger)
-        cached_sharepoint_items = sharepoint_connector_o.get_item_ids('NewWorld_PO_Alert')
+        cached_sharepoint_items = sharepoint_connector_o.get_item_changes('NewWorld_PO_Alert')
 
         formatted_po_info, formatted_sharepoint_dict = reformat_dict(cached_sharepoint_items,formatted_po_info, 'Unique_ID')
 
@@ -266,10 +269,11 @@ def main():
         logger.info(f"Formatted and batched {len(batched_queue)} items for SharePoint")
         logger.info(f"Uploading {len(batched_queue)} batches to SharePoint.")
 
-        sharepoint_connector_o.batch_upload(batched_queue)
+        upload_results = sharepoint_connector_o.batch_upload(batched_queue)
         logger.info("Uploaded items to SharePoint.")
 
         logger.info("Updating Cache with SharePoint info")
+        update_cache(current_data, sharepoint_connector_o.get_uploaded_items(upload_results), 'Unique_ID')
         write_to_json(current_data,cache_file_path)
         
         logger.info(f"ETL Completed successfully: Exit Code 0")
@@ -277,5 +281,7 @@ def main():
         logger.error(f"Error occured in main: {e}: Exit Code 1")
         logger.error("Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 main()
\ No newline at end of file
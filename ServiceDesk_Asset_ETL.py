@@ -11,6 +11,8 @@ from scripts.ServiceDesk_Connector import *
 from scripts.SharePoint_Connector import *
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 servicedesk_cache_file_path = r"cache/servicedesk_asset_cache.json"
 
 
@@ -111,6 +113,7 @@ def main():
     try:
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"Main: Current working directory: {os.getcwd()}")
         logger.info(f"Main: {script_name} executed, retrieving Service Desk Assets...")
@@ -135,10 +138,9 @@ def main():
             logger.info(f"Main: No assets returned, exiting.")
             return
 
-        raw_asset_details_dict = {
-            value.get('asset_id') : servicedesk_connector_o.get_assets_from_servicedesk(asset_id = value.get('asset_id'))
-            for value in current_asset_list_dict.values()
-        }
+        raw_asset_details_dict = servicedesk_connector_o.get_assets_by_ids(
+            [value.get('asset_id') for value in current_asset_list_dict.values()]
+        )
         logger.info(f"Main: Retrieved {len(raw_asset_details_dict)} items.")
         logger.info(f"Main: Raw details: {json.dumps(raw_asset_details_dict,indent=4)}")
         cleaned_asset_details_dict = clean_servicedesk_asset_details(raw_asset_details_dict)
@@ -158,7 +160,7 @@ def main():
                 item['missing_annual_replacement_amoun'] = 'N'
 
         sharepoint_connector_o = SharePoint_Connector(logger)
-        sharepoint_dict_items = sharepoint_connector_o.get_item_ids('ServiceDesk_Assets')
+        sharepoint_dict_items = sharepoint_connector_o.get_item_changes('ServiceDesk_Assets')
 
         cleaned_asset_details_dict, cleaned_sharepoint_details = reformat_dict(sharepoint_dict_items, cleaned_asset_details_dict, 'saas_id')
         cleaned_asset_details_dict = check_asset_status(cleaned_sharepoint_details, cleaned_asset_details_dict)
@@ -179,14 +181,14 @@ def main():
 
 
         logger.info("Main: Formatting and batching for upload.")
-        batched_queue=sharepoint_connector_o.format_and_batch_for_upload_sharepoint(current_data[1],"ServiceDesk_Assets")
-        logger.info(f"Main: Formatted and batched {len(batched_queue)} items for SharePoint")
-        logger.info(f"Main: Uploading {len(batched_queue)} batches to SharePoint.")
+        batched_queue=sharepoint_connector_o.format_and_batch_for_upload_sharepoint(current_data[1],"ServiceDesk_Assets", stream=True)
+        logger.info(f"Main: Uploading {len(current_data[1])} items to SharePoint as they are batched.")
 
-        sharepoint_connector_o.batch_upload(batched_queue)
+        upload_results = sharepoint_connector_o.batch_upload(batched_queue)
         logger.info("Main: Uploaded items to SharePoint.")
 
         logger.info("Main: Updating Cache with SharePoint info")
+        update_cache(current_data, sharepoint_connector_o.get_uploaded_items(upload_results), 'Unique_ID')
         current_iteration = dates.get('iteration',0)
         current_iteration += 1
         new_dates = {
@@ -203,5 +205,7 @@ def main():
         logger.error(f"Main: Error occured in main: {e}: Exit Code 1")
         logger.error("Main: Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 main()
\ No newline at end of file
@@ -10,6 +10,8 @@ from utils.Logger import *
 from scripts.ServiceDesk_Connector import *
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 servicedesk_cache_file_path = r"cache/servicedesk_asset_cache.json"
 
 def clean_servicedesk_details(asset_dict:dict)-> dict:
@@ -56,6 +58,7 @@ def main():
     try:
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"Main: Current working directory: {os.getcwd()}")
         logger.info(f"Main: {script_name} executed, Updating Replacement Funds")
@@ -96,5 +99,7 @@ def main():
         logger.error(f"Main: Error occured in main: {e}: Exit Code 1")
         logger.error("Main: Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 main()
\ No newline at end of file
@@ -11,11 +11,14 @@ from scripts.ServiceDesk_Connector import *
 from scripts.SharePoint_Connector import *
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 
 def main():
     try:
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"Main: Current working directory: {os.getcwd()}")
         logger.info(f"Main: {script_name} executed, doing something...")
@@ -76,6 +79,8 @@ def main():
         logger.error(f"Error occured in main: {e}: Exit Code 1")
         logger.error("Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
     
 
 main()
\ No newline at end of file
@@ -11,6 +11,8 @@ from scripts.ServiceDesk_Connector import *
 from scripts.SharePoint_Connector import *
 from utils.Utils import *
 
+run_budget_seconds = 2 * 60 * 60
+
 def determine_iteration_type(dates_dict:dict) -> str:
     """
     Takes in a dict containing iteration counts, returns full or partial.
@@ -158,6 +160,7 @@ def main():
     try:
         script_name = Path(__file__).stem
         logger = setup_logger(script_name)
+        run_deadline.start(run_budget_seconds)
 
         logger.info(f"Main: Current working directory: {os.getcwd()}")
         logger.info(f"Main: {script_name} executed, retrieving Service Desk Worklogs...")
@@ -196,7 +199,7 @@ def main():
 
         sharepoint_connector_o = SharePoint_Connector(logger)
         logger.info("Main: Getting SharePoint ids and updating cache.")
-        sharepoint_cache = sharepoint_connector_o.get_item_ids('ServiceDesk_Worklogs')
+        sharepoint_cache = sharepoint_connector_o.get_item_changes('ServiceDesk_Worklogs')
         for item in sharepoint_cache.values():
             item['Unique_ID'] = item.pop('unique_id')
         logger.info(f"Main: {len(sharepoint_cache)} items retreieved, saving cache.")
@@ -218,11 +221,12 @@ def main():
         
         batch_queue = deque()
 
-        batch_queue = sharepoint_connector_o.format_and_batch_for_upload_sharepoint(cached_info[1],'ServiceDesk_Worklogs')
-        sharepoint_connector_o.batch_upload(batch_queue)
+        batch_queue = sharepoint_connector_o.format_and_batch_for_upload_sharepoint(cached_info[1],'ServiceDesk_Worklogs', stream=True)
+        upload_results = sharepoint_connector_o.batch_upload(batch_queue)
 
 
         logger.info("Main: Updating Cache with SharePoint info")
+        update_cache(cached_info, sharepoint_connector_o.get_uploaded_items(upload_results), 'Unique_ID')
         current_iteration = int(dates_dict.get('iteration',0))
         current_iteration += 1
         new_dates = {
@@ -240,5 +244,7 @@ def main():
         logger.error(f"Main: Error occured in main: {e}: Exit Code 1")
         logger.error("Main: Traceback:", exc_info=True)
         return 1
+    finally:
+        log_run_summary(logger)
 
 main()
\ No newline at end of file
@@ -6,6 +6,10 @@ os.chdir(project_root)
 from utils.Logger import *
 from scripts.SharePoint_Connector import *
 from utils.Utils import *
+from utils.Http_Client import Http_Client
+from utils.Response_Cache import Response_Cache
+from utils.Run_Summary import register_summary_section, log_run_summary
+from utils.Deadline import run_deadline
 
 script_name = Path(__file__).stem
 logger = setup_logger(script_name)
@@ -13,6 +17,7 @@ tokens_file_path = r"misc\tokens.json"
 cred_cache_file_path = r"cache\cred_vector_solutions_cache.json"
 categories_cache_file_path = r"cache\categories_cache.json"
 user_cache_file_path = r"cache\user_vector_solutions_cache.json"
+run_budget_seconds = 2 * 60 * 60
 all_tokens = read_from_json(tokens_file_path)
 vector_token = all_tokens['vector_solutions_tokens']
 training_record_key = vector_token['training_records_key']
@@ -22,6 +27,9 @@ base_url = "http://devsandbox.targetsolutions.com/v1/"
 headers = {
     'AccessToken': restful_token
 }
+http_client = Http_Client(logger)
+response_cache = Response_Cache()
+register_summary_section('vector response_cache', response_cache.get_stats)
 
 ##TESTED BELOW
 def get_all_users()-> list:
@@ -33,7 +41,7 @@ def get_all_users()-> list:
     """
     logger.info(f"Get Active Users: Getting active users.")
     url = f'http://devsandbox.targetsolutions.com/v1/users?'
-    response = requests.get(url, headers=headers)
+    response = http_client.request('get', url, headers=headers)
     if response.ok:
         logger.info(f"Get All Users: Response [{response.status_code}] valid.")
         data = response.json()
@@ -105,7 +113,7 @@ def get_users_groups(link:str) -> dict:
         data (dict): Holds the group info.
     """
     try:
-        response = requests.get(link,headers=headers)
+        response = http_client.request('get', link, headers=headers, conditional=True)
         if response.ok:
             data = response.json()
             return data.get('groups')
@@ -124,7 +132,7 @@ def get_users_credentials(link:str) -> dict:
         data (dict): Credential information.
     """
     try:
-        response = requests.get(link,headers=headers)
+        response = http_client.request('get', link, headers=headers, conditional=True)
         if response.ok:
             data = response.json()
             return data.get('credentials')
@@ -135,15 +143,34 @@ def get_users_credentials(link:str) -> dict:
     
     return ''
 
+def cached_get_json(url:str):
+    """
+    GETs a url once per run, later and concurrent calls for the same url reuse the first response.
+    The GET is revalidated against the body stored by the previous run, so an unchanged url comes back as a 304.
+    Failed responses are not cached.
+
+    Args:
+        url (str): Url to get.
+    Returns:
+        data (dict): Decoded json, None if the response was not valid.
+    """
+    def fetch():
+        response = http_client.request('get', url, headers=headers, conditional=True)
+        if response.ok:
+            logger.info(f"Cached Get Json: Response [{response.status_code}] valid.")
+            return response.json()
+        logger.warning(f"Cached Get Json: Response [{response.status_code}] not valid.")
+        return None
+
+    return response_cache.get_or_fetch(url, fetch, should_cache=lambda data: data is not None)
+
 def get_categories() -> dict:
     """
     """
     logger.info(f"Get All Credential Categories.")
     url = f'http://devsandbox.targetsolutions.com/v1/credentials'
-    response = requests.get(url, headers=headers)
-    if response.ok:
-        logger.info(f"Get All Users: Response [{response.status_code}] valid.")
-        data = response.json()
+    data = cached_get_json(url)
+    if data is not None:
         return data
     
     return None
@@ -269,12 +296,11 @@ def get_credentials_list() -> dict:
     """
     logger.info(f"Get Credentials: Getting Credentials")
     url = 'http://devsandbox.targetsolutions.com/v1/credentials'
-    response = requests.get(url, headers=headers)
-    if response.ok:
-        data = response.json()
+    data = cached_get_json(url)
+    if data is not None:
         return data
     else:
-        logger.warning(f"Get Credentials: Response [{response.status_code}] not valid.")
+        logger.warning(f"Get Credentials: No credentials retrieved.")
 
     return []
 
@@ -565,71 +591,82 @@ def split_into_sharepoint_lists(user_dict:dict)->dict:
     return sharepoint_upload_dict
 
 def main():
-    logger.info(f"Begin extraction and transformation operations.")
-
-    categories_dict = clean_categories(get_categories())
-
-    users = get_all_users()
-    users_dict = filter_active_users(users)
-
-    credential_list = get_credentials_list()
-    credential_dict = map_credentials(credential_list)
-
-    users_dict = get_links(users_dict, credential_dict)
-    users_dict = remove_non_essential(users_dict)
-
-    hierarchy = create_station_hierarchy(users_dict)
-    users_dict = assign_supervisor(users_dict, hierarchy)
-
-    sharepoint_upload_dict = split_into_sharepoint_lists(users_dict)
-    sharepoint_upload_dict['cred_dict'] = add_categoryid(sharepoint_upload_dict['cred_dict'], categories_dict)
-    sharepoint_upload_dict['cat_dict'] = make_cateogoryid_unique(categories_dict)
-    logger.info(f"Completed extraction and transformation.")
-
-    sharepoint_connector_o = SharePoint_Connector(logger)
-    for filepath in [cred_cache_file_path, user_cache_file_path, categories_cache_file_path]:
-        logger.info(f"Begin caching operations.")
-        if 'cred' in filepath:
-            unique_id = 'unique_id'
-            current_dict = sharepoint_upload_dict['cred_dict']
-            sp_list_name = 'TFD_Credential_List'
-        elif 'user' in filepath:
-            unique_id = 'userid'
-            current_dict = sharepoint_upload_dict['user_dict']
-            sp_list_name = 'TFD_User_List'
-        elif 'categories' in filepath:
-            unique_id = 'categoryid'
-            current_dict = sharepoint_upload_dict['cat_dict']
-            sp_list_name = 'TFD_Credential_Categories'
-
-        cached_sharepoint_items = sharepoint_connector_o.get_item_ids(sp_list_name)
-        current_formatted_dict, formatted_sharepoint_dict = reformat_dict(cached_sharepoint_items, current_dict, unique_id)
-        logger.debug(f"Cached {sp_list_name} Sharepoint: {json.dumps(formatted_sharepoint_dict,indent=4)}")
-        logger.debug(f"Current {sp_list_name} Dict: {json.dumps(current_formatted_dict,indent=4)}")
-        previous_cache = read_from_json(filepath)
-        previous_cache[1] = formatted_sharepoint_dict
-
-        current_data = cache_operation(current_formatted_dict,previous_cache, delete=True, logger=logger)
-
-        status = current_data[2].get('status')
-        if status == 'exit':
-            logger.info("No changes detected, continuing.")
-            continue
-        else:
-            logger.info("Changes detected in checksum, checking changes.")
+    try:
+        run_deadline.start(run_budget_seconds)
+        logger.info(f"Begin extraction and transformation operations.")
+
+        categories_dict = clean_categories(get_categories())
+
+        users = get_all_users()
+        users_dict = filter_active_users(users)
+
+        credential_list = get_credentials_list()
+        credential_dict = map_credentials(credential_list)
+
+        users_dict = get_links(users_dict, credential_dict)
+        users_dict = remove_non_essential(users_dict)
+
+        hierarchy = create_station_hierarchy(users_dict)
+        users_dict = assign_supervisor(users_dict, hierarchy)
+
+        sharepoint_upload_dict = split_into_sharepoint_lists(users_dict)
+        sharepoint_upload_dict['cred_dict'] = add_categoryid(sharepoint_upload_dict['cred_dict'], categories_dict)
+        sharepoint_upload_dict['cat_dict'] = make_cateogoryid_unique(categories_dict)
+        logger.info(f"Completed extraction and transformation.")
+
+        sharepoint_connector_o = SharePoint_Connector(logger)
+        #Changed lists are uploaded together so their items share batches: {sp_list_name: (filepath, current_data)}
+        changed_lists = {}
+        for filepath in [cred_cache_file_path, user_cache_file_path, categories_cache_file_path]:
+            logger.info(f"Begin caching operations.")
+            if 'cred' in filepath:
+                unique_id = 'unique_id'
+                current_dict = sharepoint_upload_dict['cred_dict']
+                sp_list_name = 'TFD_Credential_List'
+            elif 'user' in filepath:
+                unique_id = 'userid'
+                current_dict = sharepoint_upload_dict['user_dict']
+                sp_list_name = 'TFD_User_List'
+            elif 'categories' in filepath:
+                unique_id = 'categoryid'
+                current_dict = sharepoint_upload_dict['cat_dict']
+                sp_list_name = 'TFD_Credential_Categories'
+
+            cached_sharepoint_items = sharepoint_connector_o.get_item_changes(sp_list_name)
+            current_formatted_dict, formatted_sharepoint_dict = reformat_dict(cached_sharepoint_items, current_dict, unique_id)
+            logger.debug(f"Cached {sp_list_name} Sharepoint: {json.dumps(formatted_sharepoint_dict,indent=4)}")
+            logger.debug(f"Current {sp_list_name} Dict: {json.dumps(current_formatted_dict,indent=4)}")
+            previous_cache = read_from_json(filepath)
+            previous_cache[1] = formatted_sharepoint_dict
+
+            current_data = cache_operation(current_formatted_dict,previous_cache, delete=True, logger=logger)
+
+            status = current_data[2].get('status')
+            if status == 'exit':
+                logger.info("No changes detected, continuing.")
+                continue
+            else:
+                logger.info("Changes detected in checksum, checking changes.")
 
-        logger.info("Formatting and batching for upload.")
-        batched_queue=sharepoint_connector_o.format_and_batch_for_upload_sharepoint(current_data[1],sp_list_name)
-        logger.info(f"Formatted and batched {len(batched_queue)} items for SharePoint")
-        logger.info(f"Uploading {len(batched_queue)} batches to SharePoint.")
+            changed_lists[sp_list_name] = (filepath, current_data)
 
-        sharepoint_connector_o.batch_upload(batched_queue)
-        logger.info("Uploaded items to SharePoint.")
+        if changed_lists:
+            logger.info(f"Formatting and batching {', '.join(changed_lists)} for upload.")
+            batched_queue=sharepoint_connector_o.format_and_batch_lists_for_upload({sp_list_name: current_data[1] for sp_list_name, (_, current_data) in changed_lists.items()})
+            logger.info(f"Formatted and batched {len(batched_queue)} items for SharePoint")
+            logger.info(f"Uploading {len(batched_queue)} batches to SharePoint.")
+
+            upload_results = sharepoint_connector_o.batch_upload(batched_queue)
+            logger.info("Uploaded items to SharePoint.")
+
+            logger.info("Updating Cache with SharePoint info")
+            for sp_list_name, (filepath, current_data) in changed_lists.items():
+                update_cache(current_data, sharepoint_connector_o.get_uploaded_items(upload_results, sp_list_name), 'Unique_ID')
+                write_to_json(current_data,filepath)
 
-        logger.info("Updating Cache with SharePoint info")
-        write_to_json(current_data,filepath)
-        
         logger.info(f"ETL Completed successfully: Exit Code 0")
+    finally:
+        log_run_summary(logger)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,13 @@
 #ETLs\scripts\Azure_Connector.py
 from utils.Connector import *
-import json, requests, time
+from utils.Batch_Packer import batch_packer
+import json, requests, time, asyncio
 from collections import deque
 from azure.identity import UsernamePasswordCredential
 
 class Azure_Connector(Connector):
-    def __init__(self,logger):
-        super().__init__(logger, token_key='azure_tokens')
+    def __init__(self,logger, **connector_options):
+        super().__init__(logger, token_key='azure_tokens', **connector_options)
         
     def get_users_info(self) -> dict:
         """
@@ -20,35 +21,38 @@ class Azure_Connector(Connector):
         self.get_user_license_info()
         return self.user_info_dict
   
-    def get_users(self):
+    def get_users(self, stream=False):
         """
         Gets Azure User Info and saves to a dict with the Azure ID as they key.
+
+        Args:
+            stream (bool): Decode pages incrementally with stream_users instead of keeping every decoded page in memory.
         """
         self.logger.info("Getting Azure User Info...")
         url = "https://graph.microsoft.com/v1.0/users?$select=displayName,mail,department,jobTitle,employeeId,id,accountEnabled,assignedLicenses,createdDateTime,deletedDateTime&$expand=manager($select=displayName)"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
+        if stream:
+            return self.stream_users(url)
+
         all_users_list = []
 
         while url:
-            response = requests.get(url, headers=headers)
+            info_dict = {
+                'url': url,
+                'headers': {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                'method': 'get'
+            }
+            users_response = self.send_response(info_dict)
 
-            if response.status_code==200:
-                data = response.json()
+            if users_response['status'] == 'success':
+                data = users_response['response']
                 all_users_list.extend(data['value'])
                 self.logger.info(f"Added {len(data['value'])} users, total users: {len(all_users_list)}")
                 url = data.get('@odata.nextLink', None)
-            elif response.status_code == 401:
-                self.logger.warning("401 Unauthorized. Refreshing access token.")
-                self.access_token = self.get_access_token()
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
             else:
-                self.logger.error(f"Failed to connect: {response.status_code}: {json.dumps(response.json(),indent=4)}")
+                self.logger.error(f"Failed to connect: {users_response}")
                 break
 
         all_users_dict = {}
@@ -61,73 +65,144 @@ class Azure_Connector(Connector):
         # self.logger.debug(json.dumps(all_users_dict,indent=4))
         return all_users_dict
 
+    def stream_users(self, url: str) -> dict:
+        """
+        Streams user pages, adding each user to the dict as it is decoded.
+
+        Args:
+            url (str): First page of the users query.
+        Returns:
+            all_users_dict (dict): Dict of users with the Azure ID as the key.
+        """
+        all_users_dict = {}
+
+        while url:
+            info_dict = {
+                'url': url,
+                'headers': {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                'method': 'get'
+            }
+
+            user_stream = self.send_streaming_response(info_dict, array_keys=('value',))
+            if user_stream is None:
+                self.logger.error("Failed to stream Azure users.")
+                break
+
+            for user in user_stream.records():
+                user['licenses'] = []
+                all_users_dict[user['id']] = user
+            self.logger.info(f"Added {user_stream.record_count} users, total users: {len(all_users_dict)}")
+            url = user_stream.metadata.get('@odata.nextLink')
+
+        self.logger.info("Retrieved Azure User Info.")
+        return all_users_dict
+
     def get_user_license_info(self):
         """
         Batches users, retrieves licenses via their Azure ID, updates the users_info_dict.
         """
         self.logger.info("Retrieving Azure User License Info...")
-        batch_queue = deque()
-        batch_list = []
         self.logger.info(f"Batching users for Azure query.")
-        for user in self.user_info_dict:
-            user_id = user 
-            batch_list.append({
+        batch_queue = deque(batch_packer.pack(
+            {
                 'id':str(user_id),
                 "method": "GET",
                 "url" : f"/users/{user_id}/licenseDetails"
-            })
-            if len(batch_list) == 20:
-                batch_body = {"requests":batch_list}
-                batch_queue.append(batch_body)
-                batch_list = []
-        
-        if len(batch_list) > 0:
-            batch_body = {"requests":batch_list}
-            batch_queue.append(batch_body)
-            batch_list = []
-        
+            }
+            for user_id in self.user_info_dict
+        ))
+
         self.logger.info(f"Finished batching users. Total batches {len(batch_queue)}")
 
-        while batch_queue:
-            self.logger.info(f"Getting batch: {len(batch_queue)}")
-            batch_url = "https://graph.microsoft.com/v1.0/$batch"
-            headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
+        failed_batches = asyncio.run(self.async_get_user_license_batches(batch_queue))
+        failed_ids = [user_id for failed_batch in failed_batches for user_id in failed_batch]
+        if failed_ids:
+            #Users without their licenses would be cached and uploaded with empty Licenses, stop the run instead.
+            raise RuntimeError(f"Failed to get licenses for {len(failed_ids)} users: {failed_ids[:20]}")
+        self.logger.info("Retrieved Azure User License Info.")
+
+    async def async_get_user_license_batches(self, batch_queue: deque) -> list:
+        """
+        Posts every license batch concurrently, with at most max_concurrency batches in flight.
+
+        Args:
+            batch_queue (deque): Deque of $batch bodies packed by batch_packer.
+        Returns:
+            failed_batches (list): List with the failed user ids of each batch, see get_user_license_batch.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self.run_in_thread(semaphore, self.get_user_license_batch, batch_body) for batch_body in batch_queue))
+
+    def get_user_license_batch(self, batch_body: dict) -> list:
+        """
+        Posts a single licenseDetails $batch and saves the filtered licenses onto user_info_dict.
+        The batch goes through send_response, so 401s, 429s, 5xx and connection errors of the whole batch are retried per the retry_policy.
+        Sub-requests answered with a 401 or a transient status are sent again in a smaller batch, the others keep their result.
+
+        Args:
+            batch_body (dict): $batch body holding licenseDetails requests.
+        Returns:
+            failed_ids (list): Ids of the users whose licenses could not be retrieved.
+        """
+        batch_url = "https://graph.microsoft.com/v1.0/$batch"
+        licenses_to_find = ['SPE_F5_SECCOMP_GCC', 'M365_G5_GCC','WACONEDRIVESTANDARD_GOV']
+        pending_requests = batch_body['requests']
+        failed_ids = []
+        attempt = 1
+        started_at = time.monotonic()
+
+        while pending_requests:
+            self.logger.info(f"Getting batch of {len(pending_requests)} users.")
+            info_dict = {
+                'url': batch_url,
+                'headers': {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                'json_body': {'requests': pending_requests},
+                'method': 'post',
+                #The $batch only holds GETs, so it is safe to send again.
+                'retry_post': True,
+                'compress': True,
+                'rate_tokens': len(pending_requests)
             }
-            batch_body = batch_queue.pop()
-            retries = 3
-            for attempt in range(retries):
-                response = requests.post(batch_url,headers=headers,json=batch_body)
-
-                if response.status_code == 200:
-                    results = response.json().get("responses",[])
-                    licenses_to_find = ['SPE_F5_SECCOMP_GCC', 'M365_G5_GCC','WACONEDRIVESTANDARD_GOV']
-
-                    for item in results:
-                        if 'id' in item and 'body' in item:
-                            id = item['id']
-                            licenses_raw = item['body'].get('value',[])
-                            licenses_filtered = []
-                            for license in licenses_raw:
-                                license_value = license['skuPartNumber']
-                                if license_value.upper() in licenses_to_find:
-                                    licenses_filtered.append(license_value)
-                                if id in self.user_info_dict:
-                                    self.user_info_dict[id]['licenses'] = licenses_filtered
-                    break
-                elif response.status_code == 401:
-                    self.logger.warning("401 Unauthorized. Refreshing access token.")
-                    self.access_token = self.get_access_token()
-                    headers = {
-                        "Authorization": f"Bearer {self.access_token}",
-                        "Content-Type": "application/json"
-                    }
-                    time.sleep(1)
+            batch_response = self.send_response(info_dict)
+            if batch_response['status'] != 'success':
+                self.logger.error(f"Failed to get licenses for {len(pending_requests)} users: {batch_response.get('response')}")
+                return failed_ids + [request['id'] for request in pending_requests]
+
+            sub_responses = {str(item.get('id')): item for item in batch_response['response'].get('responses', []) if 'status' in item}
+            retry_requests = []
+            retry_after = None
+            for request in pending_requests:
+                sub_response = sub_responses.get(request['id'])
+                status = int(sub_response['status']) if sub_response else None
+
+                if status == 200:
+                    licenses_raw = (sub_response.get('body') or {}).get('value', [])
+                    licenses_filtered = [license['skuPartNumber'] for license in licenses_raw if license['skuPartNumber'].upper() in licenses_to_find]
+                    if request['id'] in self.user_info_dict:
+                        self.user_info_dict[request['id']]['licenses'] = licenses_filtered
+                elif status is None or status == 401 or self.retry_policy.is_retryable(status):
+                    retry_requests.append(request)
+                    retry_after = retry_after or (sub_response or {}).get('headers', {}).get('Retry-After')
+                elif status == 404:
+                    self.logger.warning(f"User {request['id']} no longer exists, skipping their licenses.")
                 else:
-                    self.logger.error(f"Failed to get licenses: {response.status_code} : {json.dumps(response.json(),indent=4)}")
-                    break
-        self.logger.info("Retrieved Azure User License Info.")
+                    self.logger.error(f"Failed to get licenses for {request['id']}: {status}: {sub_response.get('body')}")
+                    failed_ids.append(request['id'])
+
+            if retry_requests:
+                self.logger.warning(f"{len(retry_requests)} license requests failed with a transient status, retrying them.")
+                if not self.backoff(attempt, started_at, retry_after, url=batch_url, method='post'):
+                    return failed_ids + [request['id'] for request in retry_requests]
+                attempt += 1
+            pending_requests = retry_requests
+
+        return failed_ids
 
     def get_license_usage(self):
         """
@@ -135,29 +210,28 @@ class Azure_Connector(Connector):
         """
         self.logger.info("Getting Azure License Info...")
         url = "https://graph.microsoft.com/v1.0/subscribedSkus"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
         all_license_lists = []
 
         while url:
-            response = requests.get(url, headers=headers)
+            info_dict = {
+                'url': url,
+                'headers': {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                'method': 'get',
+                #SKUs rarely change between runs, revalidate with the stored ETag instead of downloading them again.
+                'conditional': True
+            }
+            license_response = self.send_response(info_dict)
 
-            if response.status_code==200:
-                data = response.json()
+            if license_response['status'] == 'success':
+                data = license_response['response']
                 all_license_lists.extend(data['value'])
                 self.logger.info(f"Added {len(data['value'])} users, total users: {len(all_license_lists)}")
                 url = data.get('@odata.nextLink', None)
-            elif response.status_code == 401:
-                self.logger.warning("401 Unauthorized. Refreshing access token.")
-                self.access_token = self.get_access_token()
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
             else:
-                self.logger.error(f"Failed to connect: {response.status_code}: {json.dumps(response.json(),indent=4)}")
+                self.logger.error(f"Failed to connect: {license_response}")
                 break
 
         all_license_dict = {}
@@ -204,22 +278,15 @@ class Azure_Connector(Connector):
         final_machines = []
 
         while url:
-            response = requests.get(url, headers=headers)
+            response = self.get_management_response(url, headers, credential)
 
-            if response.status_code==200:
+            if response is not None and response.status_code==200:
                 data = response.json()
                 cot_machines.extend(data['value'])
                 self.logger.info(f"Added {len(data['value'])} items, total items: {len(cot_machines)}")
                 url = data.get('@odata.nextLink', None)
-            elif response.status_code == 401:
-                self.logger.warning("401 Unauthorized. Refreshing access token.")
-                self.access_token = self.get_access_token()
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
             else:
-                self.logger.error(f"Failed to connect: {response.status_code}: {json.dumps(response.json(),indent=4)}")
+                self.logger.error(f"Failed to connect: {response.status_code if response is not None else 'no response'}: {response.text if response is not None else ''}")
                 break
 
 
@@ -233,10 +300,43 @@ class Azure_Connector(Connector):
         for machine in azure_arc_machine_info:
             full_id = machine
             detail_url = f"https://management.azure.com{full_id}?api-version=2020-08-02"
-            detail_resp = requests.get(detail_url,headers=headers)
+            detail_resp = self.get_management_response(detail_url, headers, credential)
 
-            if detail_resp.status_code == 200:
+            if detail_resp is not None and detail_resp.status_code == 200:
                 full_machine = detail_resp.json()
                 final_machines.append(full_machine)
         return final_machines
+
+    def get_management_response(self, url: str, headers: dict, credential) -> requests.Response:
+        """
+        GETs an Azure Resource Manager url with the management token. send_response can't be used as it authenticates with the Graph token,
+        so this retries 429s, 5xx and connection errors per the retry_policy itself and gets a new management token on a 401.
+
+        Args:
+            url (str): Management url.
+            headers (dict): Headers holding the management token, its Authorization is replaced in place after a 401.
+            credential (UsernamePasswordCredential): Credential the management token came from.
+        Returns:
+            response (requests.Response): Last response, None if every attempt failed to connect.
+        """
+        response = None
+        started_at = time.monotonic()
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            try:
+                response = self.http_client.request('get', url, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.logger.warning(f"Get Management Response: {attempt}/{self.retry_policy.max_attempts} Connection error: {e}")
+                if not self.backoff(attempt, started_at, url=url):
+                    return None
+                continue
+
+            if response.status_code == 401:
+                self.logger.warning("401 Unauthorized. Refreshing management token.")
+                headers['Authorization'] = f"Bearer {credential.get_token('https://management.azure.com/.default').token}"
+            elif self.retry_policy.is_retryable(response.status_code):
+                if not self.backoff(attempt, started_at, response.headers.get('Retry-After'), url=url):
+                    return response
+            else:
+                return response
+        return response
         
\ No newline at end of file
@@ -1,20 +1,34 @@
 from utils.Connector import *
 from collections import deque
+import asyncio
 from urllib.parse import urlencode
 
 class ServiceDesk_Connector(Connector):
-    def __init__(self, logger):
-        super().__init__(logger, token_key='service_desk_tokens')
+    auth_scheme = 'Zoho-oauthtoken'
+
+    def __init__(self, logger, **connector_options):
+        super().__init__(logger, token_key='service_desk_tokens', **connector_options)
 
         self.base_url = "https://servicedesk.torranceca.gov"
         self.max_row_count = 100
 
         self.headers = {
             "Accept": "application/vnd.manageengine.sdp.v3+json",
-            "Authorization": f"Zoho-oauthtoken {self.access_token}",
+            "Authorization": self.build_auth_header(),
             "Content-Type": "application/x-www-form-urlencoded" 
         }
 
+    def get_request_headers(self) -> dict:
+        """
+        Gets a copy of the headers for one request, with the current access token.
+        Every request gets its own copy as send_response refreshes the Authorization header in place,
+        so concurrent requests never read a token another thread already replaced.
+
+        Returns:
+            headers (dict): Headers for a single request.
+        """
+        return {**self.headers, "Authorization": self.build_auth_header()}
+
     def build_servicedesk_asset_data(self, change_item:dict, module_name)->str:
         """
         Takes in a dict that holds the item that needs to be formatted for ServiceDesk.
@@ -68,7 +82,8 @@ class ServiceDesk_Connector(Connector):
                 }
             }
 
-        formatted_item = json.dumps(asset_data,indent=4)
+        #Compact separators, the body is urlencoded into the PUT as input_data and pretty-printing only added bytes.
+        formatted_item = json.dumps(asset_data, separators=(',', ':'))
         self.logger.info(f"Build_Asset_Data: Asset Data: {formatted_item}")
 
         return formatted_item
@@ -144,7 +159,7 @@ class ServiceDesk_Connector(Connector):
 
             info_dict = {
                 "url" : api_url,
-                "headers" : self.headers,
+                "headers" : self.get_request_headers(),
                 "data": input_data,
                 "method": "put"
             }
@@ -254,7 +269,7 @@ class ServiceDesk_Connector(Connector):
 
         info_dict = {
             "url" : final_url,
-            "headers" : self.headers,
+            "headers" : self.get_request_headers(),
             "method": "get"
         }
 
@@ -280,34 +295,89 @@ class ServiceDesk_Connector(Connector):
         
         return (has_more_rows, asset_dict)
 
-    def get_asset_by_id(self, asset_id: str) -> dict:
+    def build_asset_by_id_info_dict(self, asset_id: str) -> dict:
         """
-        Takes in a str, request detailed information from it, returns a dict.
-        
+        Builds the info_dict used to request detailed information for a single asset.
+
         Args:
             asset_id (str): id of the asset
-
         Returns:
-            detailed_asset_dict (dict): Dict containing details information on the asset.
+            info_dict (dict): Dict accepted by send_response.
         """
-        self.logger.info(f"Get_Asset_by_ID: Getting list of assets for asset_id: {asset_id}")
-
         api_url = f'{self.base_url}/api/v3/assets/{asset_id}'
         self.logger.debug(f"Get_Asset_by_ID: Calling {api_url}")
 
         info_dict = {
             "url" : api_url,
-            "headers" : self.headers,
-            "method": "get"
+            "headers" : self.get_request_headers(),
+            "method": "get",
+            "cache": True,
+            "hedge": True
         }
 
-        response_dict = self.send_response(info_dict)
+        return info_dict
+
+    def get_asset_by_id(self, asset_id: str) -> dict:
+        """
+        Takes in a str, request detailed information from it, returns a dict.
+        
+        Args:
+            asset_id (str): id of the asset
+
+        Returns:
+            detailed_asset_dict (dict): Dict containing details information on the asset.
+        """
+        self.logger.info(f"Get_Asset_by_ID: Getting list of assets for asset_id: {asset_id}")
+
+        response_dict = self.send_response(self.build_asset_by_id_info_dict(asset_id))
 
         asset_info = response_dict.get('response',{}).get('asset',{})
         
         return asset_info
 
-        # self.logger.info(f"Get_Asset_by_ID: Response: {json.dumps(response_dict,indent=4)}")
+    async def async_get_asset_by_id(self, asset_id: str, semaphore: asyncio.Semaphore = None) -> dict:
+        """
+        Async version of get_asset_by_id.
+
+        Args:
+            asset_id (str): id of the asset
+            semaphore (asyncio.Semaphore): Shared semaphore bounding the number of in-flight requests.
+        Returns:
+            detailed_asset_dict (dict): Dict containing details information on the asset.
+        """
+        self.logger.info(f"Async_Get_Asset_by_ID: Getting asset for asset_id: {asset_id}")
+
+        response_dict = await self.async_send_response(self.build_asset_by_id_info_dict(asset_id), semaphore)
+
+        return response_dict.get('response',{}).get('asset',{})
+
+    async def async_get_assets_by_ids(self, asset_ids: list) -> dict:
+        """
+        Gets detailed information for every asset_id concurrently, with at most max_concurrency requests in flight.
+
+        Args:
+            asset_ids (list): List of asset ids.
+        Returns:
+            asset_details_dict (dict): Dict of detailed assets with the asset_id as the key.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        asset_details = await asyncio.gather(*(self.async_get_asset_by_id(asset_id, semaphore) for asset_id in asset_ids))
+
+        return dict(zip(asset_ids, asset_details))
+
+    def get_assets_by_ids(self, asset_ids: list) -> dict:
+        """
+        Sync facade over async_get_assets_by_ids.
+
+        Args:
+            asset_ids (list): List of asset ids.
+        Returns:
+            asset_details_dict (dict): Dict of detailed assets with the asset_id as the key.
+        """
+        self.logger.info(f"Get_Assets_by_IDs: Getting details for {len(asset_ids)} assets.")
+        if not asset_ids:
+            return {}
+        return asyncio.run(self.async_get_assets_by_ids(list(asset_ids)))
 
     def get_list_of_item_ids(self, module_name: str, page_number: int, fields_required:list = None, search_criteria:dict = None)-> dict:
         """
@@ -343,7 +413,7 @@ class ServiceDesk_Connector(Connector):
 
         info_dict = {
             "url" : final_url,
-            "headers" : self.headers,
+            "headers" : self.get_request_headers(),
             "method": "get"
         }
 
@@ -363,12 +433,13 @@ class ServiceDesk_Connector(Connector):
         Returns:
             id_dict (dict): Dict that contains the worklogs
         """
-        response_list = []
+        id_info_list = []
+        info_dict_list = []
 
         total_items = len(worklog_dict)
         for counter, values in enumerate(worklog_dict.values(), start=1):
             module_id = values.get('module_id')
-            self.logger.info(f"Get_Worklogs: Getting worklogs ({counter}/{total_items}) for module: ({module_name.upper()}) | Ticket: {module_id}")
+            self.logger.info(f"Get_Worklogs: Queuing worklogs ({counter}/{total_items}) for module: ({module_name.upper()}) | Ticket: {module_id}")
 
             params = {
                 "input_data": json.dumps({
@@ -391,13 +462,16 @@ class ServiceDesk_Connector(Connector):
 
             info_dict = {
                 "url" : final_url,
-                "headers" : self.headers,
-                "method": "get"
+                "headers" : self.get_request_headers(),
+                "method": "get",
+                "hedge": True
             }
 
-            id_info_dict = {'module_id': module_id}
+            id_info_list.append({'module_id': module_id})
+            info_dict_list.append(info_dict)
 
-            response_list.append([id_info_dict,self.send_response(info_dict)])
+        self.logger.info(f"Get_Worklogs: Getting worklogs for {total_items} ({module_name.upper()}) tickets concurrently.")
+        response_list = [list(response_pair) for response_pair in zip(id_info_list, self.send_responses(info_dict_list))]
 
         for response_pair in response_list:
             id_info = response_pair[0]
@@ -443,12 +517,12 @@ class ServiceDesk_Connector(Connector):
         Returns:
             id_dict (dict): Dict that contains the worklogs
         """
-        response_list = []
+        info_dict_list = []
 
         total_items = len(worklog_dict)
         for counter, values in enumerate(worklog_dict.values(), start=1):
             module_id = values.get('module_id')
-            self.logger.info(f"Get_Worklogs: Getting list of tasks ({counter}/{total_items}) for PROJECTS |  Ticket: {module_id}")
+            self.logger.info(f"Get_Worklogs: Queuing list of tasks ({counter}/{total_items}) for PROJECTS |  Ticket: {module_id}")
 
             params = {
                 "input_data": json.dumps({
@@ -471,13 +545,14 @@ class ServiceDesk_Connector(Connector):
 
             info_dict = {
                 "url" : final_url,
-                "headers" : self.headers,
+                "headers" : self.get_request_headers(),
                 "method": "get"
             }
 
-            id_info_dict = {'module_id': module_id}
+            info_dict_list.append(info_dict)
 
-            raw_response = self.send_response(info_dict)
+        self.logger.info(f"Get_Worklogs: Getting list of tasks for {total_items} PROJECTS concurrently.")
+        for raw_response in self.send_responses(info_dict_list):
             tasks = raw_response.get('response',{}).get('tasks',[])
             for task in tasks:
                 task_id = task.get('id')
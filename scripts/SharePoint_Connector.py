@@ -1,417 +1,804 @@
 #ETLs\scripts\SharePoint_Connector.py
 from utils.Connector import *
-import json, requests, traceback, time
-from collections import deque
+from utils.Delta_Store import delta_store
+from utils.Metadata_Cache import metadata_cache
+from utils.Schema_Registry import schema_registry, List_Schema
+from utils.Rate_Limiter import Adaptive_Concurrency
+from utils.Batch_Packer import batch_packer
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import json, requests, traceback, time, asyncio
+from collections import deque, Counter
 
 class SharePoint_Connector(Connector):
-    def __init__(self,logger):
-        super().__init__(logger, token_key='sharepoint_tokens')
+    #Graph's maximum page size for list items, the default page is far smaller.
+    item_page_size = 5000
+    #Longest a ready batch_upload retry waits for others to fill its batch once no fresh batches are left.
+    retry_coalesce_seconds = 1.0
+
+    def __init__(self,logger, **connector_options):
+        super().__init__(logger, token_key='sharepoint_tokens', **connector_options)
         
     def get_site_id(self) -> str:
         """
-        Gets site id from cache if present, or gets site id via API call using cached information.
+        Gets site id from the metadata cache if present, or gets site id via API call using the site domain and path in tokens.json.
 
         Returns:
-            site_id (str): SharePoint side id. (Will need to take in a domain and path to be dynamic in future.)
+            site_id (str): SharePoint side id, None if it could not be retrieved. (Will need to take in a domain and path to be dynamic in future.)
         """
-        if self.token_info['site_id']:
-            site_id = self.token_info['site_id']
-            self.logger.info(f"Get Site Id: Getting site id from cache: {site_id}")
+        site_key = f"{self.token_info.get('site_domain')}:{self.token_info.get('site_path')}"
+        site_id = metadata_cache.get('site_id', site_key)
+        if site_id:
+            self.logger.debug(f"Get Site Id: Getting site id from cache: {site_id}")
             return site_id
-        else:
-            self.logger.info(f"Get Site Id: Site ID not in cache, retrieving via API...")
 
-            try:
-                site_domain = self.token_info['site_domain']
-                site_path = self.token_info['site_path']
+        #Older tokens.json files still carry the site id, it moves to the metadata cache.
+        if (site_id:= self.token_info.get('site_id')):
+            metadata_cache.set('site_id', site_key, site_id)
+            return site_id
 
-                info_dict = {
-                    'headers': {"Authorization": f"Bearer {self.access_token}"},
-                    'url' : f"https://graph.microsoft.com/v1.0/sites/{site_domain}:{site_path}",
-                    'method': 'get'
-                    }
-                
-                site_response = self.send_response(info_dict)
-
-                if site_response['status'] == 'success':
-                    self.logger.info("Get Site Id: Succeeded.")
-                    site_dict = site_response['response']
-                    site_id = site_dict.get('id')
-                    self.token_info['site_id'] = site_id
-                    self.logger.info(f"Get Site Id:Site ID: {site_id}")
-                    self.load_token_to_json()
-                else:
-                    self.logger.error(f"Get Site Id: Failed to connect: {json.dumps(site_response,indent=4)}")
-                
-                
-            except requests.exceptions.RequestException as e:
-                self.logger.error(f"Get Site Id:  Error getting site ID: {e}")
-                self.logger.error(f"Get Site Id:  Stack trace: {traceback.format_exc()}")
+        self.logger.info(f"Get Site Id: Site ID not in cache, retrieving via API...")
+
+        try:
+            site_domain = self.token_info['site_domain']
+            site_path = self.token_info['site_path']
+
+            info_dict = {
+                'headers': {"Authorization": f"Bearer {self.access_token}"},
+                'url' : f"https://graph.microsoft.com/v1.0/sites/{site_domain}:{site_path}",
+                'method': 'get',
+                'cache': True
+                }
+            
+            site_response = self.send_response(info_dict)
+
+            if site_response['status'] == 'success':
+                self.logger.info("Get Site Id: Succeeded.")
+                site_dict = site_response['response']
+                site_id = site_dict.get('id')
+                metadata_cache.set('site_id', site_key, site_id)
+                self.logger.info(f"Get Site Id:Site ID: {site_id}")
+                return site_id
+            else:
+                self.logger.error(f"Get Site Id: Failed to connect: {json.dumps(site_response,indent=4)}")
+            
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Get Site Id:  Error getting site ID: {e}")
+            self.logger.error(f"Get Site Id:  Stack trace: {traceback.format_exc()}")
                 
-    def get_list_id(self, list_name: str, repeat=True) -> str:
+    def get_list_id(self, list_name: str) -> str:
         """
-        Gets list id from cache if present, or gets site id via API call using cached information.
-        If repeat is False, will exit as the program could not find the ID.
+        Gets list id from the metadata cache if present, otherwise warms the cache with every list of the site and checks again.
 
         Args:
             list_name (str): Name of list to look for in SharePoint.
-            repeat (bool): Flag to tell the program not to check again and exit.
         
-            Returns:
-                list_id: List ID for list_name
-                False: When no list_id is found
+        Returns:
+            list_id: List ID for list_name
+            False: When no list_id is found
         """
-        self.logger.info(f"Get List ID: Getting List ID for: {list_name}")
+        site_id = self.get_site_id()
+        if not site_id:
+            self.logger.error(f"Get List ID: No site id, cannot look up {list_name}.")
+            return False
 
-        if list_name in self.token_info.get('list_info',{}):
-            list_id = self.token_info['list_info'][list_name].get('list_id')
-            if list_id:
-                self.logger.info(f"Get List ID: List ID found in cache for {list_name}: {list_id}")
-                return list_id
-            else:
-                self.logger.info(f"Get List ID: {list_name} is in cache, but List ID is missing.")
-        else:
-            self.logger.info(f"Get List ID: {list_name} is not in cache.")
+        list_id = metadata_cache.get('list_id', f"{site_id}:{list_name}")
+        if list_id:
+            self.logger.debug(f"Get List ID: List ID found in cache for {list_name}: {list_id}")
+            return list_id
 
-        if not repeat :
-            self.logger.warning(f"Get List ID: List ID not found for {list_name}, exiting.")
-            return False
-        
-        self.logger.info(f"Get List ID: Retrieving new IDs...")
-        try: 
-            site_id = self.get_site_id()
-            info_dict = {
-                'url': f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists",
-                'headers' : {"Authorization": f"Bearer {self.access_token}"},
-                'method': 'get'
-            }
-
-            list_id_response = self.send_response(info_dict)
-            if list_id_response['status'] == 'success':
-                    self.logger.info("Get Site Id: Succeeded.")
-                    list_info = list_id_response['response']
-                    for list_item in list_info.get('value',[]):
-                        cached_list_name = list_item['name']
-                        cached_list_id  = list_item['id']
-                        
-                        if 'list_info' not in self.token_info:
-                            self.token_info['list_info'] = {}
-
-                        self.token_info['list_info'].setdefault(cached_list_name, {})['list_id'] = cached_list_id 
-            else:
-                self.logger.error(f"Get Site Id: Failed to get list_id: {json.dumps(list_id_response)}")
-            
-            self.load_token_to_json()
+        self.logger.info(f"Get List ID: {list_name} is not in cache, retrieving new IDs...")
+        list_ids = self.warm_list_metadata([list_name])
+        if list_ids.get(list_name):
+            self.logger.info(f"Get List ID: List ID for {list_name}: {list_ids[list_name]}")
+            return list_ids[list_name]
+
+        self.logger.warning(f"Get List ID: List ID not found for {list_name}, exiting.")
+        return False
+
+    def warm_list_metadata(self, list_names: list = None) -> dict:
+        """
+        Reads every list of the site, with its columns, in one paged call. The list ids go to the metadata cache, so later lookups
+        of any list cost no requests. The columns of list_names without a registered schema go to the schema registry,
+        which maps those lists from them.
+
+        Args:
+            list_names (list): Lists about to be used, their columns are stored when they have no registered schema.
+        Returns:
+            list_ids (dict): Dict with the list name as the key and the list id as the value, empty if the lists could not be read.
+        """
+        site_id = self.get_site_id()
+        if not site_id:
+            self.logger.error(f"Warm List Metadata: No site id, cannot read the site's lists.")
+            return {}
+
+        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists?$select=id,name&$expand=columns"
+        list_ids = {}
+        list_columns = {}
+
+        try:
+            while url:
+                info_dict = {
+                    'url': url,
+                    'headers' : {"Authorization": f"Bearer {self.access_token}"},
+                    'method': 'get'
+                }
+
+                list_id_response = self.send_response(info_dict)
+                if list_id_response['status'] != 'success':
+                    self.logger.error(f"Warm List Metadata: Failed to get lists: {json.dumps(list_id_response)}")
+                    return {}
+
+                lists_page = list_id_response['response']
+                for list_item in lists_page.get('value',[]):
+                    list_ids[list_item['name']] = list_item['id']
+                    if 'columns' in list_item:
+                        list_columns[list_item['name']] = list_item['columns']
+                url = lists_page.get('@odata.nextLink')
 
         except Exception as e:
-            self.logger.error(f"Error getting SharePoint List ID: {e}")
-            return False
+            self.logger.error(f"Warm List Metadata: Error getting SharePoint lists: {e}")
+            return {}
 
-        self.logger.info(f"List IDs have been retrieved. Checking again for {list_name}...")
+        metadata_cache.set_many('list_id', {f"{site_id}:{list_name}": list_id for list_name, list_id in list_ids.items()})
+        discovered_lists = [list_name for list_name in (list_names or []) if list_name in list_columns and not schema_registry.get(list_name)]
+        for list_name in discovered_lists:
+            schema_registry.add_columns(list_name, list_columns[list_name])
 
-        #Calls the program again as it will check for the list_id again.
-        self.get_list_id(list_name,repeat=False)
+        self.logger.info(f"Warm List Metadata: Cached {len(list_ids)} list ids and the columns of {len(discovered_lists)} lists.")
+        return list_ids
 
-    def get_item_ids(self, list_name:str, params="") -> dict:
+    def get_item_ids(self, list_name:str, params="", stream=False, windows: int = 1) -> dict:
         """
         Takes in a list name, queries SharePoint for all items in the list and saves to a dict and writes to a json.
+        Pages are requested item_page_size at a time and the next page is already downloading while the current one is read.
 
         Args:
             list_name (str): Name of the SharePoint list.
             params (str): Option parameters to filter the list.
+            stream (bool): Decode pages incrementally with iter_items instead of holding each decoded page in memory.
+            windows (int): Split the list into this many id ranges downloaded in parallel. Ignored when params has its own $filter.
         
         Returns:
-            sharepoint_list_items (dict): Dict containing SharePoint list contents.
+            sharepoint_list_items (dict): Dict containing SharePoint list contents, None if a page failed.
         """
-        sharepoint_list_items = {}
+        if stream:
+            sharepoint_list_items = dict(self.iter_items(list_name, params))
+            self.logger.info(f"Get Item Ids: Retrieved {len(sharepoint_list_items)} items from SharePoint.")
+            return sharepoint_list_items
+
         site_id = self.get_site_id()
         list_id = self.get_list_id(list_name)
+        items_url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items?$expand=fields{params}&$top={self.item_page_size}"
 
         self.logger.info("Get Item Ids: Retrieving items from SharePoint...")
 
-        
-        
-        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items?$expand=fields{params}"
-        while url:
-            try:
-                info_dict = {
-                    'url' : url,
-                    'headers' : {'Authorization': f'Bearer {self.access_token}'},
-                    'method': 'get'
-                    }
-                
-                item_id_response = self.send_response(info_dict)
-                
-                if item_id_response['status'] == 'success':
-                    self.logger.info(f"Get Item IDs: Succeeded.")
-                    list_info = item_id_response['response']
-                    for item in list_info.get('value',{}):
-                        if (fields:= item.get('fields')):
-                            sharepoint_id = item.get('id')
-                            sharepoint_list_items[sharepoint_id] = fields
-                    self.logger.info(f"Get Item Ids: Retrieved {len(sharepoint_list_items)} from SharePoint.")
-                    url = list_info.get('@odata.nextLink')
-                    if not url:
-                        self.logger.info(f"Get Item Ids: Retrieved {len(sharepoint_list_items)} items from SharePoint.")
-                        return sharepoint_list_items
-                else:
+        if windows > 1 and '$filter' not in params:
+            id_ranges = self.get_item_id_ranges(site_id, list_id, windows)
+            if id_ranges:
+                return self.get_item_windows(items_url, id_ranges)
+
+        return self.get_item_pages(items_url)
+
+    def get_item_pages(self, url: str, headers: dict = None) -> dict:
+        """
+        Follows @odata.nextLink from url, requesting the next page on a worker thread while the current page is read.
+
+        Args:
+            url (str): Url of the first page.
+            headers (dict): Extra headers sent with every page.
+        Returns:
+            sharepoint_list_items (dict): Dict with the sharepoint_id as the key and the fields as the value, None if a page failed.
+        """
+        sharepoint_list_items = {}
+
+        def build_info_dict(page_url: str) -> dict:
+            return {
+                'url' : page_url,
+                'headers' : {'Authorization': f'Bearer {self.access_token}', **(headers or {})},
+                'method': 'get',
+                'hedge': True
+                }
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='next_page') as page_executor:
+            next_page = page_executor.submit(self.send_response, build_info_dict(url))
+            while next_page:
+                try:
+                    item_id_response = next_page.result()
+                except Exception as e:
+                    self.logger.error(f"Get Item Ids: Error getting Items from SharePoint.: {e}")
+                    return None
+
+                if item_id_response['status'] != 'success':
                     self.logger.warning(f"Get Item Ids: Did not correctly retrieve items: {item_id_response}")
-                    break
+                    return None
+
+                list_info = item_id_response['response']
+                next_url = list_info.get('@odata.nextLink')
+                next_page = page_executor.submit(self.send_response, build_info_dict(next_url)) if next_url else None
+
+                for item in list_info.get('value',{}):
+                    if (fields:= item.get('fields')):
+                        sharepoint_list_items[item.get('id')] = fields
+                self.logger.info(f"Get Item Ids: Retrieved {len(sharepoint_list_items)} from SharePoint.")
+
+        self.logger.info(f"Get Item Ids: Retrieved {len(sharepoint_list_items)} items from SharePoint.")
+        return sharepoint_list_items
+
+    def get_item_id_ranges(self, site_id: str, list_id: str, windows: int) -> list:
+        """
+        Splits the list's ids, 1 to the highest id, into equal ranges.
+
+        Args:
+            site_id (str): SharePoint site id.
+            list_id (str): SharePoint list id.
+            windows (int): Number of ranges.
+        Returns:
+            id_ranges (list): List of (first_id, end_id) tuples, end exclusive. Empty if the highest id could not be found.
+        """
+        info_dict = {
+            'url': f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items?$select=id&$orderby=fields/ID desc&$top=1",
+            'headers': {'Authorization': f'Bearer {self.access_token}', 'Prefer': 'HonorNonIndexedQueriesWarningMayFailRandomly'},
+            'method': 'get'
+        }
+        response_dict = self.send_response(info_dict)
+        try:
+            max_id = int(response_dict['response']['value'][0]['id'])
+        except Exception:
+            self.logger.warning(f"Get Item Id Ranges: Could not find the highest id, downloading in a single window: {response_dict}")
+            return []
 
-            except Exception as e:
-                self.logger.error(f"Get Item Ids: Error getting Items from SharePoint.: {e}")
+        window_size = max(-(-max_id // windows), 1)
+        return [(first_id, first_id + window_size) for first_id in range(1, max_id + 1, window_size)]
+
+    def get_item_windows(self, items_url: str, id_ranges: list) -> dict:
+        """
+        Downloads each id range of the list in parallel, every range following its own pages.
+
+        Args:
+            items_url (str): Url of the list's first page, without a $filter.
+            id_ranges (list): List of (first_id, end_id) tuples, end exclusive.
+        Returns:
+            sharepoint_list_items (dict): Dict containing SharePoint list contents, None if any range failed.
+        """
+        #ID is indexed, the Prefer header only stops Graph rejecting the filter on lists it considers large.
+        headers = {'Prefer': 'HonorNonIndexedQueriesWarningMayFailRandomly'}
+
+        async def gather_windows():
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            return await asyncio.gather(*(
+                self.run_in_thread(semaphore, self.get_item_pages, f"{items_url}&$filter=fields/ID ge {first_id} and fields/ID lt {end_id}", headers)
+                for first_id, end_id in id_ranges
+            ))
+
+        self.logger.info(f"Get Item Windows: Downloading {len(id_ranges)} id ranges in parallel.")
+        window_items = asyncio.run(gather_windows())
+        if any(items is None for items in window_items):
+            return None
+
+        sharepoint_list_items = {}
+        for items in window_items:
+            sharepoint_list_items.update(items)
+        self.logger.info(f"Get Item Windows: Retrieved {len(sharepoint_list_items)} items from SharePoint.")
+        return sharepoint_list_items
         
-    def batch_upload(self, batched_queue: deque):
+    def iter_items(self, list_name:str, params=""):
+        """
+        Streams every item of a list, yielding each one while its page is still downloading.
+        Only the item being processed is held in memory, not the decoded page.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Option parameters to filter the list.
+        Yields:
+            item (tuple): (sharepoint_id, fields)
+        """
+        site_id = self.get_site_id()
+        list_id = self.get_list_id(list_name)
+        item_count = 0
+
+        self.logger.info("Iter Items: Streaming items from SharePoint...")
+        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items?$expand=fields{params}&$top={self.item_page_size}"
+        while url:
+            info_dict = {
+                'url' : url,
+                'headers' : {'Authorization': f'Bearer {self.access_token}'},
+                'method': 'get'
+                }
+
+            item_stream = self.send_streaming_response(info_dict, array_keys=('value',))
+            if item_stream is None:
+                self.logger.warning(f"Iter Items: Did not correctly retrieve items for {list_name}.")
+                return
+
+            for item in item_stream.records():
+                if (fields:= item.get('fields')):
+                    item_count += 1
+                    yield item.get('id'), fields
+
+            self.logger.info(f"Iter Items: Streamed {item_count} items from SharePoint.")
+            url = item_stream.metadata.get('@odata.nextLink')
+
+    async def async_get_item_ids(self, list_name: str, params="", semaphore: asyncio.Semaphore = None) -> dict:
+        """
+        Async version of get_item_ids. Pages of a single list are still followed in order.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Option parameters to filter the list.
+            semaphore (asyncio.Semaphore): Shared semaphore bounding the number of lists downloading at once.
+        Returns:
+            sharepoint_list_items (dict): Dict containing SharePoint list contents.
+        """
+        return await self.run_in_thread(semaphore, self.get_item_ids, list_name, params)
+
+    def get_items_for_lists(self, list_names: list, params="") -> dict:
+        """
+        Downloads several SharePoint lists concurrently.
+
+        Args:
+            list_names (list): Names of the SharePoint lists.
+            params (str): Option parameters applied to every list.
+        Returns:
+            lists_dict (dict): Dict with the list name as the key and the get_item_ids result as the value.
+        """
+        async def gather_lists():
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            return await asyncio.gather(*(self.async_get_item_ids(list_name, params, semaphore) for list_name in list_names))
+
+        self.logger.info(f"Get Items For Lists: Downloading {len(list_names)} lists concurrently.")
+        return dict(zip(list_names, asyncio.run(gather_lists())))
+
+    def get_item_changes(self, list_name: str, params="") -> dict:
+        """
+        Delta version of get_item_ids. Reads the list through the Graph delta endpoint, starting from the deltaLink saved
+        by the previous run, applies the adds, updates and deletes to the on-disk snapshot and saves the new deltaLink.
+        The first run, or a run whose deltaLink has expired, downloads the whole list and saves it as the snapshot.
+        If the delta endpoint fails altogether the list is downloaded with get_item_ids instead, without a snapshot,
+        and RuntimeError is raised when that fails too, so callers never get None.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Options of the expanded fields, e.g. "($select=Title,Unique_ID)". Graph delta queries cannot filter or sort,
+                so params with $filter, $orderby or $search raise ValueError, use get_item_ids for those.
+        Returns:
+            sharepoint_list_items (dict): Dict with the sharepoint_id as the key and the fields as the value.
+        """
+        if any(option in params for option in ('$filter', '$orderby', '$search')):
+            raise ValueError(f"Get Item Changes: Delta queries do not support {params}, use get_item_ids for {list_name}.")
+
+        snapshot = delta_store.load(list_name, params)
+        if snapshot:
+            self.logger.info(f"Get Item Changes: Syncing changes to {list_name} since the last run.")
+            changes, delta_link = self.get_delta_pages(snapshot['delta_link'])
+            if changes is not None:
+                sharepoint_list_items = delta_store.apply_changes(snapshot['items'], changes)
+                delta_store.store(list_name, delta_link, sharepoint_list_items, params)
+                self.logger.info(f"Get Item Changes: Applied {len(changes)} changes, {len(sharepoint_list_items)} items in {list_name}.")
+                return sharepoint_list_items
+            self.logger.warning(f"Get Item Changes: Delta sync failed for {list_name}, downloading the whole list.")
+            delta_store.clear(list_name, params)
+
+        site_id = self.get_site_id()
+        list_id = self.get_list_id(list_name)
+        self.logger.info(f"Get Item Changes: No snapshot for {list_name}, downloading the whole list.")
+        changes, delta_link = self.get_delta_pages(f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/items/delta?$expand=fields{params}&$top={self.item_page_size}")
+        if changes is None:
+            self.logger.warning(f"Get Item Changes: Delta query failed for {list_name}, downloading it without a snapshot.")
+            sharepoint_list_items = self.get_item_ids(list_name, params)
+            if sharepoint_list_items is None:
+                raise RuntimeError(f"Get Item Changes: Could not download {list_name}.")
+            return sharepoint_list_items
+
+        sharepoint_list_items = delta_store.apply_changes({}, changes, full_sync=True)
+        delta_store.store(list_name, delta_link, sharepoint_list_items, params)
+        self.logger.info(f"Get Item Changes: Retrieved {len(sharepoint_list_items)} items from SharePoint.")
+        return sharepoint_list_items
+
+    def get_delta_pages(self, url: str) -> tuple:
+        """
+        Follows @odata.nextLink from url until the page carrying the @odata.deltaLink.
+
+        Args:
+            url (str): Delta url, or the deltaLink of a previous sync.
+        Returns:
+            (changes, delta_link) (tuple): listItem objects of every page and the deltaLink for the next sync, (None, None) if a page failed
+            or Graph asked for a resync (410).
+        """
+        changes = []
+        while url:
+            info_dict = {
+                'url' : url,
+                'headers' : {'Authorization': f'Bearer {self.access_token}'},
+                'method': 'get'
+                }
+
+            delta_response = self.send_response(info_dict)
+            if delta_response['status'] != 'success' or 'error' in delta_response['response']:
+                self.logger.warning(f"Get Delta Pages: Did not correctly retrieve changes: {delta_response}")
+                return None, None
+
+            delta_page = delta_response['response']
+            changes.extend(delta_page.get('value', []))
+            if (delta_link:= delta_page.get('@odata.deltaLink')):
+                return changes, delta_link
+            url = delta_page.get('@odata.nextLink')
+
+        self.logger.warning("Get Delta Pages: Last page had no deltaLink.")
+        return None, None
+
+    def batch_upload(self, batched_queue) -> dict:
         """
         Takes in a batched dequeue and uploads to SharePoint.
+        Several batches are in flight at once, up to max_concurrency. The number in flight is halved when SharePoint
+        throttles (429/503) and grows back one at a time while batches go through cleanly.
+        Every sub-request is tracked on its own: only the ones that failed with a transient status are retried, once their own
+        Retry-After has passed, packed together with other retries into full batches. Successful writes are never sent twice.
+        A batch that got no answer (connection error, timeout, open circuit) is a transient failure of each of its sub-requests,
+        so results of the batches that did go through are always returned.
 
         Args:
-            batched_queue (deque): Dequeue contained batches of requests up to 20.
+            batched_queue (deque/iterable): Dequeue contained batches packed by batch_packer, or a generator of batches
+                (format_and_batch_for_upload_sharepoint with stream=True), pulled one at a time as slots free up.
+        Returns:
+            results (dict): Dict with the sub-request id (the Unique_ID) as the key and {status, sharepoint_id, etag} as the value.
+                sharepoint_id and etag are only set for successful POSTs and PATCHes, see get_uploaded_items.
         """
 
         self.logger.info("Uploading to SharePoint...")
         batch_url = "https://graph.microsoft.com/v1.0/$batch"
-        self.access_token = self.get_access_token()
+        self.get_valid_access_token()
         headers = {
                         "Authorization": f"Bearer {self.access_token}",
                         "Content-Type": "application/json",
                         "Accept": "application/json"
                     }
 
-        while batched_queue:
-            self.logger.info(f"Items left to upload: {len(batched_queue)}")
-            batched_item = batched_queue.pop()
+        concurrency = Adaptive_Concurrency(self.max_concurrency)
+        started_at = time.monotonic()
+        resume_at = 0.0
+        in_flight = {}
+        #Sub-requests waiting to be sent again: [ready_at, sub_request]. attempts counts sends per sub-request id.
+        retry_pool = []
+        attempts = {}
+        results = {}
+        #Batches from a generator are only formatted when there is room to send them.
+        batch_source = iter(()) if isinstance(batched_queue, deque) else iter(batched_queue)
+        batched_queue = batched_queue if isinstance(batched_queue, deque) else deque()
+
+        def refill_queue():
+            if not batched_queue and (next_batch:= next(batch_source, None)):
+                batched_queue.append(next_batch)
+
+        def upload_batch(batched_item: dict, batch_headers: dict) -> tuple:
             self.logger.debug(f"Batched item: {json.dumps(batched_item,indent=4)}")
+            response = self.http_client.request('post', batch_url, headers=batch_headers, json=batched_item, rate_tokens=len(batched_item['requests']), compress=True)
+            try:
+                response_json = response.json()
+            except ValueError:
+                response_json = {}
+            return response.status_code, response.headers.get('Retry-After'), response_json
+
+        def pop_ready_retries(full_only: bool) -> list:
+            now = time.monotonic()
+            ready = [entry for entry in retry_pool if entry[0] <= now]
+            batch_size = batch_packer.max_requests
+            if not ready or (full_only and len(ready) < batch_size):
+                return []
+            #A partial batch waits a moment for retries that become ready shortly after.
+            if len(ready) < batch_size and len(ready) < len(retry_pool) and now - min(entry[0] for entry in ready) < self.retry_coalesce_seconds:
+                return []
+            ready = ready[:len(ready) - len(ready) % batch_size] if full_only else ready[:batch_size]
+            for entry in ready:
+                retry_pool.remove(entry)
+            return [sub_request for _, sub_request in ready]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='batch_upload') as upload_executor:
+            refill_queue()
+            while batched_queue or retry_pool or in_flight:
+                #Ready retries go out as full batches, a partial batch only once nothing else is left to send it with.
+                retry_requests = pop_ready_retries(full_only=bool(batched_queue or in_flight))
+                batched_queue.extend(batch_packer.pack(retry_requests))
+
+                #Holds new batches back while SharePoint's Retry-After runs, batches already sent finish normally.
+                while batched_queue and time.monotonic() >= resume_at and concurrency.try_acquire():
+                    batched_item = batched_queue.pop()
+                    for sub_request in batched_item['requests']:
+                        attempts[sub_request['id']] = attempts.get(sub_request['id'], 0) + 1
+                    in_flight[upload_executor.submit(upload_batch, batched_item, dict(headers))] = batched_item
+                    refill_queue()
+                    self.logger.info(f"Items left to upload: {len(batched_queue)}, {len(in_flight)} batches in flight, {len(retry_pool)} retries waiting.")
+
+                if not in_flight:
+                    next_ready = min([entry[0] for entry in retry_pool] + ([resume_at] if batched_queue else []), default=0)
+                    time.sleep(min(max(next_ready - time.monotonic(), 0.05), 1.0))
+                    continue
+
+                done, _ = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batched_item = in_flight.pop(future)
+                    try:
+                        batch_status, batch_retry_after, response_json = future.result()
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, Circuit_Open_Error, Deadline_Exceeded_Error) as e:
+                        #The batch got no answer, its sub-requests are retried like a 503 of the whole batch until they run out of attempts.
+                        self.logger.warning(f"Batch of {len(batched_item['requests'])} requests failed with {e!r}, retrying its requests.")
+                        batch_status, batch_retry_after, response_json = 503, getattr(e, 'retry_in', None), {}
+                    except Exception:
+                        concurrency.release()
+                        raise
+
+                    self.logger.debug(f"Response: {json.dumps(response_json,indent=4)}")
+                    sub_responses = {str(item.get('id')): item for item in response_json.get('responses', []) if 'status' in item}
+                    if not sub_responses:
+                        self.logger.error(f"Batch failed with {batch_status}, no sub-responses: {response_json}")
+
+                    status_codes = []
+                    retry_delays = []
+                    throttled_delays = []
+                    for sub_request in batched_item['requests']:
+                        sub_response = sub_responses.get(str(sub_request['id']))
+                        #A sub-request without a sub-response shares the outcome of a failed batch. When the batch itself
+                        #succeeded its outcome is unknown, so it is retried like a 503 until it runs out of attempts.
+                        if sub_response:
+                            status = int(sub_response['status'])
+                        elif 200 <= batch_status < 300:
+                            self.logger.warning(f"{sub_request['method']} {sub_request['id']} got no sub-response from a {batch_status} batch, retrying it.")
+                            status = 503
+                        else:
+                            status = batch_status
+                        retry_after = sub_response.get('headers', {}).get('Retry-After') if sub_response else batch_retry_after
+                        body = sub_response.get('body') if sub_response else None
+                        status_codes.append(status)
+                        results[sub_request['id']] = {'status': status}
+
+                        if 200 <= status < 300:
+                            #POSTs and PATCHes answer with the item, kept so the caller's cache gets the new id without downloading the list.
+                            if isinstance(body, dict) and body.get('id'):
+                                results[sub_request['id']].update({'sharepoint_id': body['id'], 'etag': body.get('@odata.etag')})
+                            continue
+
+                        if status == 401 or self.retry_policy.is_retryable(status):
+                            delay = 0.0 if status == 401 else self.retry_policy.get_delay(attempts[sub_request['id']], retry_after)
+                            remaining = run_deadline.remaining()
+                            if attempts[sub_request['id']] < self.retry_policy.max_attempts and (remaining is None or delay < remaining):
+                                retry_pool.append([time.monotonic() + delay, sub_request])
+                                self.retry_policy.record_retry(delay)
+                                (throttled_delays if status == 429 else retry_delays).append(delay)
+                                continue
+                            self.retry_policy.record_give_up()
+                            self.logger.error(f"{sub_request['method']} {sub_request['id']} gave up after {attempts[sub_request['id']]} attempts with {status}.")
+                        else:
+                            self.logger.warning(f"{sub_request['method']} {sub_request['id']} failed with {status}: {body}")
+
+                    concurrency.release(throttled=any(status in (429, 503) for status in status_codes))
+
+                    if 401 in status_codes:
+                        self.logger.warning("401 encountered.")
+                        self.refresh_stale_access_token(headers['Authorization'].split(' ')[-1])
+                        headers = {
+                            "Authorization": f"Bearer {self.access_token}",
+                            "Content-Type": "application/json",
+                            "Accept": "application/json"
+                        }
+                    if retry_delays:
+                        route_metrics.record_retry('post', batch_url, max(retry_delays))
+                    if throttled_delays:
+                        wait_time = max(throttled_delays)
+                        resume_at = max(resume_at, time.monotonic() + wait_time)
+                        self.logger.info(f"{len(throttled_delays)} requests throttled, waiting {wait_time} seconds due to a 429.")
+                        route_metrics.record_retry('post', batch_url, wait_time, throttled=True)
+
+                    self.logger.info(f"Batch uploaded, {sum(200 <= status < 300 for status in status_codes)}/{len(status_codes)} succeeded.")
+
+        elapsed = time.monotonic() - started_at
+        uploaded_items = sum(200 <= result['status'] < 300 for result in results.values())
+        failed_items = len(results) - uploaded_items
+        self.logger.info(f"All items uploaded. {uploaded_items} items in {elapsed:.1f}s ({uploaded_items / elapsed if elapsed else 0:.1f} items/s), "
+                         f"concurrency {concurrency.get_stats()}.")
+        if failed_items:
+            self.logger.warning(f"{failed_items} items failed: {dict(sorted(Counter(result['status'] for result in results.values() if not 200 <= result['status'] < 300).items()))}")
+        return results
+
+    def get_uploaded_items(self, results: dict, list_name: str = None) -> dict:
+        """
+        Turns batch_upload results into the SharePoint item format update_cache reads, so the cache gets the ids
+        of the items just created without downloading the list again.
 
-            response = requests.post(batch_url, headers=headers, json=batched_item)
-            response_json = response.json()
+        Args:
+            results (dict): Results returned by batch_upload.
+            list_name (str): Only keep the items of this list, for results of batches formatted by format_and_batch_lists_for_upload.
+        Returns:
+            uploaded_items (dict): Dict with format {sharepoint_id: {Unique_ID, id, @odata.etag}} for every item SharePoint returned.
+                A split PATCH is only included once all of its parts succeeded.
+        """
+        uploaded_items = {}
+        statuses = {str(request_id): result['status'] for request_id, result in results.items()}
+        for request_id, result in results.items():
+            split_part = batch_packer.get_split_part(request_id)
+            #Later parts of a split PATCH answer for the same item as the first part.
+            if not result.get('sharepoint_id') or (split_part and split_part[1] > 1):
+                continue
+            #A split PATCH only updated the item once every one of its parts succeeded.
+            if split_part and not all(200 <= statuses.get(part_id, 0) < 300 for part_id in batch_packer.get_part_ids(request_id)):
+                self.logger.warning(f"Get Uploaded Items: Not every part of the split PATCH {request_id} succeeded, leaving it out.")
+                continue
+            if list_name is not None:
+                request_list, _, request_id = request_id.partition('|')
+                if request_list != list_name:
+                    continue
+            uploaded_items[result['sharepoint_id']] = {'Unique_ID': request_id, 'id': result['sharepoint_id'], '@odata.etag': result.get('etag')}
+        return uploaded_items
+
+    def delete_items(self, list_name:str, predicate=None, params="") -> dict:
+        """
+        Deletes every item of a list, or only the items predicate selects.
+        Item ids are streamed page by page and packed into $batch DELETEs that go straight into batch_upload,
+        so deletes start with the first page and nothing but the batches in flight is held in memory.
 
-            self.logger.debug(f"Response: {json.dumps(response_json,indent=4)}")
-            status_codes = []
-            try:
-                status_codes = [status_codes.append(int(item['status'])) for item in response_json['responses'] if 'status' in item]
-            except Exception as e:
-                self.logger.error(f"Error getting status codes for response, error: {e}")
-
-            retry_after = []
-            for status in status_codes:
-                if status == 429:
-                    self.logger.warning(f"{status} encountered.")
-                    for item in response_json['responses']:
-                        if item['status'] == 429:
-                            retry_after.append(int(item['headers'].get('Retry-After',300)))
-                elif status == 401:
-                    self.logger.warning(f"{status} encountered.")
-                    self.get_access_token()
-                    batched_queue.append(batched_item)
-                    headers = {
-                        "Authorization": f"Bearer {self.access_token}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json"
-                    }
-                elif status == 400 or status == 404 or status == 409:
-                    self.logger.warning(f"{status} encountered.")
+        Args:
+            list_name (str): Name of list to be deleted.
+            predicate (function): Takes an item's fields, returns True to delete the item. None deletes every item.
+            params (str): Option parameters to filter the list, same format as get_item_ids. Defaults to only the ID field when there is no predicate.
+        Returns:
+            results (dict): Dict with the sharepoint_id as the key and {status} of the DELETE as the value.
+        """
+        self.logger.info(f"Delete Items: Deleting {list_name} items.")
+        started_at = time.monotonic()
+        results = self.batch_upload(self.iter_delete_batches(list_name, predicate, params or ("" if predicate else "($select=ID)")))
 
-            self.logger.info("Batch uploaded.")
+        elapsed = time.monotonic() - started_at
+        deleted = sum(200 <= result['status'] < 300 or result['status'] == 404 for result in results.values())
+        self.logger.info(f"Delete Items: Deleted {deleted}/{len(results)} items from {list_name} in {elapsed:.1f}s ({deleted / elapsed if elapsed else 0:.1f} items/s).")
+        return results
 
-            wait_time = max(retry_after) if retry_after else 0
-            if wait_time:
-                batched_queue.append(batched_item)
-                self.logger.info(f"Waiting {wait_time} seconds due to a 429.")
-                time.sleep(wait_time)
-            
-        self.logger.info("All items uploaded.")
+    def iter_delete_batches(self, list_name: str, predicate=None, params=""):
+        """
+        Streams the list's items and yields DELETE $batch requests for the selected ones, packed by batch_packer.
 
-    def delete_items(self, list_name:str):
+        Args:
+            list_name (str): Name of the SharePoint list.
+            predicate (function): Takes an item's fields, returns True to delete the item. None selects every item.
+            params (str): Option parameters to filter the list.
+        Yields:
+            batch (dict): Dict with format {requests: [DELETE requests]}
         """
-        TODO: Still in progress...
-        Takes in a list name, gets the list ID, gets a list of all item IDs, then sends a delete request.
+        site_id = self.get_site_id()
+        list_id = self.get_list_id(list_name)
+        counts = {'scanned': 0, 'selected': 0}
+
+        def iter_delete_requests():
+            for sharepoint_id, fields in self.iter_items(list_name, params):
+                counts['scanned'] += 1
+                if predicate and not predicate(fields):
+                    continue
+
+                counts['selected'] += 1
+                if counts['selected'] % 1000 == 0:
+                    self.logger.info(f"Delete Items: {counts['selected']} items queued for delete, {counts['scanned']} scanned.")
+                yield {
+                    'id': sharepoint_id,
+                    'method': 'DELETE',
+                    'url': f"/sites/{site_id}/lists/{list_id}/items/{sharepoint_id}",
+                }
+
+        yield from batch_packer.pack(iter_delete_requests())
+        self.logger.info(f"Delete Items: {counts['selected']} of {counts['scanned']} items selected for delete.")
+
+    def get_list_schema(self, list_name: str, refresh=False) -> List_Schema:
+        """
+        Gets the list's schema from the schema registry. Registered lists never call Graph.
+        Lists without a registered schema get one built from their column definitions, read from Graph once and stored on disk.
 
         Args:
-            list_name (str): Name of list to be deleted.
+            list_name (str): Name of the SharePoint list.
+            refresh (bool): Read the column definitions from Graph again, e.g. after columns were added to the list.
+        Returns:
+            schema (List_Schema): Compiled schema, None if the list has none and its columns could not be read.
         """
+        schema = schema_registry.get(list_name)
+        if schema and not refresh:
+            return schema
 
-        self.logger.info(f"Deleting {list_name} items.")
+        site_id = self.get_site_id()
         list_id = self.get_list_id(list_name)
-        item_list = self.get_item_ids(list_name)
+        info_dict = {
+            'url': f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists/{list_id}/columns",
+            'headers': {"Authorization": f"Bearer {self.access_token}"},
+            'method': 'get'
+        }
+
+        columns_response = self.send_response(info_dict)
+        if columns_response['status'] != 'success' or 'value' not in columns_response['response']:
+            self.logger.warning(f"Get List Schema: Could not read the columns of {list_name}: {columns_response}")
+            return schema
 
-        #From here, need to format/batch these items. then call batch_upload
+        self.logger.info(f"Get List Schema: Discovered {len(columns_response['response']['value'])} columns for {list_name}.")
+        return schema_registry.add_columns(list_name, columns_response['response']['value'])
 
-    def format_and_batch_for_upload_sharepoint(self,change_dict: dict, list_name: str) -> deque:
+    def format_and_batch_for_upload_sharepoint(self,change_dict: dict, list_name: str, stream=False) -> deque:
         """
-        Takes in a dict, formats and batches them in groups of 20 for upload to SharePoint.
+        Takes in a dict, formats and batches them for upload to SharePoint. Batches are packed by batch_packer,
+        up to Graph's request count and body size limits.
 
         Args:
             change_dict (dict): Dict holding the items that need to be updated in SharePoint.
-            sharepoint_connector_o (object): Used to get information from SharePoint.
             list_name (str): The name of the SharePoint list (e.g., 'NewWorld_PO_Alert' or 'COT_Employees').
-            logger (object, optional): Logger object for logging. Defaults to None.
+            stream (bool): Return a generator that formats each batch when the upload asks for it, instead of a deque of every batch.
+                Pass it straight to batch_upload so the first batch is sent while the rest are still being formatted.
         
         Returns:
-            batch_queue (deque): Dequeue holding the formatted and batched items.
-        """
-        # Field mappings for each list
-        field_mappings = {
-            'NewWorld_PO_Alert': {
-                'fields': {
-                    "Title": "Title",
-                    "PO_Type": "PO_Type",
-                    "PO_Number": "PO_Number",
-                    "Vendor_Name": "Vendor_Name",
-                    "Description": "Description",
-                    "PO_Amount": "PO_Amount",
-                    "Expense": "Expense",
-                    "Balance": "Balance",
-                    "Expiration_Date": "Expiration_Date",
-                    "Expired": "Expired",
-                    'Days_Till_Expired' : "Days_Till_Expired",
-                    "Unique_ID": "Unique_ID",
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'COT_Employees': {
-                'fields': {
-                    "Email": "Email",
-                    "Display_Name": "Display_Name",
-                    "Department": "Department",
-                    "Employee_Id": "Employee_Id",
-                    "Job_Title": "Job_Title",
-                    "Active": "Active",
-                    "Azure_Id": "Azure_Id",
-                    "Manager": "Manager",
-                    "Licenses@odata.type": "licenses_data_type",
-                    "Licenses": "Licenses"
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'Asset_Pickup_History': {
-                'fields': {
-                    'Updated': 'Updated'
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'ServiceDesk_Assets': {
-                'fields': {
-                    "name": "name",
-                    "type": "type",
-                    "state": "state",
-                    "department": "department",
-                    "asset_description": "asset_description",
-                    "asset_assigned_user": "asset_assigned_user",
-                    "asset_assigned_user_dept": "asset_assigned_user_dept",
-                    "asset_assigned_user_email": "asset_assigned_user_email",
-                    "saas_id": "saas_id",
-                    "created_date": "created_date",
-                    "last_updated_date": "last_updated_date",
-                    "total_cost": "total_cost",
-                    "lifecycle": "lifecycle",
-                    "barcode": "barcode",
-                    "depreciation_salvage_value": "depreciation_salvage_value",
-                    "depreciation_useful_life": "depreciation_useful_life",
-                    "ip_address": "ip_address",
-                    "replaced_serial_number": "replaced_serial_number",
-                    "service_request": "service_request",
-                    "imei_number": "imei_number",
-                    "cellular_provider": "cellular_provider",
-                    "replacement_fund": "replacement_fund",
-                    "replacement_date": "replacement_date",
-                    "annual_replacement_amt": "annual_replacement_amt",
-                    "acquisition_date": "acquisition_date",
-                    "asset_vendor_name": "asset_vendor_name",
-                    "asset_purchase_cost": "asset_purchase_cost",
-                    "asset_product_type": "asset_product_type",
-                    "asset_category": "asset_category",
-                    "asset_manu": "asset_manu",
-                    "asset_serial_no": "asset_serial_no",
-                    "warranty_expiry_date": "warranty_expiry_date",
-                    "missing_barcode": "missing_barcode",
-                    "missing_annual_replacement_amoun": "missing_annual_replacement_amoun",
-                    'in_use_date': "in_use_date",
-                    'disposed_date': 'disposed_date',
-                    'repl_fund': 'repl_fund'
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'ServiceDesk_Worklogs': {
-                'fields': {
-                    'module': 'module',
-                    'unique_id': 'Unique_ID',
-                    'module_id': 'module_id',
-                    'created_time': 'created_time',
-                    'minutes': 'minutes',
-                    'hours': 'hours',
-                    'tech_name': 'tech_name',
-                    'tech_email': 'tech_email',
-                    'worklog_id': 'worklog_id'
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'INFAzureLicenseUsage' : {
-                'fields': {
-                    'sku_id': 'sku_id',
-                    'sku_name': 'sku_name',
-                    'total_licenses': 'total_licenses',
-                    'consumed_licenses': 'consumed_licenses',
-                    'remaining_licenses': 'remaining_licenses'
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'TFD_Credential_List' : {
-                'fields': {
-                    'unique_id': 'Unique_ID',
-                    'credentialid': 'credentialid',
-                    'categoryid': 'categoryid',
-                    'userid': 'userid',
-                    'credentialname': 'credentialname',
-                    'startdate': 'startdate',
-                    'expirationdate': 'expirationdate',
-                    'days_till_expired': 'days_till_expired',
-                    'status': 'status',
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'TFD_User_List' : {
-                'fields': {
-                    'userid': 'userid',
-                    'status': 'status',
-                    'full_name': 'full_name',
-                    'email': 'username',
-                    'shift': 'shift',
-                    'rank': 'rank',
-                    'unit': 'unit',
-                    'station': 'station',
-                    'supervisor' : 'supervisor',
-                },
-                'unique_id_field': 'Unique_ID',
-            },
-            'TFD_Credential_Categories' : {
-                'fields': {
-                    'categoryid': 'categoryid',
-                    'categoryname': 'categoryname'
-                },
-                'unique_id_field': 'Unique_ID',
-            }
+            batch_queue (deque): Dequeue holding the formatted and batched items, a generator of batches when stream is True.
+        """
+        batches = self.iter_upload_batches(change_dict, list_name)
+        return batches if stream else deque(batches)
 
-        }
+    def format_and_batch_lists_for_upload(self, change_dicts: dict, stream=False) -> deque:
+        """
+        Formats the changes of several lists into shared batches, so lists with a few changes each fill batches together
+        instead of each sending its own partial batch. Sub-request ids are 'list_name|Unique_ID', pass the list name
+        to get_uploaded_items to read one list's results.
 
-        # Get the field mapping for the specified list
-        mapping = field_mappings.get(list_name)
-        if not mapping:
+        Args:
+            change_dicts (dict): Dict with the list name as the key and its change_dict as the value.
+            stream (bool): Return a generator of batches instead of a deque, see format_and_batch_for_upload_sharepoint.
+        Returns:
+            batch_queue (deque): Dequeue holding the formatted and batched items of every list, a generator of batches when stream is True.
+        """
+        #Schemas are checked up front so an unsupported list fails before anything is uploaded.
+        for list_name in change_dicts:
+            if not self.get_list_schema(list_name):
+                raise ValueError(f"Unsupported list name: {list_name}")
+
+        batches = batch_packer.pack(
+            request
+            for list_name, change_dict in change_dicts.items()
+            for request in self.iter_upload_requests(change_dict, list_name, id_prefix=f"{list_name}|")
+        )
+        return batches if stream else deque(batches)
+
+    def iter_upload_batches(self, change_dict: dict, list_name: str):
+        """
+        Formats the items of change_dict into $batch requests, yielding each batch as soon as it is full.
+        Only the batch being filled is held in memory. The list is checked right away, not when the first batch is pulled,
+        so an unsupported list fails where the batches are asked for.
+
+        Args:
+            change_dict (dict): Dict holding the items that need to be updated in SharePoint.
+            list_name (str): The name of the SharePoint list.
+        Returns:
+            batches (generator): Generator of dicts with format {requests: [batch requests]}
+        """
+        if not self.get_list_schema(list_name):
+            raise ValueError(f"Unsupported list name: {list_name}")
+        return batch_packer.pack(self.iter_upload_requests(change_dict, list_name))
+
+    def iter_upload_requests(self, change_dict: dict, list_name: str, id_prefix: str = ""):
+        """
+        Formats the items of change_dict into $batch sub-requests, one per item.
+
+        Args:
+            change_dict (dict): Dict holding the items that need to be updated in SharePoint.
+            list_name (str): The name of the SharePoint list.
+            id_prefix (str): Prefix of every sub-request id, keeps ids unique when several lists share a batch.
+        Yields:
+            batch_request (dict): Sub-request with format {id, method, url, headers, body}
+        """
+        # Get the compiled schema for the specified list
+        schema = self.get_list_schema(list_name)
+        if not schema:
             raise ValueError(f"Unsupported list name: {list_name}")
 
-        formatted_list = []
         site_id = self.get_site_id()
         list_id = self.get_list_id(list_name)
 
         for item in change_dict.values():
             sharepoint_id = item.get('sharepoint_id', '')
             operation = item.get('operation', '')
-            unique_id = item.get(mapping['unique_id_field'], '')
+            unique_id = item.get(schema.unique_id_field, '')
+            if id_prefix:
+                unique_id = f"{id_prefix}{unique_id}"
 
-            # Build list_item_data based on the field mapping
-            list_item_data = {"fields": {}}
-            for field, source in mapping['fields'].items():
-                list_item_data['fields'][field] = item.get(source, 'MISSING')
+            # Build list_item_data with the schema's projector
+            list_item_data = {"fields": schema.project(item)}
 
             # Build batch request based on operation
             if operation == 'DELETE':
@@ -432,6 +819,13 @@ class SharePoint_Connector(Connector):
                     "body": list_item_data
                 }
             elif operation == 'PATCH':
+                #check_changes sets changed_fields on every PATCH, so only the changed columns are sent. Change dicts built
+                #without check_changes (e.g. ServiceDesk_Update_Asset) have none and send every column.
+                if item.get('changed_fields') is not None:
+                    list_item_data = {"fields": schema.project_changed(item, item['changed_fields'])}
+                    if not list_item_data['fields']:
+                        self.logger.info(f"Skipping PATCH {unique_id}, none of its changed fields {item['changed_fields']} are columns of {list_name}.")
+                        continue
                 batch_request = {
                     'id': unique_id,
                     'method': 'PATCH',
@@ -445,19 +839,4 @@ class SharePoint_Connector(Connector):
             else:
                 continue
 
-            formatted_list.append(batch_request)
-
-        # Batch the requests into groups of 20
-        batch_queue = deque()
-        temp_batch_list = []
-
-        for item in formatted_list:
-            temp_batch_list.append(item)
-            if len(temp_batch_list) == 20:
-                batch_queue.append({"requests": temp_batch_list})
-                temp_batch_list = []
-
-        if temp_batch_list:
-            batch_queue.append({"requests": temp_batch_list})
-
-        return batch_queue
\ No newline at end of file
+            yield batch_request
@@ -0,0 +1,47 @@
+#tests/test_batch_packer.py
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Batch_Packer import Batch_Packer
+
+
+def batch_size(batch):
+    return len(json.dumps(batch, separators=(',', ':')).encode('utf-8'))
+
+def test_small_requests_fill_whole_batches():
+    packer = Batch_Packer()
+    requests = ({'id': str(item_id), 'method': 'DELETE', 'url': f"/items/{item_id}"} for item_id in range(45))
+    batches = list(packer.pack(requests))
+    assert [len(batch['requests']) for batch in batches] == [20, 20, 5]
+    assert packer.get_stats()['requests'] == 45
+
+def test_batches_stay_under_the_body_limit():
+    packer = Batch_Packer(max_body_bytes=2000)
+    requests = [{'id': str(item_id), 'method': 'POST', 'url': '/items', 'body': {'fields': {'Notes': 'x' * 300}}} for item_id in range(12)]
+    batches = list(packer.pack(requests))
+    assert len(batches) > 1
+    assert all(batch_size(batch) <= 2000 for batch in batches)
+    assert [request['id'] for batch in batches for request in batch['requests']] == [str(item_id) for item_id in range(12)]
+
+def test_oversized_patch_is_split_by_fields():
+    packer = Batch_Packer(max_body_bytes=1000)
+    fields = {f"Column{index}": 'y' * 200 for index in range(8)}
+    batches = list(packer.pack([{'id': 'A1', 'method': 'PATCH', 'url': '/items/7', 'body': {'fields': fields}}]))
+    parts = [request for batch in batches for request in batch['requests']]
+    assert len(parts) > 1
+    assert all(batch_size(batch) <= 1000 for batch in batches)
+    assert [packer.get_split_part(part['id']) for part in parts] == [('A1', index) for index in range(1, len(parts) + 1)]
+    assert packer.get_part_ids('A1') == [part['id'] for part in parts]
+    assert {field: value for part in parts for field, value in part['body']['fields'].items()} == fields
+
+def test_duplicate_ids_start_a_new_batch():
+    packer = Batch_Packer()
+    requests = [{'id': '1', 'method': 'DELETE', 'url': '/lists/a/items/1'}, {'id': '1', 'method': 'DELETE', 'url': '/lists/b/items/1'}]
+    assert [len(batch['requests']) for batch in packer.pack(requests)] == [1, 1]
+
+def test_ids_that_look_like_parts_are_not_split_parts():
+    packer = Batch_Packer()
+    list(packer.pack([{'id': 'PO#part2', 'method': 'DELETE', 'url': '/items/1'}]))
+    assert packer.get_split_part('PO#part2') is None
+    assert packer.get_part_ids('PO#part2') == ['PO#part2']
@@ -0,0 +1,78 @@
+#tests/test_circuit_breaker.py
+import sys
+import os
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Circuit_Breaker import Circuit_Breaker, Circuit_Breaker_Registry, Circuit_Open_Error
+from utils.Http_Client import Http_Client
+
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = Circuit_Breaker('host/api', failure_threshold=3, recovery_time=60.0)
+    for _ in range(2):
+        breaker.before_request()
+        assert breaker.record_failure() is False
+    breaker.before_request()
+    assert breaker.record_failure() is True
+
+    with pytest.raises(Circuit_Open_Error) as error:
+        breaker.before_request()
+    assert error.value.route_key == 'host/api'
+    assert breaker.is_open() is True
+    assert breaker.get_stats() == {'state': 'open', 'consecutive_failures': 3, 'times_opened': 1, 'rejected': 1}
+
+def test_success_resets_failure_count():
+    breaker = Circuit_Breaker('host/api', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.record_failure() is False
+    assert breaker.get_stats()['state'] == 'closed'
+
+def test_half_open_lets_one_probe_through():
+    breaker = Circuit_Breaker('host/api', failure_threshold=1, recovery_time=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_request()
+    with pytest.raises(Circuit_Open_Error):
+        breaker.before_request()
+
+    assert breaker.record_failure() is True
+    with pytest.raises(Circuit_Open_Error):
+        breaker.before_request()
+
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record_success()
+    breaker.before_request()
+    assert breaker.get_stats()['state'] == 'closed'
+
+def test_route_key_groups_ids():
+    registry = Circuit_Breaker_Registry()
+    assert registry.get_route_key('https://graph.microsoft.com/v1.0/sites/a.sharepoint.com,1f2e,3d4c/lists') == 'graph.microsoft.com/v1.0/sites/{id}'
+    assert registry.get_route_key('https://servicedesk.torranceca.gov/api/v3/assets/123456') == 'servicedesk.torranceca.gov/api/v3/assets'
+    assert registry.get_route_key('http://devsandbox.targetsolutions.com/v1/users/42/credentials') == 'devsandbox.targetsolutions.com/v1/users/{id}'
+    assert registry.get_breaker('https://x/api/v3/assets/1') is registry.get_breaker('https://x/api/v3/assets/2')
+
+def test_throttling_is_not_a_failure():
+    registry = Circuit_Breaker_Registry(failure_threshold=1)
+    breaker = registry.get_breaker('https://x/api')
+    assert registry.record_status(breaker, 429) is False
+    assert registry.record_status(breaker, 503) is True
+
+def test_failed_hedged_copy_releases_the_probe():
+    breakers = Circuit_Breaker_Registry(failure_threshold=1, recovery_time=0.05)
+    transport = MagicMock()
+    transport.send.side_effect = requests.exceptions.ConnectionError('connection reset')
+    client = Http_Client(MagicMock(), circuit_breakers=breakers, transport=transport)
+    breaker = breakers.get_breaker('https://host/api/items')
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.send('get', 'https://host/api/items', count_failures=False)
+    assert breaker.probe_in_flight is False
+    assert breaker.before_request() is True
@@ -0,0 +1,66 @@
+#tests/test_connector.py
+import sys
+import os
+import json
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest.mock import MagicMock
+import requests
+from scripts.SharePoint_Connector import SharePoint_Connector
+from utils.Retry_Policy import Retry_Policy
+from utils.Transport import build_response
+
+
+def build_connector(statuses: list) -> SharePoint_Connector:
+    """
+    Builds a connector without tokens.json whose requests are answered with statuses, one per attempt.
+    """
+    connector = SharePoint_Connector.__new__(SharePoint_Connector)
+    connector.logger = logging.getLogger('test_connector')
+    connector.token_info = {'access_token': 'token'}
+    connector.retry_policy = Retry_Policy(base_delay=0.0)
+    connector.hedge_gets = False
+    connector.sent = []
+
+    def request(method, url, **kwargs):
+        connector.sent.append((method, kwargs.get('data')))
+        status = statuses[min(len(connector.sent), len(statuses)) - 1]
+        return build_response(method, url, status, {'Content-Type': 'application/json'}, json.dumps({}))
+
+    connector.http_client = MagicMock()
+    connector.http_client.request.side_effect = request
+    connector.http_client.circuit_breakers.get_breaker.return_value.is_open.return_value = False
+    return connector
+
+def test_put_retries_send_the_same_body():
+    connector = build_connector([503, 503, 200])
+    response_dict = connector.fetch_response({'url': 'https://sd/api/v3/assets/1', 'headers': {}, 'data': '{"asset": {"name": "a b"}}', 'method': 'put'})
+
+    assert response_dict['status'] == 'success'
+    assert len(connector.sent) == 3
+    assert len({data for _, data in connector.sent}) == 1
+    assert connector.sent[0][1] == b'input_data=%7B%22asset%22%3A+%7B%22name%22%3A+%22a+b%22%7D%7D'
+
+def test_posts_are_not_retried_after_a_server_error():
+    connector = build_connector([503, 200])
+    response_dict = connector.fetch_response({'url': 'https://graph/items', 'headers': {}, 'json_body': {}, 'method': 'post'})
+
+    assert response_dict['status'] == 'fail'
+    assert len(connector.sent) == 1
+
+def test_posts_are_retried_after_a_throttle_or_when_opted_in():
+    throttled = build_connector([429, 200])
+    assert throttled.fetch_response({'url': 'https://graph/items', 'headers': {}, 'json_body': {}, 'method': 'post'})['status'] == 'success'
+    assert len(throttled.sent) == 2
+
+    opted_in = build_connector([503, 200])
+    assert opted_in.fetch_response({'url': 'https://graph/$batch', 'headers': {}, 'json_body': {}, 'method': 'post', 'retry_post': True})['status'] == 'success'
+    assert len(opted_in.sent) == 2
+
+def test_posts_are_not_retried_after_a_connection_error():
+    connector = build_connector([200])
+    connector.http_client.request.side_effect = requests.exceptions.ConnectionError('connection reset')
+    response_dict = connector.fetch_response({'url': 'https://graph/items', 'headers': {}, 'json_body': {}, 'method': 'post'})
+
+    assert response_dict['status'] == 'fail'
+    assert connector.http_client.request.call_count == 1
@@ -0,0 +1,32 @@
+#tests/test_delta_store.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Delta_Store import Delta_Store
+
+
+def test_apply_changes_adds_updates_and_deletes():
+    store = Delta_Store()
+    items = {'1': {'Title': 'a'}, '2': {'Title': 'b'}, '3': {'Title': 'c'}}
+    changes = [
+        {'id': '2', 'fields': {'Title': 'b2'}},
+        {'id': '3', 'deleted': {'state': 'deleted'}},
+        {'id': '4', 'fields': {'Title': 'd'}},
+        {'id': '1', '@removed': {'reason': 'deleted'}},
+        {'id': '9', 'deleted': {'state': 'deleted'}},
+    ]
+    assert store.apply_changes(items, changes) == {'2': {'Title': 'b2'}, '4': {'Title': 'd'}}
+    assert store.get_stats() == {'full_syncs': 0, 'delta_syncs': 1, 'added': 1, 'updated': 1, 'deleted': 2}
+
+def test_snapshot_round_trip(tmp_path):
+    store = Delta_Store(str(tmp_path))
+    assert store.load('COT_Employees') == {}
+    store.store('COT_Employees', 'https://graph/delta?token=1', {'1': {'Title': 'a'}})
+    store.store('COT_Employees', 'https://graph/delta?token=2', {'2': {'Title': 'b'}}, params='($select=Title)')
+
+    assert store.load('COT_Employees') == {'list_name': 'COT_Employees', 'delta_link': 'https://graph/delta?token=1', 'items': {'1': {'Title': 'a'}}}
+    assert store.load('COT_Employees', '($select=Title)')['delta_link'] == 'https://graph/delta?token=2'
+
+    store.clear('COT_Employees')
+    assert store.load('COT_Employees') == {}
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
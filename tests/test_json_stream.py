@@ -0,0 +1,49 @@
+#tests/test_json_stream.py
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Json_Stream import Json_Stream
+
+
+def chunk(text: str, size: int) -> list:
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_streams_value_records_and_keeps_metadata():
+    body = {
+        "@odata.context": "https://graph.microsoft.com/v1.0/$metadata#items",
+        "@odata.nextLink": "https://graph.microsoft.com/v1.0/next",
+        "value": [{"id": str(i), "fields": {"Title": f"Item {i}", "Amount": i * 1234.5}} for i in range(50)]
+    }
+    for size in [1, 3, 7, 64, 100000]:
+        stream = Json_Stream(chunk(json.dumps(body, indent=4), size))
+        records = list(stream.records())
+        assert records == body['value']
+        assert stream.metadata == {"@odata.context": body["@odata.context"], "@odata.nextLink": body["@odata.nextLink"]}
+        assert stream.record_count == 50
+
+def test_metadata_after_records_and_numbers_split_across_chunks():
+    body = '{"assets": [12345, 67890], "list_info": {"has_more_rows": true, "row_count": 100}}'
+    stream = Json_Stream(chunk(body, 2))
+    assert list(stream.records()) == [12345, 67890]
+    assert stream.metadata == {"list_info": {"has_more_rows": True, "row_count": 100}}
+
+def test_multibyte_characters_split_across_chunks():
+    body = json.dumps({"value": [{"name": "Peña, José"}]}, ensure_ascii=False)
+    stream = Json_Stream(chunk(body, 1))
+    assert list(stream.records()) == [{"name": "Peña, José"}]
+
+def test_empty_array_and_object():
+    assert list(Json_Stream([b'{"value": []}']).records()) == []
+    assert list(Json_Stream([b'{}']).records()) == []
+
+def test_closes_source_when_exhausted():
+    class Source:
+        closed = False
+        def close(self):
+            self.closed = True
+
+    source = Source()
+    list(Json_Stream([b'{"value": [1]}'], source=source).records())
+    assert source.closed is True
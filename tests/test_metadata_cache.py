@@ -0,0 +1,31 @@
+#tests/test_metadata_cache.py
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Metadata_Cache import Metadata_Cache
+
+
+def test_entries_persist_between_instances(tmp_path):
+    cache_path = str(tmp_path / 'metadata.json')
+    cache = Metadata_Cache(cache_path)
+    assert cache.get('site_id', 'contoso:/sites/it') is None
+    cache.set('site_id', 'contoso:/sites/it', 'site-1')
+    cache.set_many('list_id', {'site-1:COT_Employees': 'list-1', 'site-1:ServiceDesk_Assets': 'list-2'})
+
+    reloaded = Metadata_Cache(cache_path)
+    assert reloaded.get('site_id', 'contoso:/sites/it') == 'site-1'
+    assert reloaded.get('list_id', 'site-1:ServiceDesk_Assets') == 'list-2'
+    assert reloaded.get_stats() == {'hits': 2, 'misses': 0, 'stores': 0}
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    cache = Metadata_Cache(str(tmp_path / 'metadata.json'), ttls={'list_id': 0.05})
+    cache.set('list_id', 'site-1:COT_Employees', 'list-1')
+    assert cache.get('list_id', 'site-1:COT_Employees') == 'list-1'
+    time.sleep(0.06)
+    assert cache.get('list_id', 'site-1:COT_Employees') is None
+
+    cache.set('site_id', 'contoso:/sites/it', 'site-1')
+    with open(cache.cache_path, 'r', encoding='utf-8') as cache_file:
+        assert list(json.load(cache_file)) == ['site_id|contoso:/sites/it']
@@ -0,0 +1,48 @@
+#tests/test_metrics.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Metrics import Route_Metrics, get_route_template, percentile
+
+
+def test_route_template_collapses_ids_and_query():
+    url = 'https://graph.microsoft.com/v1.0/sites/a.sharepoint.com,1f2e,3d4c/lists/0f1e2d3c-1111-2222-3333-444455556666/items?expand=fields'
+    assert get_route_template(url) == 'graph.microsoft.com/v1.0/sites/{id}/lists/{id}/items'
+    assert get_route_template(url, max_segments=3) == 'graph.microsoft.com/v1.0/sites/{id}'
+    assert get_route_template('http://devsandbox.targetsolutions.com/v1/users/42/credentials') == 'devsandbox.targetsolutions.com/v1/users/{id}/credentials'
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+def test_route_stats():
+    metrics = Route_Metrics()
+    for asset_id in range(10):
+        metrics.record_request('get', f'https://sd/api/v3/assets/{asset_id}', 200, 0.1)
+    metrics.record_request('get', 'https://sd/api/v3/assets/11', 'ConnectionError', 2.0)
+    metrics.record_bytes('get', 'https://sd/api/v3/assets/1', 0, 2048)
+    metrics.record_retry('get', 'https://sd/api/v3/assets/1', 1.5)
+    metrics.record_retry('get', 'https://sd/api/v3/assets/1', 3.0, throttled=True)
+    metrics.record_throttle_wait('get', 'https://sd/api/v3/assets/2', 0.5)
+
+    stats = metrics.get_stats()
+    assert stats == {'GET sd/api/v3/assets/{id}': {
+        'count': 11, 'p50_ms': 100.0, 'p95_ms': 2000.0, 'p99_ms': 2000.0, 'bytes_in': 2048, 'bytes_out': 0,
+        'statuses': {'200': 10, 'ConnectionError': 1}, 'retries': 2, 'retry_wait': 1.5, 'throttle_wait': 3.5, 'hedges': 0, 'hedge_wins': 0,
+    }}
+
+    lines = metrics.format_table(stats)
+    assert lines[0].split()[0] == 'route'
+    assert 'GET sd/api/v3/assets/{id}' in lines[1] and '200x10 ConnectionErrorx1' in lines[1]
+
+def test_latency_percentile_needs_min_samples():
+    metrics = Route_Metrics()
+    for latency in range(1, 20):
+        metrics.record_request('get', 'https://sd/api/v3/worklogs', 200, latency / 100)
+    assert metrics.get_latency_percentile('get', 'https://sd/api/v3/worklogs', 95, min_samples=20) is None
+    metrics.record_request('get', 'https://sd/api/v3/worklogs', 200, 0.2)
+    assert metrics.get_latency_percentile('get', 'https://sd/api/v3/worklogs', 95, min_samples=20) == 0.19
@@ -0,0 +1,35 @@
+#tests/test_rate_limiter.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Rate_Limiter import Adaptive_Concurrency
+
+
+def test_adaptive_concurrency_halves_on_throttle_and_recovers():
+    concurrency = Adaptive_Concurrency(8, cooldown=0.0)
+    assert concurrency.limit == 4
+    assert all(concurrency.try_acquire() for _ in range(4))
+    assert not concurrency.try_acquire()
+
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 2
+    concurrency.release()
+    assert concurrency.limit == 2
+    concurrency.release()
+    assert concurrency.limit == 3
+    concurrency.release()
+    assert concurrency.in_flight == 0
+    assert concurrency.get_stats() == {'limit': 3, 'peak_limit': 4, 'decreases': 1}
+
+def test_adaptive_concurrency_cooldown_and_floor():
+    concurrency = Adaptive_Concurrency(8, cooldown=60.0)
+    for _ in range(3):
+        concurrency.try_acquire()
+    for _ in range(3):
+        concurrency.release(throttled=True)
+    assert concurrency.limit == 2
+
+    floor = Adaptive_Concurrency(2, initial_limit=1, cooldown=0.0)
+    floor.try_acquire()
+    floor.release(throttled=True)
+    assert floor.limit == 1
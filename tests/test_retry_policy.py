@@ -0,0 +1,51 @@
+#tests/test_retry_policy.py
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from utils.Retry_Policy import Retry_Policy
+
+
+def test_is_retryable():
+    policy = Retry_Policy()
+    for status in [408, 429, 500, 502, 503, 504]:
+        assert policy.is_retryable(status) is True
+    for status in [200, 400, 401, 403, 404]:
+        assert policy.is_retryable(status) is False
+
+def test_parse_retry_after_seconds():
+    policy = Retry_Policy()
+    assert policy.parse_retry_after("120") == 120.0
+    assert policy.parse_retry_after(None) is None
+    assert policy.parse_retry_after("soon") is None
+
+def test_parse_retry_after_http_date():
+    policy = Retry_Policy()
+    retry_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= policy.parse_retry_after(retry_date) <= 30
+
+def test_get_delay_full_jitter_is_capped():
+    policy = Retry_Policy(base_delay=1.0, max_delay=5.0)
+    for attempt in range(1, 10):
+        delay = policy.get_delay(attempt)
+        assert 0 <= delay <= min(5.0, 2 ** (attempt - 1))
+
+def test_get_delay_prefers_retry_after():
+    policy = Retry_Policy(max_delay=5.0)
+    assert policy.get_delay(1, "42") == 42.0
+
+def test_should_retry_respects_attempts_and_elapsed():
+    policy = Retry_Policy(max_attempts=3, max_elapsed=10.0)
+    started_at = time.monotonic()
+    assert policy.should_retry(1, started_at, 1.0) is True
+    assert policy.should_retry(3, started_at, 1.0) is False
+    assert policy.should_retry(1, started_at, 11.0) is False
+
+def test_record_retry_counts():
+    policy = Retry_Policy()
+    policy.record_retry(1.5)
+    policy.record_retry(2.0)
+    policy.record_give_up()
+    assert policy.get_stats() == {'retries': 2, 'retry_wait_seconds': 3.5, 'gave_up': 1}
@@ -0,0 +1,56 @@
+#tests/test_schema_registry.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from datetime import date
+from utils.Schema_Registry import Schema_Registry, List_Schema
+
+
+def test_projector_matches_field_mapping():
+    schema = List_Schema('INFAzureLicenseUsage', {'sku_id': 'sku_id', 'sku_name': 'name', 'total_licenses': 'total'})
+    assert schema.project({'sku_id': 'a', 'total': 5, 'extra': 1}) == {'sku_id': 'a', 'sku_name': 'MISSING', 'total_licenses': 5}
+
+def test_default_schemas_send_values_unchanged():
+    columns = [{'name': 'Active', 'boolean': {}}, {'name': 'Employee_Id', 'text': {}}, {'name': 'Licenses', 'text': {}}]
+    registry = Schema_Registry(cache_dir='unused')
+    item = {'Email': 'a@b.c', 'Display_Name': 'A B', 'Department': 'IT', 'Employee_Id': 1042, 'Job_Title': 'Tech', 'Active': 'yes',
+            'Azure_Id': 'az-1', 'licenses_data_type': 'Collection(Edm.String)', 'Licenses': ['E5'], 'Unique_ID': 'u1'}
+    #Payload of the field_mappings loop the schemas replaced.
+    expected = {column: item.get(source, 'MISSING') for column, source in Schema_Registry.default_schemas['COT_Employees']['fields'].items()}
+
+    assert registry.get('COT_Employees').project(item) == expected
+    assert List_Schema('COT_Employees', Schema_Registry.default_schemas['COT_Employees']['fields'], columns=columns).project(item) == expected
+    assert expected['Active'] == 'yes' and expected['Employee_Id'] == 1042 and expected['Manager'] == 'MISSING'
+
+def test_projector_coerces_opted_in_fields():
+    coerce = {'total_cost': 'number', 'Active': 'boolean', 'barcode': 'text', 'acquisition_date': 'dateTime'}
+    schema = List_Schema('ServiceDesk_Assets', {'total_cost': 'total_cost', 'Active': 'Active', 'barcode': 'barcode', 'acquisition_date': 'acquisition_date', 'name': 'name'}, coerce=coerce)
+    fields = schema.project({'total_cost': '1,250.00', 'Active': 'False', 'barcode': 10042, 'acquisition_date': date(2024, 3, 1), 'name': 7})
+    assert fields == {'total_cost': 1250, 'Active': False, 'barcode': '10042', 'acquisition_date': '2024-03-01', 'name': 7}
+    assert schema.project({'total_cost': 'n/a'})['total_cost'] == 'n/a'
+    assert schema.project({})['total_cost'] == 'MISSING'
+
+def test_discovered_columns_are_stored_and_reused(tmp_path):
+    columns = [
+        {'name': 'Title', 'text': {}},
+        {'name': 'hours', 'number': {}},
+        {'name': 'ID', 'number': {}, 'readOnly': True},
+        {'name': 'Attachments', 'boolean': {}},
+        {'name': 'Hidden_Column', 'text': {}, 'hidden': True},
+    ]
+    registry = Schema_Registry({'ServiceDesk_Worklogs': {'fields': {'hours': 'hours'}}}, cache_dir=str(tmp_path))
+    assert registry.get('ServiceDesk_Worklogs').columns is None
+
+    assert registry.add_columns('ServiceDesk_Worklogs', columns).project({'hours': '1.5'}) == {'hours': '1.5'}
+    assert registry.add_columns('New_List', columns).fields == {'Title': 'Title', 'hours': 'hours'}
+
+    reloaded = Schema_Registry({'ServiceDesk_Worklogs': {'fields': {'hours': 'hours'}}}, cache_dir=str(tmp_path))
+    assert reloaded.get('ServiceDesk_Worklogs').columns == columns
+    assert reloaded.get_stats() == {'schemas': 1, 'typed': 1, 'discovered': 0}
+
+def test_project_changed_keeps_only_changed_columns():
+    schema = List_Schema('COT_Employees', {'Email': 'Email', 'Active': 'Active', 'unique_id': 'Unique_ID', 'Licenses@odata.type': 'licenses_data_type', 'Licenses': 'Licenses'})
+    item = {'Email': 'a@b.c', 'Active': 'True', 'Unique_ID': 'u1', 'licenses_data_type': 'Collection(Edm.String)', 'Licenses': ['E5']}
+    assert schema.project_changed(item, ['Active', 'Unique_ID']) == {'Active': 'True', 'unique_id': 'u1'}
+    assert schema.project_changed(item, ['Licenses']) == {'Licenses@odata.type': 'Collection(Edm.String)', 'Licenses': ['E5']}
+    assert schema.project_changed(item, ['not_mapped']) == {}
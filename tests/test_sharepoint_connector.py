@@ -0,0 +1,214 @@
+#tests/test_sharepoint_connector.py
+import sys
+import os
+import json
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest.mock import MagicMock
+import pytest
+import requests
+import scripts.SharePoint_Connector as sharepoint_connector_module
+from scripts.SharePoint_Connector import SharePoint_Connector
+from utils.Batch_Packer import batch_packer
+from utils.Delta_Store import delta_store
+from utils.Retry_Policy import Retry_Policy
+from utils.Transport import build_response
+from utils.Utils import update_cache
+
+
+batch_url = "https://graph.microsoft.com/v1.0/$batch"
+
+def build_connector(send_batch) -> SharePoint_Connector:
+    """
+    Builds a connector without tokens.json whose $batch POSTs are answered by send_batch(sub_requests).
+    """
+    connector = SharePoint_Connector.__new__(SharePoint_Connector)
+    connector.logger = logging.getLogger('test_sharepoint_connector')
+    connector.token_info = {'access_token': 'token'}
+    connector.max_concurrency = 2
+    connector.retry_policy = Retry_Policy(base_delay=0.0)
+    connector.retry_coalesce_seconds = 0.0
+    connector.get_valid_access_token = MagicMock(return_value='token')
+    connector.refresh_stale_access_token = MagicMock(return_value='token')
+    connector.sent = []
+
+    def request(method, url, json=None, **kwargs):
+        connector.sent.append([sub_request['id'] for sub_request in json['requests']])
+        return send_batch(json['requests'])
+
+    connector.http_client = MagicMock()
+    connector.http_client.request.side_effect = request
+    return connector
+
+def batch_response(sub_responses: list, status_code: int = 200) -> requests.Response:
+    return build_response('post', batch_url, status_code, {'Content-Type': 'application/json'}, json.dumps({'responses': sub_responses}))
+
+def post_requests(count: int) -> list:
+    return [{'id': f"U{index}", 'method': 'POST', 'url': '/sites/s/lists/l/items', 'body': {'fields': {'Title': str(index)}}} for index in range(count)]
+
+def test_only_failed_sub_requests_are_retried():
+    first_statuses = {'U0': 201, 'U1': 429, 'U2': 503, 'U3': 201, 'U4': 400}
+
+    def send_batch(sub_requests):
+        retry = len(sub_requests) < 5
+        return batch_response([
+            {'id': sub_request['id'], 'status': 201 if retry else first_statuses[sub_request['id']], 'headers': {'Retry-After': '0'},
+             'body': {'id': f"sp-{sub_request['id']}", '@odata.etag': '"1"'}}
+            for sub_request in sub_requests
+        ])
+
+    connector = build_connector(send_batch)
+    results = connector.batch_upload([{'requests': post_requests(5)}])
+
+    assert connector.sent == [['U0', 'U1', 'U2', 'U3', 'U4'], ['U1', 'U2']]
+    assert {request_id: result['status'] for request_id, result in results.items()} == {'U0': 201, 'U1': 201, 'U2': 201, 'U3': 201, 'U4': 400}
+
+def test_batch_exception_retries_its_requests_and_keeps_results():
+    calls = {'count': 0}
+
+    def send_batch(sub_requests):
+        calls['count'] += 1
+        if calls['count'] == 2:
+            raise requests.exceptions.ConnectionError('connection reset')
+        return batch_response([{'id': sub_request['id'], 'status': 201, 'body': {'id': f"sp-{sub_request['id']}"}} for sub_request in sub_requests])
+
+    connector = build_connector(send_batch)
+    connector.max_concurrency = 1
+    results = connector.batch_upload([{'requests': post_requests(3)[:2]}, {'requests': post_requests(3)[2:]}])
+
+    assert sorted(results) == ['U0', 'U1', 'U2']
+    assert all(result['status'] == 201 for result in results.values())
+    assert connector.sent == [['U0', 'U1'], ['U2'], ['U2']]
+
+def test_batch_exception_gives_up_after_max_attempts():
+    def send_batch(sub_requests):
+        raise requests.exceptions.Timeout('read timed out')
+
+    connector = build_connector(send_batch)
+    connector.retry_policy = Retry_Policy(max_attempts=2, base_delay=0.0)
+    results = connector.batch_upload([{'requests': post_requests(2)}])
+
+    assert len(connector.sent) == 2
+    assert {result['status'] for result in results.values()} == {503}
+
+def test_sub_requests_missing_from_a_successful_batch_are_retried():
+    def send_batch(sub_requests):
+        return batch_response([{'id': sub_request['id'], 'status': 201, 'body': {'id': f"sp-{sub_request['id']}"}} for sub_request in sub_requests if sub_request['id'] != 'U1' or len(sub_requests) == 1])
+
+    connector = build_connector(send_batch)
+    results = connector.batch_upload([{'requests': post_requests(3)}])
+
+    assert connector.sent == [['U0', 'U1', 'U2'], ['U1']]
+    assert results['U1'] == {'status': 201, 'sharepoint_id': 'sp-U1', 'etag': None}
+
+def build_list_connector(responses: dict) -> SharePoint_Connector:
+    """
+    Builds a connector whose GETs are answered by the first responses entry whose key is in the url.
+    """
+    connector = build_connector(None)
+    connector.get_site_id = MagicMock(return_value='s')
+    connector.get_list_id = MagicMock(return_value='l')
+    connector.send_response = MagicMock(side_effect=lambda info_dict: next(response for url_part, response in responses.items() if url_part in info_dict['url']))
+    return connector
+
+def test_list_id_is_not_cached_without_a_site_id(monkeypatch):
+    cache = MagicMock()
+    monkeypatch.setattr(sharepoint_connector_module, 'metadata_cache', cache)
+    connector = build_connector(None)
+    connector.get_site_id = MagicMock(return_value=None)
+    connector.send_response = MagicMock()
+
+    assert connector.get_list_id('COT_Employees') is False
+    assert connector.warm_list_metadata(['COT_Employees']) == {}
+    assert cache.method_calls == []
+    connector.send_response.assert_not_called()
+
+def test_item_changes_fall_back_to_a_full_download(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta_store, 'store_dir', str(tmp_path))
+    connector = build_list_connector({
+        '/items/delta': {'status': 'fail'},
+        '/items?': {'status': 'success', 'response': {'value': [{'id': '1', 'fields': {'Title': 'a'}}]}},
+    })
+    assert connector.get_item_changes('COT_Employees') == {'1': {'Title': 'a'}}
+
+def test_item_changes_raise_when_the_list_cannot_be_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta_store, 'store_dir', str(tmp_path))
+    connector = build_list_connector({'/items': {'status': 'fail'}})
+    with pytest.raises(RuntimeError):
+        connector.get_item_changes('COT_Employees')
+
+def test_item_changes_reject_filters():
+    with pytest.raises(ValueError):
+        build_list_connector({}).get_item_changes('COT_Employees', "&$filter=fields/Active eq 1")
+
+def test_streamed_formatting_rejects_unknown_lists_when_called():
+    connector = build_list_connector({'/columns': {'status': 'fail'}})
+    with pytest.raises(ValueError):
+        connector.format_and_batch_for_upload_sharepoint({}, 'Not_A_List', stream=True)
+
+def ok_batch(sub_requests):
+    return batch_response([
+        {'id': sub_request['id'], 'status': 204 if sub_request['method'] == 'DELETE' else 201,
+         'body': None if sub_request['method'] == 'DELETE' else {'id': f"sp-{sub_request['id']}", '@odata.etag': f'"{sub_request["id"]},1"'}}
+        for sub_request in sub_requests
+    ])
+
+def test_delete_items_batches_selected_items():
+    connector = build_connector(ok_batch)
+    connector.get_site_id = MagicMock(return_value='s')
+    connector.get_list_id = MagicMock(return_value='l')
+    connector.iter_items = MagicMock(return_value=iter((str(item_id), {'Active': item_id % 2 == 0}) for item_id in range(45)))
+
+    results = connector.delete_items('COT_Employees', predicate=lambda fields: fields['Active'])
+
+    assert sorted(len(sent) for sent in connector.sent) == [3, 20]
+    assert sorted(results, key=int) == [str(item_id) for item_id in range(0, 45, 2)]
+    assert {result['status'] for result in results.values()} == {204}
+
+def test_split_patches_are_uploaded_only_when_every_part_succeeded(monkeypatch):
+    monkeypatch.setattr(batch_packer, 'max_body_bytes', 1000)
+    fields = {f"Column{index}": 'y' * 200 for index in range(8)}
+    patches = [{'id': item_id, 'method': 'PATCH', 'url': f"/items/{item_id}", 'body': {'fields': fields}} for item_id in ('S1', 'S2')]
+    part_ids = [request['id'] for batch in batch_packer.pack(patches) for request in batch['requests']]
+
+    results = {part_id: {'status': 200, 'sharepoint_id': f"sp-{part_id.split('#')[0]}"} for part_id in part_ids}
+    results['S2#part2']['status'] = 500
+    results['Real#part1'] = {'status': 201, 'sharepoint_id': 'sp-Real'}
+
+    assert sorted(build_connector(ok_batch).get_uploaded_items(results)) == ['sp-Real', 'sp-S1']
+
+def test_uploaded_ids_and_etags_patch_the_cache():
+    connector = build_connector(ok_batch)
+    cache_list = [{'total_checksum': 'abc'}, {'U0': {'Unique_ID': 'U0', 'operation': 'POST'}, 'U1': {'Unique_ID': 'U1', 'operation': 'POST'}}]
+
+    results = connector.batch_upload([{'requests': post_requests(2)}])
+    update_cache(cache_list, connector.get_uploaded_items(results), 'Unique_ID')
+
+    assert cache_list[1]['U0']['sharepoint_id'] == 'sp-U0' and cache_list[1]['U0']['sharepoint_etag'] == '"U0,1"'
+    assert cache_list[1]['U1']['sharepoint_id'] == 'sp-U1'
+
+def test_uploaded_items_of_mixed_lists_are_split_by_list():
+    results = {'TFD_User_List|7': {'status': 201, 'sharepoint_id': '41', 'etag': '"e"'}, 'TFD_Credential_List|7': {'status': 201, 'sharepoint_id': '42'}}
+    uploaded_items = build_connector(ok_batch).get_uploaded_items(results, 'TFD_User_List')
+    assert uploaded_items == {'41': {'Unique_ID': '7', 'id': '41', '@odata.etag': '"e"'}}
+
+def test_streamed_batches_are_pulled_as_slots_free_up():
+    pulled = []
+
+    def batches():
+        for index in range(5):
+            pulled.append(index)
+            yield {'requests': post_requests(5)[index:index + 1]}
+
+    sent_when_pulled = []
+
+    def send_batch(sub_requests):
+        sent_when_pulled.append(len(pulled))
+        return ok_batch(sub_requests)
+
+    connector = build_connector(send_batch)
+    connector.max_concurrency = 1
+    results = connector.batch_upload(batches())
+
+    assert len(results) == 5
+    assert all(pulled_count <= sent_count + 2 for sent_count, pulled_count in enumerate(sent_when_pulled, start=1))
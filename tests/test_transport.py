@@ -0,0 +1,66 @@
+#tests/test_transport.py
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Transport import Transport, Record_Transport, Replay_Transport, build_response
+
+
+class Fake_Network(Transport):
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.calls = []
+
+    def send(self, session, method, url, **kwargs):
+        self.calls.append((method, url))
+        status, body = self.responses[url]
+        return build_response(method, url, status, {'Content-Type': 'application/json', 'Set-Cookie': 'x'}, json.dumps(body))
+
+def record(cassette_dir, responses: dict, requests_to_send: list):
+    recorder = Record_Transport(str(cassette_dir), Fake_Network(responses))
+    for method, url, kwargs in requests_to_send:
+        recorder.send(None, method, url, **kwargs)
+
+def test_record_then_replay_offline(tmp_path):
+    items_url = 'https://graph.microsoft.com/v1.0/sites/1/lists/2/items?$expand=fields'
+    token_url = 'https://login.microsoftonline.com/t/oauth2/v2.0/token'
+    record(tmp_path, {
+        items_url: (200, {'value': [{'id': '1'}]}),
+        token_url: (200, {'access_token': 'secret', 'expires_in': 3599}),
+    }, [('GET', items_url, {}), ('POST', token_url, {'data': {'client_secret': 'x'}})])
+
+    cassette = (tmp_path / 'cassette.jsonl').read_text()
+    assert 'secret' not in cassette and 'Set-Cookie' not in cassette
+
+    replay = Replay_Transport(str(tmp_path))
+    assert replay.send(None, 'GET', items_url).json() == {'value': [{'id': '1'}]}
+    assert replay.send(None, 'POST', token_url, data={'client_secret': 'changed'}).json() == {'access_token': 'REDACTED', 'expires_in': 3599}
+    assert replay.send(None, 'GET', 'https://graph.microsoft.com/v1.0/other').status_code == 404
+
+def test_replays_in_recorded_order_then_repeats_last(tmp_path):
+    url = 'https://sd/api/v3/assets/1'
+    network = Fake_Network({url: (503, {})})
+    recorder = Record_Transport(str(tmp_path), network)
+    recorder.send(None, 'GET', url)
+    network.responses[url] = (200, {'asset': 1})
+    recorder.send(None, 'GET', url)
+
+    replay = Replay_Transport(str(tmp_path))
+    assert [replay.send(None, 'GET', url).status_code for _ in range(3)] == [503, 200, 200]
+
+def test_injected_paging_and_throttling(tmp_path):
+    url = 'https://graph.microsoft.com/v1.0/sites/1/lists/2/items?$expand=fields'
+    record(tmp_path, {url: (200, {'value': list(range(5))})}, [('GET', url, {})])
+
+    replay = Replay_Transport(str(tmp_path), page_size=2)
+    pages, next_url = [], url
+    while next_url:
+        body = replay.send(None, 'GET', next_url).json()
+        pages.append(body['value'])
+        next_url = body.get('@odata.nextLink')
+    assert pages == [[0, 1], [2, 3], [4]]
+
+    replay = Replay_Transport(str(tmp_path), throttle_every=2, retry_after=7)
+    responses = [replay.send(None, 'GET', url) for _ in range(4)]
+    assert [response.status_code for response in responses] == [200, 429, 200, 429]
+    assert responses[1].headers['Retry-After'] == '7'
@@ -0,0 +1,53 @@
+#tests/test_utils.py
+import sys
+import os
+import logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.Utils import update_cache, cache_operation
+
+
+def test_update_cache_patches_ids_and_etags_in_place():
+    cache_list = [
+        {'total_checksum': 'abc'},
+        {
+            'sku-1': {'Unique_ID': 'sku-1', 'operation': 'POST'},
+            'sku-2': {'Unique_ID': 'sku-2', 'operation': 'PATCH', 'sharepoint_id': '7'},
+            'sku-3': {'Unique_ID': 'sku-3', 'operation': 'NONE', 'sharepoint_id': '8'},
+        },
+        {'status': 'continue'},
+    ]
+    uploaded_items = {
+        '41': {'Unique_ID': 'sku-1', 'id': '41', '@odata.etag': '"a1b2,1"'},
+        '7': {'Unique_ID': 'sku-2', 'id': '7', '@odata.etag': None},
+    }
+
+    assert update_cache(cache_list, uploaded_items, 'Unique_ID') is cache_list
+    assert cache_list[1]['sku-1'] == {'Unique_ID': 'sku-1', 'operation': 'POST', 'sharepoint_id': '41', 'sharepoint_etag': '"a1b2,1"'}
+    assert cache_list[1]['sku-2'] == {'Unique_ID': 'sku-2', 'operation': 'PATCH', 'sharepoint_id': '7'}
+    assert cache_list[1]['sku-3']['sharepoint_id'] == '8'
+
+def test_check_changes_lists_changed_fields():
+    previous = {'a1': {'Unique_ID': 'a1', 'name': 'laptop', 'state': 'In Use', 'total_cost': 900}}
+    current = {'a1': {'Unique_ID': 'a1', 'name': 'laptop', 'state': 'In Store', 'total_cost': 900, 'barcode': 'B1'}}
+
+    current_data = cache_operation(current, [{}, previous], logger=logging.getLogger('test'))
+    assert current_data[1]['a1']['operation'] == 'PATCH'
+    assert current_data[1]['a1']['changed_fields'] == ['barcode', 'state']
+    assert 'checksum' not in current_data[1]['a1']['field_checksums']
+
+def test_check_changes_reports_removed_fields():
+    previous = {'a1': {'Unique_ID': 'a1', 'name': 'laptop', 'barcode': 'B1'}}
+    current = {'a1': {'Unique_ID': 'a1', 'name': 'laptop'}}
+
+    current_data = cache_operation(current, [{}, previous], logger=logging.getLogger('test'))
+    assert current_data[1]['a1']['operation'] == 'PATCH'
+    assert current_data[1]['a1']['changed_fields'] == ['barcode']
+
+def test_check_changes_ignores_bookkeeping_only_differences():
+    previous = {'a1': {'Unique_ID': 'a1', 'name': 'laptop', 'sharepoint_id': '7', 'sharepoint_etag': '"e1,2"'}}
+    current = {'a1': {'Unique_ID': 'a1', 'name': 'laptop'}}
+
+    current_data = cache_operation(current, [{}, previous], logger=logging.getLogger('test'))
+    assert current_data[1]['a1']['operation'] == 'NONE'
+    assert 'changed_fields' not in current_data[1]['a1']
+    assert current_data[3]['operations'] == {'post': 0, 'patch': 0, 'delete': 0, 'none': 1}
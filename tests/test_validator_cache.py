@@ -0,0 +1,51 @@
+#tests/test_validator_cache.py
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import requests
+from utils.Validator_Cache import Validator_Cache
+
+
+def make_response(status_code: int, body: str = '', headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body.encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+def test_stores_200_and_reuses_body_on_304(tmp_path):
+    cache = Validator_Cache(str(tmp_path))
+    url = 'https://graph.microsoft.com/v1.0/subscribedSkus'
+
+    headers, entry = cache.add_validators(url, {'Authorization': 'Bearer x'})
+    assert 'If-None-Match' not in headers and entry == {}
+    cache.resolve(url, make_response(200, '{"value": [1, 2]}', {'ETag': '"v1"', 'Content-Type': 'application/json'}), entry)
+
+    request_headers = {'Authorization': 'Bearer y'}
+    headers, entry = cache.add_validators(url, request_headers)
+    assert headers == {'Authorization': 'Bearer y', 'If-None-Match': '"v1"'}
+    assert request_headers == {'Authorization': 'Bearer y'}
+
+    response = cache.resolve(url, make_response(304, headers={'ETag': '"v1"'}), entry)
+    assert response.status_code == 200
+    assert response.json() == {'value': [1, 2]}
+    assert response.headers['Content-Type'] == 'application/json'
+    assert cache.get_stats() == {'hits': 1, 'misses': 1, 'stores': 1, 'bytes_saved': 17, 'hit_ratio': 0.5}
+
+def test_last_modified_and_responses_without_validators(tmp_path):
+    cache = Validator_Cache(str(tmp_path))
+    cache.resolve('http://a/1', make_response(200, '[]', {'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}), {})
+    cache.resolve('http://a/2', make_response(200, '[]'), {})
+
+    assert cache.add_validators('http://a/1', None)[0] == {'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    assert cache.add_validators('http://a/2', None)[0] == {}
+
+def test_errors_pass_through_untouched(tmp_path):
+    cache = Validator_Cache(str(tmp_path))
+    cache.resolve('http://a/1', make_response(200, '[]', {'ETag': '"v1"'}), {})
+    headers, entry = cache.add_validators('http://a/1', {})
+
+    response = make_response(503, 'busy')
+    assert cache.resolve('http://a/1', response, entry) is response
+    assert cache.load('http://a/1')['body'] == '[]'
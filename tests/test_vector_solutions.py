@@ -18,7 +18,7 @@ def test_check_user_status_inactive():
 def test_check_user_status_random():
     assert check_user_status("Retried") is False
 
-@patch('Vector_Solutions_ETL.requests.get')
+@patch('Vector_Solutions_ETL.http_client.request')
 def test_get_all_users_success(mock_get):
     mock_response = MagicMock()
     mock_response.ok = True
@@ -101,7 +101,7 @@ def test_get_all_users_success(mock_get):
     assert users[2]['userid'] == 2654341
     assert users[2]['status'] == 'Offline'
 
-@patch('Vector_Solutions_ETL.requests.get')
+@patch('Vector_Solutions_ETL.http_client.request')
 def test_get_all_users_api_failure(mock_get):
     mock_response = MagicMock()
     mock_response.ok = False
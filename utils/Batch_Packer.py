@@ -0,0 +1,176 @@
+#ETLs\utils\Batch_Packer.py
+from utils.Run_Summary import register_summary_section
+import json, logging, threading
+
+class Batch_Packer:
+    #Graph JSON batching accepts at most 20 requests per $batch.
+    max_requests = 20
+    #Graph rejects request bodies over 4 MB, the rest is left for the $batch envelope and headers.
+    max_body_bytes = 3584 * 1024
+    #Bytes of {"requests":[...]} around the sub-requests.
+    envelope_bytes = 16
+    #Suffix of the ids of the later parts of a split PATCH, followed by the part number.
+    part_suffix = '#part'
+
+    def __init__(self, max_requests: int = None, max_body_bytes: int = None, logger=None):
+        """
+        Packs Graph sub-requests into $batch bodies that respect both the request count and the body size limit,
+        so small requests (DELETEs, short PATCHes) fill whole batches and large ones never push a batch over the limit.
+        Sub-requests for different lists or endpoints can share a batch, their ids only have to be unique within it.
+
+        Args:
+            max_requests (int): Most sub-requests per batch. Defaults to max_requests.
+            max_body_bytes (int): Most bytes of compact json per batch. Defaults to max_body_bytes.
+            logger (object): Logger for oversized requests. Defaults to this module's logger.
+        """
+        self.max_requests = max_requests or self.max_requests
+        self.max_body_bytes = max_body_bytes or self.max_body_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+
+        self.batches = 0
+        self.requests = 0
+        self.body_bytes = 0
+        self.split = 0
+        self.oversized = 0
+        #Ids of the parts of every split PATCH, with format {part_id: (original_id, part_index)}.
+        self.split_parts = {}
+
+    def get_size(self, request: dict) -> int:
+        """
+        Args:
+            request (dict): Sub-request.
+        Returns:
+            size (int): Bytes the sub-request takes in the batch body, separator included.
+        """
+        return len(json.dumps(request, separators=(',', ':')).encode('utf-8')) + 1
+
+    def split_request(self, request: dict) -> list:
+        """
+        Splits a sub-request that is too large for a batch of its own. A PATCH is split into several PATCHes of the same
+        item, each holding some of the fields. The first part keeps the id, the others are suffixed #part2, #part3... Anything else cannot be split and is returned alone.
+        Every part is recorded in split_parts so results can be matched back to the original request.
+
+        Args:
+            request (dict): Sub-request larger than max_body_bytes.
+        Returns:
+            requests (list): Sub-requests that each fit, or the original one when it cannot be split.
+        """
+        fields = (request.get('body') or {}).get('fields')
+        if request.get('method') != 'PATCH' or not isinstance(fields, dict) or len(fields) < 2:
+            with self.lock:
+                self.oversized += 1
+            self.logger.warning(f"Batch Packer: {request.get('method')} {request.get('id')} is larger than {self.max_body_bytes} bytes and cannot be split, sending it alone.")
+            return [request]
+
+        shell_bytes = self.get_size({**request, 'id': f"{request['id']}{self.part_suffix}00", 'body': {'fields': {}}})
+        parts = []
+        part_fields = {}
+        part_bytes = shell_bytes
+        for field, value in fields.items():
+            field_bytes = len(json.dumps({field: value}, separators=(',', ':')).encode('utf-8'))
+            if part_fields and part_bytes + field_bytes > self.max_body_bytes - self.envelope_bytes:
+                parts.append(part_fields)
+                part_fields = {}
+                part_bytes = shell_bytes
+            part_fields[field] = value
+            part_bytes += field_bytes
+        parts.append(part_fields)
+
+        split_requests = [
+            {**request, 'id': request['id'] if index == 0 else f"{request['id']}{self.part_suffix}{index + 1}", 'body': {**request['body'], 'fields': part_fields}}
+            for index, part_fields in enumerate(parts)
+        ]
+        with self.lock:
+            self.split += 1
+            for index, split_request in enumerate(split_requests, start=1):
+                self.split_parts[str(split_request['id'])] = (str(request['id']), index)
+        self.logger.info(f"Batch Packer: Split PATCH {request['id']} into {len(parts)} requests.")
+        return split_requests
+
+    def get_split_part(self, request_id) -> tuple:
+        """
+        Args:
+            request_id: Id of a sub-request.
+        Returns:
+            split_part (tuple): (original_id, part_index) if the id is a part of a split PATCH, part_index starting at 1, otherwise None.
+        """
+        with self.lock:
+            return self.split_parts.get(str(request_id))
+
+    def get_part_ids(self, request_id) -> list:
+        """
+        Args:
+            request_id: Id of the original sub-request.
+        Returns:
+            part_ids (list): Ids of every part the request was split into, in order, or just its own id if it was not split.
+        """
+        with self.lock:
+            part_ids = sorted((part_index, part_id) for part_id, (original_id, part_index) in self.split_parts.items() if original_id == str(request_id))
+        return [part_id for _, part_id in part_ids] or [str(request_id)]
+
+    def pack(self, requests):
+        """
+        Packs sub-requests into batches as they arrive, yielding each batch once the next request would not fit.
+        Only the batch being filled is held in memory, so requests can come from a generator.
+
+        Args:
+            requests (iterable): Sub-requests with format {id, method, url, headers, body}.
+        Yields:
+            batch (dict): Dict with format {requests: [sub-requests]}
+        """
+        batch = []
+        batch_ids = set()
+        batch_bytes = self.envelope_bytes
+
+        for request in requests:
+            size = self.get_size(request)
+            parts = self.split_request(request) if size + self.envelope_bytes > self.max_body_bytes else [request]
+
+            for part in parts:
+                part_size = size if part is request else self.get_size(part)
+                if batch and (len(batch) >= self.max_requests or batch_bytes + part_size > self.max_body_bytes or str(part['id']) in batch_ids):
+                    yield self.close_batch(batch, batch_bytes)
+                    batch = []
+                    batch_ids = set()
+                    batch_bytes = self.envelope_bytes
+
+                batch.append(part)
+                batch_ids.add(str(part['id']))
+                batch_bytes += part_size
+
+        if batch:
+            yield self.close_batch(batch, batch_bytes)
+
+    def close_batch(self, batch: list, batch_bytes: int) -> dict:
+        """
+        Args:
+            batch (list): Sub-requests of the batch.
+            batch_bytes (int): Size of the batch body.
+        Returns:
+            batch (dict): Dict with format {requests: [sub-requests]}
+        """
+        with self.lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.body_bytes += batch_bytes
+        return {'requests': batch}
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {batches, requests, requests_per_batch, avg_batch_kb, split, oversized}.
+        """
+        with self.lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'requests_per_batch': round(self.requests / self.batches, 1) if self.batches else 0.0,
+                'avg_batch_kb': round(self.body_bytes / self.batches / 1024, 1) if self.batches else 0.0,
+                'split': self.split,
+                'oversized': self.oversized,
+            }
+
+#Shared by every connector in the process.
+batch_packer = Batch_Packer()
+register_summary_section('batch_packer', batch_packer.get_stats)
@@ -0,0 +1,194 @@
+#ETLs\utils\Circuit_Breaker.py
+from utils.Metrics import get_route_template
+from utils.Run_Summary import register_summary_section
+import threading, time
+
+class Circuit_Open_Error(Exception):
+    def __init__(self, route_key: str, retry_in: float):
+        """
+        Raised instead of sending a request while the route's circuit is open.
+
+        Args:
+            route_key (str): Host and route family of the rejected request.
+            retry_in (float): Seconds until the circuit lets a probe request through.
+        """
+        super().__init__(f"Circuit open for {route_key}, next probe in {retry_in:.1f}s.")
+        self.route_key = route_key
+        self.retry_in = retry_in
+
+class Circuit_Breaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, route_key: str, failure_threshold: int = 5, recovery_time: float = 30.0):
+        """
+        Tracks the health of one host + route family across every call in the process.
+        Closed: requests flow, consecutive failures are counted.
+        Open: after failure_threshold consecutive failures requests fail fast with Circuit_Open_Error for recovery_time.
+        Half open: one probe request is let through, success closes the circuit, failure opens it again.
+
+        Args:
+            route_key (str): Host and route family the breaker guards.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            recovery_time (float): Seconds the circuit stays open before a probe is allowed.
+        """
+        self.route_key = route_key
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.lock = threading.Lock()
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_request(self) -> bool:
+        """
+        Lets the request through or raises Circuit_Open_Error.
+
+        Returns:
+            bool: True if the request is the half open probe.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return False
+
+            retry_in = self.opened_at + self.recovery_time - time.monotonic()
+            if self.state == self.OPEN and retry_in <= 0:
+                self.state = self.HALF_OPEN
+
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+
+            self.rejected += 1
+            raise Circuit_Open_Error(self.route_key, max(retry_in, 0.0))
+
+    def record_success(self):
+        """
+        Closes the circuit and resets the failure count.
+        """
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """
+        Lets another probe through after the half open probe ended without its outcome being recorded.
+        """
+        with self.lock:
+            self.probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """
+        Counts a failure, opening the circuit once failure_threshold is reached or when the half open probe failed.
+
+        Returns:
+            bool: True if this failure opened the circuit.
+        """
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == self.OPEN or (self.state == self.CLOSED and self.consecutive_failures < self.failure_threshold):
+                return False
+
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+            self.times_opened += 1
+            return True
+
+    def is_open(self) -> bool:
+        """
+        Returns:
+            bool: True while requests are being rejected, i.e. open and not yet due for a probe.
+        """
+        with self.lock:
+            return self.state == self.OPEN and time.monotonic() < self.opened_at + self.recovery_time
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {state, consecutive_failures, times_opened, rejected}.
+        """
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+class Circuit_Breaker_Registry:
+    #Connection errors and these statuses mean the upstream is unhealthy. 429 is throttling and is left to the rate limiter and retry policy.
+    failure_statuses = {408, 500, 502, 503, 504}
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0):
+        """
+        Holds one Circuit_Breaker per host + route family, created on first use.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit.
+            recovery_time (float): Seconds a circuit stays open before a probe is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get_route_key(self, url: str) -> str:
+        """
+        Reduces a url to its host and route family: the first three path segments, with ids replaced by {id}.
+        e.g. https://graph.microsoft.com/v1.0/sites/abc,123/lists -> graph.microsoft.com/v1.0/sites/{id}
+
+        Args:
+            url (str): Url of the request.
+        Returns:
+            route_key (str): Host and route family.
+        """
+        return get_route_template(url, max_segments=3)
+
+    def get_breaker(self, url: str) -> Circuit_Breaker:
+        """
+        Args:
+            url (str): Url of the request.
+        Returns:
+            breaker (Circuit_Breaker): Breaker for the url's host and route family.
+        """
+        route_key = self.get_route_key(url)
+        with self.lock:
+            if route_key not in self.breakers:
+                self.breakers[route_key] = Circuit_Breaker(route_key, self.failure_threshold, self.recovery_time)
+            return self.breakers[route_key]
+
+    def record_status(self, breaker: Circuit_Breaker, status_code: int) -> bool:
+        """
+        Records a response on the breaker, failure_statuses count as failures and everything else as a success.
+
+        Args:
+            breaker (Circuit_Breaker): Breaker the request went through.
+            status_code (int): Status code of the response.
+        Returns:
+            bool: True if this response opened the circuit.
+        """
+        if status_code in self.failure_statuses:
+            return breaker.record_failure()
+        breaker.record_success()
+        return False
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {route_key: breaker_stats}.
+        """
+        with self.lock:
+            breakers = list(self.breakers.values())
+        return {breaker.route_key: breaker.get_stats() for breaker in breakers}
+
+#Shared by every Http_Client in the process, so a dead upstream is detected once for every connector calling it.
+circuit_breakers = Circuit_Breaker_Registry()
+register_summary_section('circuit_breakers', circuit_breakers.get_stats)
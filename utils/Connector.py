@@ -2,69 +2,192 @@
 from pathlib import Path
 from abc import ABC, abstractmethod
 from urllib.parse import urlencode
-import json, requests, os, sys
+from utils.Http_Client import Http_Client
+from utils.Retry_Policy import Retry_Policy
+from utils.Token_Broker import Token_Broker
+from utils.Json_Stream import Json_Stream
+from utils.Response_Cache import Response_Cache
+from utils.Run_Summary import register_summary_section, log_run_summary
+from utils.Circuit_Breaker import Circuit_Open_Error
+from utils.Deadline import Deadline_Exceeded_Error, run_deadline
+from utils.Metrics import route_metrics
+import json, requests, os, sys, asyncio, time, threading
 
 class Connector(ABC):
-    def __init__(self, logger, token_key):
+    #Token info per token_key, shared by every connector in the process so a valid token is served from memory.
+    token_cache = {}
+    token_lock = threading.RLock()
+    #One broker per token file, shared so nested locking within the process stays reentrant.
+    token_brokers = {}
+    #Refresh this many seconds before the token expires so in-flight calls never carry an expired token.
+    token_refresh_margin = 300
+    auth_scheme = 'Bearer'
+
+    def __init__(self, logger, token_key, pool_size: int = 10, max_concurrency: int = 8, retry_policy: Retry_Policy = None, response_cache: Response_Cache = None, compress_min_bytes: int = None, timeout: tuple = (10, 120), hedge_gets: bool = False, transport=None):
         self.logger = logger
         self.logger.info(f"Init: {self.__class__.__name__} initialized.")
         self.token_key = token_key
+        self.http_client = Http_Client(logger, pool_size=pool_size, compress_min_bytes=compress_min_bytes, timeout=timeout, transport=transport)
+        #Idempotent GETs marked 'hedge': True in their info_dict are only hedged when this is on.
+        self.hedge_gets = hedge_gets
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy or Retry_Policy()
+        self.response_cache = response_cache or Response_Cache()
+        register_summary_section(f"{self.__class__.__name__} response_cache", self.response_cache.get_stats)
+        register_summary_section(f"{self.__class__.__name__} retries", self.retry_policy.get_stats)
 
         self.token_file_path = r'misc\tokens.json'
-        self.access_token = ''
+        self.token_broker = self.get_token_broker()
         self.token_info = self.load_token_info()
         self.is_access_token()
 
+    @property
+    def access_token(self) -> str:
+        """
+        Access token held in the shared token_info, so every connector using the same token_key sees a refresh.
+        """
+        return self.token_info.get('access_token', '')
+
+    @access_token.setter
+    def access_token(self, access_token: str):
+        self.token_info['access_token'] = access_token
+
     def load_token_info(self):
         """
         Loads credentials required to generate or regenerate an access token.
+        Served from the in-memory token_cache when another connector already loaded this token_key.
+
+        Returns:
+            dict: Dict of required token credentials.
+        """
+        with Connector.token_lock:
+            if self.token_key in Connector.token_cache:
+                self.logger.info(f"Load Token Info: Loaded {self.token_key} Token Data from memory.")
+                return Connector.token_cache[self.token_key]
+
+            token_data = self.read_token_info()
+            Connector.token_cache[self.token_key] = token_data
+            return token_data
+
+    def get_token_broker(self) -> Token_Broker:
+        """
+        Gets the process-wide broker for token_file_path, creating it on first use.
+
+        Returns:
+            token_broker (Token_Broker): Broker guarding the token file.
+        """
+        with Connector.token_lock:
+            if self.token_file_path not in Connector.token_brokers:
+                Connector.token_brokers[self.token_file_path] = Token_Broker(self.token_file_path, self.logger)
+            return Connector.token_brokers[self.token_file_path]
+
+    def read_token_info(self) -> dict:
+        """
+        Reads the token_key's credentials from the token file through the token broker.
 
         Returns:
             dict: Dict of required token credentials.
         """
         self.logger.info(f"Load Token Info: Loading token info for token key: {self.token_key}")
-        try:
-            with open(self.token_file_path, 'r', encoding='utf-8') as token_json_file:
-                all_tokens_data = json.load(token_json_file)
-                token_data = all_tokens_data.get(self.token_key)
-
-                if token_data:
-                    self.logger.info(f"Load Token Info: Loaded {self.token_key} Token Data.")
-                    return token_data
-                else:
-                    self.logger.warning(f"Load Token Info: {self.token_key} not found in token storage.")
-                    return {}
-        except FileNotFoundError as e:
-            self.logger.warning(f"Load Token Info: {self.token_file_path} not found, returning {[]}.")
-            return {}
+        token_data = self.token_broker.read(self.token_key)
+
+        if token_data:
+            self.logger.info(f"Load Token Info: Loaded {self.token_key} Token Data.")
+        else:
+            self.logger.warning(f"Load Token Info: {self.token_key} not found in token storage.")
+        return token_data
      
     def is_access_token(self):
         """
-        Check if an access token is present from the token loading.
+        Check if a valid access token is present from the token loading.
         If so, retreives it from cache, otherwise, calls get_access_token to generate a new token.
         """
-        self.access_token = self.token_info['access_token']
-
-        if self.access_token:
-            self.logger.info("Is Access Token: Retrieved access token from cache.")
+        if self.is_token_valid():
+            self.logger.info("Is Access Token: Retrieved valid access token from cache.")
             return
         else:
-            self.get_access_token()
+            self.refresh_access_token()
+
+    def is_token_valid(self, token_info: dict = None) -> bool:
+        """
+        Checks that the access token exists and does not expire within token_refresh_margin.
+        Tokens saved without an expires_at are treated as expired, as their age is unknown.
+
+        Args:
+            token_info (dict): Token info to check. Defaults to this connector's token_info.
+        Returns:
+            bool: True if the access token can be used.
+        """
+        token_info = self.token_info if token_info is None else token_info
+        expires_at = token_info.get('expires_at') or 0
+        return bool(token_info.get('access_token')) and time.time() < expires_at - self.token_refresh_margin
+
+    def get_valid_access_token(self) -> str:
+        """
+        Returns the access token, refreshing it first if it is missing or about to expire.
+        Only one thread refreshes, the rest reuse its token.
+
+        Returns:
+            access_token (str): Access Token.
+        """
+        if self.is_token_valid():
+            return self.access_token
+
+        with Connector.token_lock:
+            if self.is_token_valid():
+                return self.access_token
+            return self.refresh_access_token()
+
+    def refresh_stale_access_token(self, stale_token: str) -> str:
+        """
+        Refreshes the access token after a 401, unless another thread already replaced the token that was rejected.
+
+        Args:
+            stale_token (str): Token the rejected request was sent with.
+        Returns:
+            access_token (str): Access Token.
+        """
+        with Connector.token_lock:
+            if self.access_token and self.access_token != stale_token:
+                self.logger.info("Refresh Stale Access Token: Token already refreshed by another call.")
+                return self.access_token
+            return self.refresh_access_token(stale_token)
+
+    def refresh_access_token(self, stale_token: str = None) -> str:
+        """
+        Refreshes the access token once across threads and processes.
+        Holds the token file lock, re-reads the token file and reuses a valid token another ETL refreshed in the meantime.
+        Only calls get_access_token when no usable token is stored.
+
+        Args:
+            stale_token (str): Token that was rejected with a 401, never reused.
+        Returns:
+            access_token (str): Access Token.
+        """
+        with Connector.token_lock, self.token_broker.locked():
+            stored_info = self.token_broker.read(self.token_key)
+            if self.is_token_valid(stored_info) and stored_info.get('access_token') != stale_token:
+                self.logger.info(f"Refresh Access Token: Reusing {self.token_key} access token refreshed by another job.")
+                self.token_info.update(stored_info)
+                return self.access_token
+
+            return self.get_access_token()
+
+    def build_auth_header(self) -> str:
+        """
+        Returns:
+            auth_header (str): Authorization header value for the current access token.
+        """
+        return f'{self.auth_scheme} {self.access_token}'
         
     def load_token_to_json(self):
         """
         Loads the new access token into the json cache.
+        Goes through the token broker, which locks the file, keeps other keys intact and replaces the file atomically.
         """
         self.logger.info("Load Token to Json: Loading Tokens back into JSON cache.")
         try:
-            with open(self.token_file_path, 'r+', encoding='utf-8') as token_json_file:
-                all_token_data = json.load(token_json_file)
-                all_token_data[self.token_key] = self.token_info
-
-                token_json_file.seek(0)
-                token_json_file.truncate()
-
-                json.dump(all_token_data,token_json_file,indent=4)
+            self.token_broker.write(self.token_key, self.token_info)
 
             self.logger.info("Load Token to Json: Tokens successfully loaded into JSON cache.")
         except Exception as e:
@@ -97,6 +220,7 @@ class Connector(ABC):
                     'headers': headers,
                     'data': data,
                     'method': 'post',
+                    'retry_post': True,
                 }
 
             case "service_desk_tokens":
@@ -117,15 +241,16 @@ class Connector(ABC):
                     "headers": headers,
                     "data": data, 
                     "method": "post",
+                    "retry_post": True,
                 }
                 
         response_dict = self.send_response(info_dict)
-        response_json = response_dict['response']
+        response_json = response_dict.get('response')
 
         if response_dict.get('status') == 'success':
             self.logger.info("Get Access Token: Succesfully retrieved access token.")
             self.access_token = response_json['access_token']
-            self.token_info['access_token'] = self.access_token
+            self.token_info['expires_at'] = int(time.time()) + int(response_json.get('expires_in', 3600))
             self.load_token_to_json()
             return self.access_token
         else:
@@ -134,23 +259,25 @@ class Connector(ABC):
     def response_checker(self, response: object)-> dict:
         """
         Takes in a response object from send_response checks if it's a single or multi response, checks all status codes and returns a dict that contains
-        action: (retry/continue), response: response object.
+        action: (retry/backoff/continue/end), response: response object.
+        backoff is returned for transient codes (429/5xx/408) along with the Retry-After header, if any.
 
         Args:
             response (obj): Response object that contains either a single response or a json of responses.
 
         Returns:
-            checked_response_dict (dict): Dict formatted: {action: 'retry/continue', response: response_object}
+            checked_response_dict (dict): Dict formatted: {action: 'retry/backoff/continue/end', response: response_object, retry_after: str}
         """
         self.logger.info(f"Response Checker: Checking status code...")
         self.logger.debug(f"Response Checker: {response}")
-        fail_codes = [400, 401, 403, 408, 424, 500, 502, 503, 504]
+        fail_codes = [400, 401, 403, 408, 424, 429, 500, 502, 503, 504]
         failed_codes = []
         success_codes = [200, 201, 204]
         checked_response = {
             'action': '',
             'response': ''
         }
+        response_json = {}
 
         #Check if response is a single item, if so, will get the status code and check if there are any failed codes, otherwise, it will get the failed_codes from multiple items
         try:
@@ -185,10 +312,15 @@ class Connector(ABC):
         elif any(fail_code in fail_codes for fail_code in failed_codes): #Checks if there was any failed codes 
             self.logger.warning(f"Response Checker: Items have failed codes. Need to try again for {len(fail_codes)} items")
             if 401 in failed_codes:
-                self.logger.warning(f"Response Checker: 401 detected, refreshing access_token")
-                self.access_token = self.get_access_token()
+                self.logger.warning(f"Response Checker: 401 detected, access_token needs refreshing.")
                 checked_response['action'] = 'retry'
                 return checked_response
+            elif any(self.retry_policy.is_retryable(failed_code) for failed_code in failed_codes):
+                self.logger.warning(f"Response Checker: Transient codes detected, backing off: {failed_codes}")
+                checked_response['action'] = 'backoff'
+                checked_response['response'] = response_json
+                checked_response['retry_after'] = response.headers.get('Retry-After')
+                return checked_response
             elif 400 in failed_codes or 404 in failed_codes:
                 self.logger.warning(f"Response Checker: {failed_codes} detected, exiting.")
                 checked_response['action'] = 'end'
@@ -202,11 +334,40 @@ class Connector(ABC):
                 return checked_response
 
     def send_response(self, info_dict: dict)-> dict:
+        """
+        Sends the request described by info_dict, see fetch_response.
+        GETs with 'cache': True in the info_dict are served from the in-run response_cache, and identical GETs already
+        in flight are shared instead of sent twice. Only successful responses are cached.
+        GETs with 'conditional': True are revalidated against the on-disk validator cache, reusing the stored body on a 304.
+        POSTs with 'compress': True send json_body as compact json, gzipped once it reaches the client's compress_min_bytes.
+        'rate_tokens' sets the rate limit cost of the request, e.g. the number of sub-requests of a $batch.
+        POSTs with 'retry_post': True are retried after connection errors and 5xx like GETs, only set it when sending the POST twice is harmless.
+        Idempotent GETs with 'hedge': True are hedged past the route's p95 when the connector was created with hedge_gets.
+
+        Args:
+            info_dict (dict): Dict with format {url: url, headers: headers, data/json_body: data/json_body, method: 'get/post', cache: bool, cache_ttl: float, conditional: bool, compress: bool, rate_tokens: int, retry_post: bool, hedge: bool}
+        Returns:
+            response_dict (dict): Dict with format {status: 'success/fail', response: response_object}
+        """
+        if info_dict.get('method') == 'get' and info_dict.get('cache'):
+            return self.response_cache.get_or_fetch(
+                info_dict.get('url'),
+                lambda: self.fetch_response(info_dict),
+                ttl=info_dict.get('cache_ttl'),
+                should_cache=lambda response_dict: response_dict.get('status') == 'success'
+            )
+
+        return self.fetch_response(info_dict)
+
+    def fetch_response(self, info_dict: dict)-> dict:
         """
         Takes in a info_dict : 
-        If retries <= max_retries, proceed, otherwise return dict with status stop to let the program know to stop
-        Send the request, check status code, do checks, if sucessful code, return the object with status:stop
-        Retries up till the max before returning a stop.
+        If attempt <= retry_policy.max_attempts, proceed, otherwise return dict with status fail to let the program know to stop
+        Send the request, check status code, do checks, if sucessful code, return the object with status:success
+        401s refresh the token and retry. Transient codes (429/5xx) and connection errors back off per the retry_policy,
+        honoring Retry-After, until the attempts or the elapsed time budget run out.
+        A POST may already have been applied when it fails with a connection error or a 5xx, so those are only retried
+        when the info_dict sets 'retry_post': True. 429s are retried for every method.
         Returns a response_dict which will let the program know to stop or continue
 
         Args:
@@ -214,35 +375,56 @@ class Connector(ABC):
         Returns:
             response_dict (dict): Dict with format {status: 'success/fail', response: response_object}
         """
-        retries = 1
-        max_retries = 3
+        attempt = 1
+        max_attempts = self.retry_policy.max_attempts
+        started_at = time.monotonic()
 
         url = info_dict.get('url')
         headers = info_dict.get('headers')
         data = info_dict.get('data')
         json_body = info_dict.get('json_body')
         method = info_dict.get('method')
+        conditional = info_dict.get('conditional', False)
+        compress = info_dict.get('compress', False)
+        rate_tokens = info_dict.get('rate_tokens', 1)
+        hedge = self.hedge_gets and info_dict.get('hedge', False)
+        retry_transient = method != 'post' or info_dict.get('retry_post', False)
+        #Encoded once, every retry sends the same body.
+        put_body = urlencode({"input_data": data}).encode() if method == 'put' else None
 
         response_dict = {}
 
         
-        while retries <= max_retries:
+        while attempt <= max_attempts:
             try:
+                self.refresh_auth_header(headers)
+
                 if method == 'get':
-                    response = requests.get(url, headers=headers)
+                    response = self.http_client.request('get', url, headers=headers, rate_tokens=rate_tokens, conditional=conditional, hedge=hedge)
                 elif method == 'post':
-                    response = requests.post(url, headers=headers, json=json_body, data=data)
+                    response = self.http_client.request('post', url, headers=headers, json=json_body, data=data, rate_tokens=rate_tokens, compress=compress)
                 elif method == 'put':
-                    data= urlencode({"input_data": data}).encode()
-                    response = requests.put(url,headers=headers, data=data)
+                    response = self.http_client.request('put', url, headers=headers, data=put_body)
                 
                 checked_response = self.response_checker(response)
                     
                 if checked_response['action'] == 'retry':
-                    self.logger.warning(f"Send Response: {retries}/{max_retries} 401 error detected, retrying.")
-                    self.get_access_token()
-                    headers['Authorization'] = f'Bearer {self.access_token}'
-                    retries += 1
+                    self.logger.warning(f"Send Response: {attempt}/{max_attempts} 401 error detected, retrying.")
+                    self.refresh_stale_access_token(headers.get('Authorization', '').split(' ')[-1])
+                    headers['Authorization'] = self.build_auth_header()
+                    attempt += 1
+
+                elif checked_response['action'] == 'backoff':
+                    if not retry_transient and response.status_code != 429:
+                        self.logger.error(f"Send Response: {response.status_code} on a POST that is not safe to retry, exiting.")
+                        response_dict['status'] = 'fail'
+                        response_dict['response'] = checked_response
+                        break
+                    if not self.backoff(attempt, started_at, checked_response.get('retry_after'), url=url, method=method):
+                        response_dict['status'] = 'fail'
+                        response_dict['response'] = checked_response
+                        break
+                    attempt += 1
 
                 elif checked_response['action'] == 'continue':
                     self.logger.debug(f"Send Response: Creating response_dict.")
@@ -257,20 +439,200 @@ class Connector(ABC):
                     response_dict['response'] = checked_response
                     break
 
+            except (Circuit_Open_Error, Deadline_Exceeded_Error) as e:
+                self.logger.error(f"Send Response: {e} Failing fast for {url}.")
+                response_dict = {
+                    'status': 'fail',
+                }
+                return response_dict
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.logger.warning(f"Send Response: {attempt}/{max_attempts} Connection error: {e}")
+                if not retry_transient:
+                    self.logger.error(f"Send Response: Not retrying a POST that is not safe to retry for {url}.")
+                    response_dict = {
+                        'status': 'fail',
+                    }
+                    return response_dict
+                if not self.backoff(attempt, started_at, url=url, method=method):
+                    response_dict = {
+                        'status': 'fail',
+                    }
+                    return response_dict
+                attempt += 1
+
             except Exception as e:
                 self.logger.error(f"Send Response: Error occured trying to get a response. {e}")
                 response_dict = {
                     'status': 'fail',
                 }
                 return response_dict 
+
+        if not response_dict:
+            self.logger.error(f"Send Response: Ran out of attempts ({max_attempts}) for {url}.")
+            response_dict['status'] = 'fail'
             
         self.logger.debug(f"Send Response: Returning responses.")
         return response_dict
-    
 
-        
+    def send_streaming_response(self, info_dict: dict, array_keys: tuple = ('value', 'assets', 'worklogs')) -> Json_Stream:
+        """
+        Opt-in streaming version of send_response for large GET pages.
+        Handles 401s, transient codes and connection errors like send_response, then hands back the open body as a Json_Stream
+        so records in array_keys can be processed while the page is still downloading, instead of decoding the whole page first.
 
-        
-        
-            
-                
\ No newline at end of file
+        Args:
+            info_dict (dict): Dict with format {url: url, headers: headers, method: 'get'}
+            array_keys (tuple): Top level keys whose arrays are streamed record by record.
+        Returns:
+            json_stream (Json_Stream): Stream over the response body, None if the request failed.
+        """
+        url = info_dict.get('url')
+        headers = info_dict.get('headers')
+        attempt = 1
+        max_attempts = self.retry_policy.max_attempts
+        started_at = time.monotonic()
+
+        while attempt <= max_attempts:
+            try:
+                self.refresh_auth_header(headers)
+                response = self.http_client.request('get', url, headers=headers, stream=True)
+            except (Circuit_Open_Error, Deadline_Exceeded_Error) as e:
+                self.logger.error(f"Send Streaming Response: {e} Failing fast for {url}.")
+                return None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.logger.warning(f"Send Streaming Response: {attempt}/{max_attempts} Connection error: {e}")
+                if not self.backoff(attempt, started_at, url=url):
+                    return None
+                attempt += 1
+                continue
+
+            if response.status_code == 401:
+                response.close()
+                self.logger.warning(f"Send Streaming Response: {attempt}/{max_attempts} 401 error detected, retrying.")
+                self.refresh_stale_access_token(headers.get('Authorization', '').split(' ')[-1])
+                headers['Authorization'] = self.build_auth_header()
+                attempt += 1
+            elif self.retry_policy.is_retryable(response.status_code):
+                response.close()
+                self.logger.warning(f"Send Streaming Response: {response.status_code} detected, backing off.")
+                if not self.backoff(attempt, started_at, response.headers.get('Retry-After'), url=url):
+                    return None
+                attempt += 1
+            elif not response.ok:
+                self.logger.error(f"Send Streaming Response: {response.status_code} error detected for {url}: {response.text}")
+                response.close()
+                return None
+            else:
+                return Json_Stream(response.iter_content(chunk_size=65536), array_keys, source=response)
+
+        self.logger.error(f"Send Streaming Response: Ran out of attempts ({max_attempts}) for {url}.")
+        return None
+
+    def refresh_auth_header(self, headers: dict):
+        """
+        Refreshes the access token and the Authorization header in place when the token is about to expire.
+        Requests without an Authorization header (token requests, Vector) are left alone.
+
+        Args:
+            headers (dict): Headers of the request about to be sent.
+        """
+        if headers and 'Authorization' in headers and not self.is_token_valid():
+            self.logger.info("Refresh Auth Header: Access token about to expire, refreshing before sending.")
+            self.get_valid_access_token()
+            headers['Authorization'] = self.build_auth_header()
+
+    def backoff(self, attempt: int, started_at: float, retry_after=None, url: str = None, method: str = 'get') -> bool:
+        """
+        Sleeps before the next attempt if the retry_policy allows one.
+        Gives up straight away when the url's circuit breaker is open, or when the delay would run past the run_deadline,
+        as the next attempt would be rejected anyway.
+        Retries are counted against the url's route in route_metrics, waits asked for by Retry-After as throttle waits.
+
+        Args:
+            attempt (int): Attempt that just failed, starting at 1.
+            started_at (float): time.monotonic() when the call started.
+            retry_after (str): Retry-After header of the failed response.
+            url (str): Url of the failed request, used to check its circuit breaker.
+            method (str): Method of the failed request.
+        Returns:
+            bool: True if the caller should retry, False if the call has run out of retries.
+        """
+        if url and self.http_client.circuit_breakers.get_breaker(url).is_open():
+            self.logger.error(f"Backoff: Circuit open for {url}, not retrying.")
+            self.retry_policy.record_give_up()
+            return False
+
+        delay = self.retry_policy.get_delay(attempt, retry_after)
+        remaining = run_deadline.remaining()
+        if remaining is not None and delay >= remaining:
+            self.logger.error(f"Backoff: Retrying in {delay:.2f}s would pass the run deadline ({remaining:.1f}s left), giving up.")
+            self.retry_policy.record_give_up()
+            return False
+
+        if not self.retry_policy.should_retry(attempt, started_at, delay):
+            self.logger.error(f"Backoff: Giving up after {attempt} attempts ({time.monotonic() - started_at:.1f}s elapsed).")
+            self.retry_policy.record_give_up()
+            return False
+
+        self.logger.warning(f"Backoff: Attempt {attempt} failed, retrying in {delay:.2f}s.")
+        self.retry_policy.record_retry(delay)
+        if url:
+            route_metrics.record_retry(method, url, delay, throttled=retry_after is not None)
+        time.sleep(delay)
+        return True
+
+    async def run_in_thread(self, semaphore: asyncio.Semaphore, func, *args):
+        """
+        Runs a blocking connector call on a worker thread, holding a slot of the semaphore while it is in flight.
+
+        Args:
+            semaphore (asyncio.Semaphore): Bounds how many calls are in flight at once. None runs unbounded.
+            func (callable): Blocking function to run.
+            *args: Arguments passed to func.
+        Returns:
+            any: Whatever func returns.
+        """
+        if semaphore is None:
+            return await asyncio.to_thread(func, *args)
+
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def async_send_response(self, info_dict: dict, semaphore: asyncio.Semaphore = None) -> dict:
+        """
+        Async version of send_response. The request goes through the same pooled session, checks and retries.
+
+        Args:
+            info_dict (dict): Dict with format {url: url, headers: headers, data/json_body: data/json_body, method: 'get/post'}
+            semaphore (asyncio.Semaphore): Shared semaphore bounding the number of in-flight requests.
+        Returns:
+            response_dict (dict): Dict with format {status: 'success/fail', response: response_object}
+        """
+        return await self.run_in_thread(semaphore, self.send_response, info_dict)
+
+    async def async_send_responses(self, info_dicts: list) -> list:
+        """
+        Sends every info_dict concurrently, with at most max_concurrency requests in flight.
+
+        Args:
+            info_dicts (list): List of info_dicts accepted by send_response.
+        Returns:
+            response_list (list): List of response_dicts in the same order as info_dicts.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.logger.info(f"Async Send Responses: Sending {len(info_dicts)} requests, {self.max_concurrency} at a time.")
+        return await asyncio.gather(*(self.async_send_response(info_dict, semaphore) for info_dict in info_dicts))
+
+    def send_responses(self, info_dicts: list) -> list:
+        """
+        Sync facade over async_send_responses for callers that are not running an event loop.
+
+        Args:
+            info_dicts (list): List of info_dicts accepted by send_response.
+        Returns:
+            response_list (list): List of response_dicts in the same order as info_dicts.
+        """
+        if not info_dicts:
+            return []
+        return asyncio.run(self.async_send_responses(info_dicts))
@@ -0,0 +1,94 @@
+#ETLs\utils\Deadline.py
+from utils.Run_Summary import register_summary_section
+import threading, time
+
+class Deadline_Exceeded_Error(Exception):
+    def __init__(self, budget: float):
+        """
+        Raised instead of sending a request once the run has used up its deadline budget.
+
+        Args:
+            budget (float): Seconds the run was given.
+        """
+        super().__init__(f"Run deadline of {budget:g}s exceeded.")
+        self.budget = budget
+
+class Run_Deadline:
+    def __init__(self):
+        """
+        Time budget for the whole run. Every request checks it before sending and has its timeouts clamped to what is left,
+        and retries are not scheduled past it, so a run ends close to its budget instead of overrunning the schedule.
+        Nothing is enforced until start is called.
+        """
+        self.budget = None
+        self.started_at = None
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def start(self, budget: float):
+        """
+        Starts the clock.
+
+        Args:
+            budget (float): Seconds the run may take. None removes the deadline.
+        """
+        with self.lock:
+            self.budget = budget
+            self.started_at = time.monotonic()
+            self.rejected = 0
+
+    def remaining(self) -> float:
+        """
+        Returns:
+            remaining (float): Seconds left, None when no deadline is set.
+        """
+        if self.budget is None:
+            return None
+        return self.budget - (time.monotonic() - self.started_at)
+
+    def check(self):
+        """
+        Raises Deadline_Exceeded_Error once the budget is spent.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            with self.lock:
+                self.rejected += 1
+            raise Deadline_Exceeded_Error(self.budget)
+
+    def clamp_timeout(self, timeout):
+        """
+        Caps a requests timeout at the time left in the run.
+
+        Args:
+            timeout (float/tuple): requests timeout, a number or a (connect, read) tuple. None means no timeout.
+        Returns:
+            timeout (float/tuple): Timeout in the same shape, no longer than the remaining budget.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+        return min(timeout, remaining)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {budget, elapsed, remaining, rejected}, empty when no deadline was set.
+        """
+        if self.budget is None:
+            return {}
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'budget': self.budget,
+            'elapsed': round(elapsed, 1),
+            'remaining': round(self.budget - elapsed, 1),
+            'rejected': self.rejected,
+        }
+
+#Shared by every connector in the process, the budget is for the whole run.
+run_deadline = Run_Deadline()
+register_summary_section('run_deadline', run_deadline.get_stats)
@@ -0,0 +1,127 @@
+#ETLs\utils\Delta_Store.py
+from utils.Run_Summary import register_summary_section
+from utils.Utils import atomic_write_json
+import hashlib, json, os, re, threading
+
+class Delta_Store:
+    def __init__(self, store_dir: str = r'cache\sharepoint_delta'):
+        """
+        On-disk snapshots of SharePoint lists, each saved with the deltaLink of the delta query that produced it,
+        so the next run only downloads what changed since instead of the whole list.
+
+        Args:
+            store_dir (str): Folder holding one json file per list (and params).
+        """
+        self.store_dir = store_dir
+        self.lock = threading.Lock()
+
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.added = 0
+        self.updated = 0
+        self.deleted = 0
+
+    def get_snapshot_path(self, list_name: str, params: str = "") -> str:
+        """
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Parameters of the query, lists read with different $select are stored apart.
+        Returns:
+            snapshot_path (str): Path of the snapshot file.
+        """
+        file_name = re.sub(r'[^\w.-]', '_', list_name)
+        if params:
+            file_name += f"_{hashlib.sha256(params.encode('utf-8')).hexdigest()[:8]}"
+        return os.path.join(self.store_dir, f"{file_name}.json")
+
+    def load(self, list_name: str, params: str = "") -> dict:
+        """
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Parameters of the query.
+        Returns:
+            snapshot (dict): Dict with format {delta_link, items}, empty if the list was never stored or the file is unreadable.
+        """
+        try:
+            with open(self.get_snapshot_path(list_name, params), 'r', encoding='utf-8') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            return snapshot if snapshot.get('delta_link') and isinstance(snapshot.get('items'), dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def store(self, list_name: str, delta_link: str, items: dict, params: str = ""):
+        """
+        Saves the snapshot and its deltaLink, replacing the list's file atomically so a crash never leaves a half written snapshot.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            delta_link (str): @odata.deltaLink returned with the last page of the delta query.
+            items (dict): Dict with the sharepoint_id as the key and the fields as the value.
+            params (str): Parameters of the query.
+        """
+        atomic_write_json({'list_name': list_name, 'delta_link': delta_link, 'items': items}, self.get_snapshot_path(list_name, params))
+
+    def clear(self, list_name: str, params: str = ""):
+        """
+        Drops the list's snapshot, the next sync downloads the whole list.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            params (str): Parameters of the query.
+        """
+        try:
+            os.remove(self.get_snapshot_path(list_name, params))
+        except FileNotFoundError:
+            pass
+
+    def apply_changes(self, items: dict, changes: list, full_sync: bool = False) -> dict:
+        """
+        Applies the items returned by a delta query to a snapshot. Deleted items carry a 'deleted' facet or an '@removed'
+        annotation, every other item replaces the stored fields.
+
+        Args:
+            items (dict): Snapshot, dict with the sharepoint_id as the key and the fields as the value. Updated in place.
+            changes (list): listItem objects from the delta pages.
+            full_sync (bool): The changes are a full download, counted as a full sync instead of adds.
+        Returns:
+            items (dict): The updated snapshot.
+        """
+        added = updated = deleted = 0
+        for change in changes:
+            item_id = change.get('id')
+            if 'deleted' in change or '@removed' in change:
+                deleted += items.pop(item_id, None) is not None
+            elif (fields:= change.get('fields')):
+                if item_id in items:
+                    updated += 1
+                else:
+                    added += 1
+                items[item_id] = fields
+
+        with self.lock:
+            if full_sync:
+                self.full_syncs += 1
+            else:
+                self.delta_syncs += 1
+                self.added += added
+                self.updated += updated
+                self.deleted += deleted
+        return items
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {full_syncs, delta_syncs, added, updated, deleted}.
+        """
+        with self.lock:
+            return {
+                'full_syncs': self.full_syncs,
+                'delta_syncs': self.delta_syncs,
+                'added': self.added,
+                'updated': self.updated,
+                'deleted': self.deleted,
+            }
+
+#Shared by every connector in the process, snapshots live on disk between runs.
+delta_store = Delta_Store()
+register_summary_section('sharepoint_delta', delta_store.get_stats)
@@ -0,0 +1,306 @@
+#ETLs\utils\Http_Client.py
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from utils.Rate_Limiter import rate_limiter as shared_rate_limiter
+from utils.Validator_Cache import validator_cache as shared_validator_cache
+from utils.Circuit_Breaker import circuit_breakers as shared_circuit_breakers
+from utils.Metrics import route_metrics
+from utils.Deadline import run_deadline
+from utils.Transport import Network_Transport, default_transport
+from utils.Run_Summary import register_summary_section
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import gzip, json, threading, time, requests
+
+#urllib3 only decodes brotli when one of these packages is installed, so br is only advertised then.
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+class Http_Client:
+    accept_encoding = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+    #Bytes sent and received per host across every client in the process, before and after compression.
+    transfer_stats = {}
+    transfer_lock = threading.Lock()
+
+    def __init__(self, logger, pool_size: int = 10, rate_limiter=None, validator_cache=None, compress_min_bytes: int = None, circuit_breakers=None, timeout: tuple = (10, 120), hedge_min_samples: int = 20, transport=None):
+        """
+        Holds one pooled keep-alive session per host so repeated calls reuse open TCP/TLS connections.
+        Sessions ask for compressed responses, and request bodies sent with compress=True are gzipped once they reach compress_min_bytes.
+        Every request gets a timeout, capped by the run_deadline, so a hung socket cannot stall the run.
+
+        Args:
+            logger (object): Logger object for logging.
+            pool_size (int): Max number of connections kept open per host.
+            rate_limiter (Rate_Limiter): Per-host limiter applied before every request. Defaults to the process-wide limiter.
+            validator_cache (Validator_Cache): ETag/Last-Modified store used by conditional GETs. Defaults to the process-wide cache.
+            compress_min_bytes (int): Smallest request body that is gzipped. None never gzips request bodies, as not every API accepts them.
+            circuit_breakers (Circuit_Breaker_Registry): Per host + route family breakers checked before every request. Defaults to the process-wide registry.
+            timeout (tuple): Default (connect, read) timeout in seconds, a request can pass its own.
+            hedge_min_samples (int): Requests a route needs before its p95 is trusted as the hedge delay.
+            transport (Transport): Puts requests on the wire, or records/replays them. Defaults to the transport picked by ETL_TRANSPORT.
+        """
+        self.logger = logger
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.validator_cache = validator_cache or shared_validator_cache
+        self.compress_min_bytes = compress_min_bytes
+        self.circuit_breakers = circuit_breakers or shared_circuit_breakers
+        self.timeout = timeout
+        self.hedge_min_samples = hedge_min_samples
+        self.transport = transport or default_transport
+        if not isinstance(self.transport, Network_Transport):
+            self.logger.warning(f"Init: Requests go through {self.transport.__class__.__name__}, not the network.")
+        self.hedge_executor = None
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        Gets the pooled session for the host of the url, creating it on first use.
+
+        Args:
+            url (str): Url that will be called.
+        Returns:
+            session (requests.Session): Session bound to the url's host.
+        """
+        host = urlsplit(url).netloc.lower()
+        session = self.sessions.get(host)
+        if session:
+            return session
+
+        with self.sessions_lock:
+            session = self.sessions.get(host)
+            if not session:
+                session = requests.Session()
+                session.headers['Accept-Encoding'] = self.accept_encoding
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+                self.logger.info(f"Get Session: Opened pooled session for {host} (pool size: {self.pool_size}).")
+
+        return session
+
+    def request(self, method: str, url: str, rate_tokens: int = 1, conditional: bool = False, compress: bool = False, hedge: bool = False, **kwargs) -> requests.Response:
+        """
+        Waits for the host's rate limit, then sends a request through the pooled session for the url's host.
+        Conditional GETs carry the validators stored by the validator_cache, and a 304 comes back as a 200 with the stored body.
+        Raises Circuit_Open_Error without sending anything while the route's circuit breaker is open,
+        and Deadline_Exceeded_Error once the run_deadline is spent.
+
+        Args:
+            method (str): get/post/put/patch/delete.
+            url (str): Url to call.
+            rate_tokens (int): Rate limit cost of the request, e.g. the number of sub-requests in a $batch.
+            conditional (bool): Revalidate a GET against the on-disk validator_cache. Ignored for streamed and non GET requests.
+            compress (bool): Send the body as compact json, gzipped when it reaches compress_min_bytes. Used for large $batch bodies.
+            hedge (bool): Send a second copy of an idempotent GET when the first is slower than the route's p95, see send_hedged.
+            **kwargs: Passed through to requests (headers, json, data, params, timeout).
+        Returns:
+            response (requests.Response): Response object.
+        """
+        run_deadline.check()
+        wait_time = self.rate_limiter.acquire(url, rate_tokens)
+        if wait_time:
+            self.logger.debug(f"Request: Rate limited, waited {wait_time:.2f}s before {method.upper()} {url}")
+            route_metrics.record_throttle_wait(method, url, wait_time)
+
+        run_deadline.check()
+        kwargs['timeout'] = run_deadline.clamp_timeout(kwargs.get('timeout', self.timeout))
+        body_size = self.compress_body(kwargs) if compress else None
+        send = self.send_hedged if hedge and method.lower() == 'get' and not kwargs.get('stream') else self.send
+
+        if not conditional or method.lower() != 'get' or kwargs.get('stream') or kwargs.get('params'):
+            response = send(method, url, **kwargs)
+            self.record_transfer(method, url, response, body_size, kwargs.get('stream'))
+            return response
+
+        kwargs['headers'], entry = self.validator_cache.add_validators(url, kwargs.get('headers'))
+        response = send(method, url, **kwargs)
+        self.record_transfer(method, url, response, body_size)
+        if response.status_code == 304:
+            self.logger.debug(f"Request: {url} not modified, reusing stored body.")
+        return self.validator_cache.resolve(url, response, entry)
+
+    def send(self, method: str, url: str, count_failures: bool = True, **kwargs) -> requests.Response:
+        """
+        Sends the request through the route's circuit breaker, recording the outcome on it and the status and latency in route_metrics.
+
+        Args:
+            method (str): get/post/put/patch/delete.
+            url (str): Url to call.
+            count_failures (bool): Count a connection error or timeout against the breaker. Hedged copies leave that to send_hedged,
+                so a slow copy that lost the race does not open the circuit.
+            **kwargs: Passed through to requests.
+        Returns:
+            response (requests.Response): Response object.
+        """
+        breaker = self.circuit_breakers.get_breaker(url)
+        is_probe = breaker.before_request()
+
+        started_at = time.perf_counter()
+        try:
+            response = self.transport.send(self.get_session(url), method.upper(), url, **kwargs)
+        except Exception as e:
+            try:
+                route_metrics.record_request(method, url, type(e).__name__, time.perf_counter() - started_at)
+                if count_failures and breaker.record_failure():
+                    self.logger.warning(f"Send: Circuit opened for {breaker.route_key}, failing fast for {breaker.recovery_time:.0f}s.")
+            finally:
+                #An uncounted hedged copy must not keep the half open probe, or the route would reject every request after it.
+                if is_probe and not count_failures:
+                    breaker.release_probe()
+            raise
+
+        route_metrics.record_request(method, url, response.status_code, time.perf_counter() - started_at)
+        if self.circuit_breakers.record_status(breaker, response.status_code):
+            self.logger.warning(f"Send: Circuit opened for {breaker.route_key} after {response.status_code}, failing fast for {breaker.recovery_time:.0f}s.")
+        return response
+
+    def send_hedged(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends an idempotent GET and, if it has not answered within the route's observed p95, a second copy.
+        Whichever answers first is returned and the other is closed when it lands, which caps the tail latency of slow calls.
+        Routes without hedge_min_samples requests yet are sent once.
+
+        Args:
+            method (str): get.
+            url (str): Url to call.
+            **kwargs: Passed through to requests.
+        Returns:
+            response (requests.Response): First response to arrive, or the surviving one if the first failed.
+        """
+        hedge_after = route_metrics.get_latency_percentile(method, url, 95, self.hedge_min_samples)
+        if hedge_after is None:
+            return self.send(method, url, **kwargs)
+
+        executor = self.get_hedge_executor()
+        primary = executor.submit(self.send, method, url, count_failures=False, **kwargs)
+        done, _ = wait([primary], timeout=hedge_after)
+        winner = primary
+
+        if not done:
+            self.rate_limiter.acquire(url)
+            self.logger.debug(f"Send Hedged: {url} slower than p95 ({hedge_after * 1000:.0f}ms), sending a hedge.")
+            hedge = executor.submit(self.send, method, url, count_failures=False, **kwargs)
+            done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+
+            winner = primary if primary in done else hedge
+            if winner.exception() is not None and pending:
+                winner = pending.pop()
+                wait([winner])
+            loser = hedge if winner is primary else primary
+            loser.add_done_callback(lambda future: future.exception() is None and future.result().close())
+            route_metrics.record_hedge(method, url, won=winner is hedge)
+
+        breaker = self.circuit_breakers.get_breaker(url)
+        if winner.exception() is not None and breaker.record_failure():
+            self.logger.warning(f"Send Hedged: Circuit opened for {breaker.route_key}, failing fast for {breaker.recovery_time:.0f}s.")
+        return winner.result()
+
+    def get_hedge_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns:
+            hedge_executor (ThreadPoolExecutor): Worker threads for hedged GETs, created on first use.
+        """
+        with self.sessions_lock:
+            if self.hedge_executor is None:
+                self.hedge_executor = ThreadPoolExecutor(max_workers=self.pool_size * 2, thread_name_prefix='hedge')
+            return self.hedge_executor
+
+    def compress_body(self, kwargs: dict) -> int:
+        """
+        Replaces a json body with compact json bytes in place, gzipping them when they reach compress_min_bytes.
+        Headers are copied, never changed in the caller's dict.
+
+        Args:
+            kwargs (dict): Keyword arguments of the request.
+        Returns:
+            body_size (int): Size of the body before gzip, None if there was no json body.
+        """
+        if kwargs.get('json') is None:
+            return None
+
+        body = json.dumps(kwargs.pop('json'), separators=(',', ':')).encode('utf-8')
+        headers = dict(kwargs.get('headers') or {})
+        headers['Content-Type'] = 'application/json'
+
+        body_size = len(body)
+        if self.compress_min_bytes is not None and body_size >= self.compress_min_bytes:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            headers['Content-Encoding'] = 'gzip'
+
+        kwargs['data'] = body
+        kwargs['headers'] = headers
+        return body_size
+
+    def record_transfer(self, method: str, url: str, response: requests.Response, body_size: int = None, stream: bool = False):
+        """
+        Records the bytes a request put on the wire and what they were before compression, for both directions.
+        Streamed responses are not read yet, so only their request side is counted.
+
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+            response (requests.Response): Response of the request.
+            body_size (int): Request body size before gzip, when compress_body ran.
+            stream (bool): The response body has not been read.
+        """
+        try:
+            request_body = response.request.body if response.request is not None else None
+            sent_wire = len(request_body.encode('utf-8') if isinstance(request_body, str) else request_body or b'')
+            sent = body_size if body_size is not None else sent_wire
+
+            received = received_wire = 0
+            if not stream:
+                received = len(response.content or b'')
+                received_wire = response.raw.tell() if hasattr(response.raw, 'tell') else int(response.headers.get('Content-Length') or received)
+        except Exception as e:
+            self.logger.debug(f"Record Transfer: Could not size {method.upper()} {url}: {e}")
+            return
+
+        self.logger.debug(f"Record Transfer: {method.upper()} {url} sent {sent_wire}/{sent} bytes, received {received_wire}/{received} bytes (wire/uncompressed).")
+        route_metrics.record_bytes(method, url, sent_wire, received_wire)
+
+        host = urlsplit(url).netloc.lower()
+        with Http_Client.transfer_lock:
+            stats = Http_Client.transfer_stats.setdefault(host, {'requests': 0, 'sent': 0, 'sent_wire': 0, 'received': 0, 'received_wire': 0})
+            stats['requests'] += 1
+            stats['sent'] += sent
+            stats['sent_wire'] += sent_wire
+            stats['received'] += received
+            stats['received_wire'] += received_wire
+
+    @classmethod
+    def get_transfer_stats(cls) -> dict:
+        """
+        Returns:
+            transfer_stats (dict): Dict with format {host: {requests, sent, sent_wire, received, received_wire, saved_ratio}}.
+            saved_ratio is the share of bytes compression kept off the wire, both directions combined.
+        """
+        with cls.transfer_lock:
+            transfer_stats = {}
+            for host, stats in cls.transfer_stats.items():
+                total = stats['sent'] + stats['received']
+                wire = stats['sent_wire'] + stats['received_wire']
+                transfer_stats[host] = {**stats, 'saved_ratio': round(1 - wire / total, 3) if total else 0.0}
+            return transfer_stats
+
+    def close(self):
+        """
+        Closes every pooled session.
+        """
+        with self.sessions_lock:
+            for host, session in self.sessions.items():
+                session.close()
+                self.logger.debug(f"Close: Closed pooled session for {host}.")
+            self.sessions = {}
+            if self.hedge_executor is not None:
+                self.hedge_executor.shutdown(wait=False)
+                self.hedge_executor = None
+
+register_summary_section('http_transfer', Http_Client.get_transfer_stats)
@@ -0,0 +1,135 @@
+#ETLs\utils\Json_Stream.py
+import codecs, json, re
+
+WHITESPACE = re.compile(r'\s*')
+
+class Json_Stream:
+    def __init__(self, chunks, array_keys: tuple = ('value', 'assets', 'worklogs'), source=None):
+        """
+        Incrementally decodes a top level JSON object from an iterable of byte chunks.
+        Records inside array_keys are yielded one at a time while the body is still arriving, every other top level key is kept in metadata.
+
+        Args:
+            chunks (iterable): Iterable of bytes/str chunks, e.g. response.iter_content().
+            array_keys (tuple): Top level keys whose arrays are streamed record by record.
+            source (object): Optional object with a close() method (e.g. the response), closed once the stream is exhausted.
+        """
+        self.chunks = iter(chunks)
+        self.array_keys = set(array_keys)
+        self.source = source
+        self.metadata = {}
+        self.record_count = 0
+
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.index = 0
+        self.exhausted = False
+
+    def read_more(self) -> bool:
+        """
+        Appends the next chunk to the buffer, dropping the part already consumed.
+
+        Returns:
+            bool: False once there is nothing left to read.
+        """
+        if self.exhausted:
+            return False
+
+        self.buffer = self.buffer[self.index:]
+        self.index = 0
+
+        for chunk in self.chunks:
+            if not chunk:
+                continue
+            self.buffer += self.text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            return True
+
+        self.buffer += self.text_decoder.decode(b'', final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it, reading more when needed.
+
+        Returns:
+            char (str): Next non whitespace character, '' at the end of the input.
+        """
+        while True:
+            self.index = WHITESPACE.match(self.buffer, self.index).end()
+            if self.index < len(self.buffer):
+                return self.buffer[self.index]
+            if not self.read_more():
+                return ''
+
+    def expect(self, char: str):
+        """
+        Consumes char, raising if the input has something else.
+        """
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.index)
+        self.index += 1
+
+    def next_value(self):
+        """
+        Decodes the next complete JSON value, reading more chunks until it fits in the buffer.
+        A value ending exactly at the end of the buffer is re-read once more data arrives, as a number like 12 might be 1234.
+
+        Returns:
+            value (any): Decoded JSON value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.index)
+                if end < len(self.buffer) or self.exhausted:
+                    self.index = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self.read_more()
+
+    def records(self):
+        """
+        Yields every record of the streamed arrays, filling metadata with the other top level keys as they are passed.
+
+        Yields:
+            record (any): One decoded element of an array in array_keys.
+        """
+        try:
+            self.expect('{')
+            if self.peek() == '}':
+                self.index += 1
+                return
+
+            while True:
+                key = self.next_value()
+                self.expect(':')
+
+                if key in self.array_keys and self.peek() == '[':
+                    self.index += 1
+                    if self.peek() == ']':
+                        self.index += 1
+                    else:
+                        while True:
+                            yield self.next_value()
+                            self.record_count += 1
+                            if self.peek() == ',':
+                                self.index += 1
+                                continue
+                            self.expect(']')
+                            break
+                else:
+                    self.metadata[key] = self.next_value()
+
+                if self.peek() == ',':
+                    self.index += 1
+                    continue
+                self.expect('}')
+                break
+        finally:
+            if self.source is not None:
+                self.source.close()
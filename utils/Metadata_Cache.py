@@ -0,0 +1,104 @@
+#ETLs\utils\Metadata_Cache.py
+from utils.Run_Summary import register_summary_section
+from utils.Utils import atomic_write_json
+import json, threading, time
+
+class Metadata_Cache:
+    #Seconds each kind of entry stays valid, ids of sites and lists almost never change.
+    default_ttls = {
+        'site_id': 30 * 24 * 60 * 60,
+        'list_id': 7 * 24 * 60 * 60,
+    }
+
+    def __init__(self, cache_path: str = r'cache\sharepoint_metadata.json', ttls: dict = None):
+        """
+        Ids that connectors look up before they can build a url (SharePoint site and list ids), kept apart from the credentials in tokens.json.
+        Entries expire after their kind's TTL. The file is read once per process and the entries are shared by every connector.
+
+        Args:
+            cache_path (str): Json file holding the entries.
+            ttls (dict): Dict with format {kind: seconds}. Defaults to default_ttls.
+        """
+        self.cache_path = cache_path
+        self.ttls = ttls or self.default_ttls
+        self.entries = None
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def load(self):
+        """
+        Reads the file on first use. Call with lock held.
+        """
+        if self.entries is not None:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as cache_file:
+                self.entries = json.load(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def get(self, kind: str, key: str):
+        """
+        Args:
+            kind (str): Kind of entry, e.g. site_id or list_id.
+            key (str): Key of the entry within its kind.
+        Returns:
+            value: Stored value, None if missing or expired.
+        """
+        with self.lock:
+            self.load()
+            entry = self.entries.get(f"{kind}|{key}")
+            if entry and entry['expires_at'] > time.time():
+                self.hits += 1
+                return entry['value']
+            self.misses += 1
+            return None
+
+    def set_many(self, kind: str, values: dict):
+        """
+        Stores several entries of one kind and saves the file once.
+
+        Args:
+            kind (str): Kind of entry.
+            values (dict): Dict with format {key: value}.
+        """
+        expires_at = time.time() + self.ttls.get(kind, 24 * 60 * 60)
+        with self.lock:
+            self.load()
+            for key, value in values.items():
+                self.entries[f"{kind}|{key}"] = {'value': value, 'expires_at': expires_at}
+            self.stores += len(values)
+            self.save()
+
+    def set(self, kind: str, key: str, value):
+        """
+        Args:
+            kind (str): Kind of entry.
+            key (str): Key of the entry within its kind.
+            value: Value to store, must be json serializable.
+        """
+        self.set_many(kind, {key: value})
+
+    def save(self):
+        """
+        Writes every unexpired entry, replacing the file atomically. Call with lock held.
+        """
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items() if entry['expires_at'] > now}
+
+        atomic_write_json(self.entries, self.cache_path, indent=4)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {hits, misses, stores}.
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores}
+
+#Shared by every connector in the process, so a list id looked up once is reused by every connector of the run.
+metadata_cache = Metadata_Cache()
+register_summary_section('metadata_cache', metadata_cache.get_stats)
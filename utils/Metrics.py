@@ -0,0 +1,198 @@
+#ETLs\utils\Metrics.py
+from urllib.parse import urlsplit
+from utils.Run_Summary import register_summary_section
+import math, re, threading
+
+ID_SEGMENT = re.compile(r'^\d+$|^[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}$|,')
+
+def get_route_template(url: str, max_segments: int = None) -> str:
+    """
+    Reduces a url to its host and path with ids replaced by {id} and the query dropped, so calls to the same endpoint group together.
+    e.g. https://graph.microsoft.com/v1.0/sites/abc,123/lists/0f1e2d3c-.../items?expand=fields -> graph.microsoft.com/v1.0/sites/{id}/lists/{id}/items
+
+    Args:
+        url (str): Url of the request.
+        max_segments (int): Keep only the first max_segments path segments.
+    Returns:
+        route_template (str): Host and templated path.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment][:max_segments]
+    segments = ['{id}' if ID_SEGMENT.search(segment) else segment for segment in segments]
+    return '/'.join([parts.netloc.lower()] + segments)
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        sorted_values (list): Values sorted ascending.
+        pct (float): Percentile between 0 and 100.
+    Returns:
+        value (float): Percentile value, 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class Route_Metrics:
+    def __init__(self):
+        """
+        Per route template counters for every request sent through an Http_Client:
+        call count, latency, bytes in/out (on the wire), status codes, retries and time spent waiting on throttling.
+        """
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def get_route(self, method: str, url: str) -> dict:
+        """
+        Gets the counters for the method and url's route template, creating them on first use. Call with lock held.
+
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+        Returns:
+            route (dict): Counters of the route.
+        """
+        route_key = f"{method.upper()} {get_route_template(url)}"
+        route = self.routes.get(route_key)
+        if route is None:
+            route = {'count': 0, 'latencies': [], 'bytes_in': 0, 'bytes_out': 0, 'statuses': {}, 'retries': 0, 'retry_wait': 0.0, 'throttle_wait': 0.0, 'hedges': 0, 'hedge_wins': 0}
+            self.routes[route_key] = route
+        return route
+
+    def record_request(self, method: str, url: str, status, latency: float):
+        """
+        Records one request and its latency.
+
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+            status (int/str): Status code, or the exception name when no response came back.
+            latency (float): Seconds until the response headers arrived.
+        """
+        with self.lock:
+            route = self.get_route(method, url)
+            route['count'] += 1
+            route['latencies'].append(latency)
+            route['statuses'][str(status)] = route['statuses'].get(str(status), 0) + 1
+
+    def record_bytes(self, method: str, url: str, bytes_out: int, bytes_in: int):
+        """
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+            bytes_out (int): Request body bytes put on the wire.
+            bytes_in (int): Response body bytes read off the wire.
+        """
+        with self.lock:
+            route = self.get_route(method, url)
+            route['bytes_out'] += bytes_out
+            route['bytes_in'] += bytes_in
+
+    def record_retry(self, method: str, url: str, delay: float, throttled: bool = False):
+        """
+        Args:
+            method (str): Method of the request being retried.
+            url (str): Url of the request being retried.
+            delay (float): Seconds slept before the retry.
+            throttled (bool): The server asked for the wait (429/Retry-After), counted as throttle wait instead of retry wait.
+        """
+        with self.lock:
+            route = self.get_route(method, url)
+            route['retries'] += 1
+            route['throttle_wait' if throttled else 'retry_wait'] += delay
+
+    def record_throttle_wait(self, method: str, url: str, wait: float):
+        """
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+            wait (float): Seconds the client side rate limiter held the request.
+        """
+        with self.lock:
+            self.get_route(method, url)['throttle_wait'] += wait
+
+    def record_hedge(self, method: str, url: str, won: bool):
+        """
+        Args:
+            method (str): Method of the hedged request.
+            url (str): Url of the hedged request.
+            won (bool): The hedge answered before the original request.
+        """
+        with self.lock:
+            route = self.get_route(method, url)
+            route['hedges'] += 1
+            route['hedge_wins'] += int(won)
+
+    def get_latency_percentile(self, method: str, url: str, pct: float, min_samples: int = 20) -> float:
+        """
+        Args:
+            method (str): Method of the request.
+            url (str): Url of the request.
+            pct (float): Percentile between 0 and 100.
+            min_samples (int): Requests the route needs before the percentile is returned.
+        Returns:
+            latency (float): Latency percentile in seconds, None until the route has min_samples requests.
+        """
+        with self.lock:
+            latencies = self.get_route(method, url)['latencies']
+            if len(latencies) < min_samples:
+                return None
+            return percentile(sorted(latencies), pct)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {route: {count, p50_ms, p95_ms, p99_ms, bytes_in, bytes_out, statuses, retries, retry_wait, throttle_wait, hedges, hedge_wins}}.
+        """
+        with self.lock:
+            stats = {}
+            for route_key, route in sorted(self.routes.items()):
+                latencies = sorted(route['latencies'])
+                stats[route_key] = {
+                    'count': route['count'],
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                    'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                    'bytes_in': route['bytes_in'],
+                    'bytes_out': route['bytes_out'],
+                    'statuses': dict(route['statuses']),
+                    'retries': route['retries'],
+                    'retry_wait': round(route['retry_wait'], 2),
+                    'throttle_wait': round(route['throttle_wait'], 2),
+                    'hedges': route['hedges'],
+                    'hedge_wins': route['hedge_wins'],
+                }
+            return stats
+
+    def format_table(self, stats: dict) -> list:
+        """
+        Formats get_stats output as a fixed width table.
+
+        Args:
+            stats (dict): Output of get_stats.
+        Returns:
+            lines (list): Table lines, header first.
+        """
+        columns = ['route', 'calls', 'p50ms', 'p95ms', 'p99ms', 'KB in', 'KB out', 'statuses', 'retries', 'wait s']
+        rows = [[
+            route_key,
+            str(route['count']),
+            f"{route['p50_ms']:.0f}",
+            f"{route['p95_ms']:.0f}",
+            f"{route['p99_ms']:.0f}",
+            f"{route['bytes_in'] / 1024:.1f}",
+            f"{route['bytes_out'] / 1024:.1f}",
+            ' '.join(f"{status}x{count}" for status, count in sorted(route['statuses'].items())),
+            str(route['retries']),
+            f"{route['retry_wait'] + route['throttle_wait']:.1f}",
+        ] for route_key, route in stats.items()]
+
+        widths = [max(len(row[index]) for row in [columns] + rows) for index in range(len(columns))]
+        return ['  '.join(cell.ljust(width) if index in (0, 7) else cell.rjust(width) for index, (cell, width) in enumerate(zip(row, widths))) for row in [columns] + rows]
+
+#Shared by every Http_Client in the process, so the summary covers every connector of the run.
+route_metrics = Route_Metrics()
+register_summary_section('routes', route_metrics.get_stats, route_metrics.format_table)
@@ -0,0 +1,203 @@
+#ETLs\utils\Rate_Limiter.py
+from urllib.parse import urlsplit
+import threading, time, asyncio
+
+class Token_Bucket:
+    def __init__(self, rate: float, capacity: int):
+        """
+        Token bucket that refills at rate tokens per second up to capacity.
+
+        Args:
+            rate (float): Tokens added per second (sustained requests per second).
+            capacity (int): Max tokens held (largest burst allowed).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Takes tokens from the bucket, allowing it to go negative, and returns how long the caller must wait before sending.
+        Reserving instead of waiting while holding the lock keeps the bucket fair across threads and async tasks.
+
+        Args:
+            tokens (int): Number of tokens to take.
+        Returns:
+            wait_time (float): Seconds to wait before the request may be sent.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= tokens
+
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Blocks until tokens are available.
+
+        Returns:
+            wait_time (float): Seconds spent waiting.
+        """
+        wait_time = self.reserve(tokens)
+        if wait_time:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def async_acquire(self, tokens: int = 1) -> float:
+        """
+        Async version of acquire, sleeps without blocking the event loop.
+
+        Returns:
+            wait_time (float): Seconds spent waiting.
+        """
+        wait_time = self.reserve(tokens)
+        if wait_time:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+class Rate_Limiter:
+    #Sustained requests per second and burst size per upstream, kept just under each service's throttling limits.
+    default_limits = {
+        'graph.microsoft.com': {'rate': 20, 'capacity': 40},
+        'servicedesk.torranceca.gov': {'rate': 5, 'capacity': 10},
+        'management.azure.com': {'rate': 5, 'capacity': 10},
+        'devsandbox.targetsolutions.com': {'rate': 5, 'capacity': 10},
+    }
+
+    def __init__(self, limits: dict = None):
+        """
+        Holds one token bucket per upstream host. Hosts without a configured limit are not limited.
+
+        Args:
+            limits (dict): Dict with format {host: {rate: float, capacity: int}}. Defaults to default_limits.
+        """
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        for host, limit in (limits or self.default_limits).items():
+            self.configure(host, limit['rate'], limit['capacity'])
+
+    def configure(self, host: str, rate: float, capacity: int):
+        """
+        Adds or replaces the bucket for a host.
+
+        Args:
+            host (str): Host name, e.g. graph.microsoft.com.
+            rate (float): Sustained requests per second.
+            capacity (int): Burst size.
+        """
+        with self.lock:
+            self.buckets[host.lower()] = Token_Bucket(rate, capacity)
+
+    def get_bucket(self, url: str) -> Token_Bucket:
+        """
+        Gets the bucket for the url's host.
+
+        Args:
+            url (str): Url that will be called.
+        Returns:
+            bucket (Token_Bucket): Bucket for the host, None if the host is not limited.
+        """
+        host = urlsplit(url).hostname or ''
+        return self.buckets.get(host.lower())
+
+    def acquire(self, url: str, tokens: int = 1) -> float:
+        """
+        Blocks until the url's host has capacity for the request.
+
+        Args:
+            url (str): Url that will be called.
+            tokens (int): Cost of the request, e.g. the number of sub-requests in a $batch.
+        Returns:
+            wait_time (float): Seconds spent waiting.
+        """
+        bucket = self.get_bucket(url)
+        return bucket.acquire(tokens) if bucket else 0.0
+
+    async def async_acquire(self, url: str, tokens: int = 1) -> float:
+        """
+        Async version of acquire.
+
+        Args:
+            url (str): Url that will be called.
+            tokens (int): Cost of the request.
+        Returns:
+            wait_time (float): Seconds spent waiting.
+        """
+        bucket = self.get_bucket(url)
+        return await bucket.async_acquire(tokens) if bucket else 0.0
+
+class Adaptive_Concurrency:
+    def __init__(self, max_limit: int, min_limit: int = 1, initial_limit: int = None, cooldown: float = 2.0):
+        """
+        Concurrency limit that adapts to the upstream: halved when a response is throttled, raised by one after a full window
+        (limit many) of clean responses, so a bulk upload settles just under the point where the service starts pushing back.
+
+        Args:
+            max_limit (int): Most requests allowed in flight.
+            min_limit (int): Fewest requests allowed in flight.
+            initial_limit (int): Starting limit. Defaults to half of max_limit.
+            cooldown (float): Seconds after a decrease during which further throttled responses do not decrease again,
+                since requests already in flight were sent under the old limit.
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = initial_limit or max(max_limit // 2, min_limit)
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.clean_streak = 0
+        self.last_decrease = 0.0
+        self.decreases = 0
+        self.peak_limit = self.limit
+        self.condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """
+        Returns:
+            acquired (bool): True if a slot was free and is now taken.
+        """
+        with self.condition:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled: bool = False):
+        """
+        Frees a slot and adjusts the limit.
+
+        Args:
+            throttled (bool): The response was throttled (429/503).
+        """
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.clean_streak = 0
+                if now - self.last_decrease >= self.cooldown and self.limit > self.min_limit:
+                    self.limit = max(self.limit // 2, self.min_limit)
+                    self.last_decrease = now
+                    self.decreases += 1
+            else:
+                self.clean_streak += 1
+                if self.clean_streak >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.clean_streak = 0
+                    self.peak_limit = max(self.peak_limit, self.limit)
+            self.condition.notify_all()
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {limit, peak_limit, decreases}.
+        """
+        with self.condition:
+            return {'limit': self.limit, 'peak_limit': self.peak_limit, 'decreases': self.decreases}
+
+#Shared by every connector and thread in the process so the limits hold per upstream, not per connector.
+rate_limiter = Rate_Limiter()
@@ -0,0 +1,114 @@
+#ETLs\utils\Response_Cache.py
+from collections import OrderedDict
+import copy, threading, time
+
+class Response_Cache:
+    def __init__(self, max_entries: int = 512, ttl: float = 900.0):
+        """
+        In-run TTL + LRU cache for GET results with single-flight de-duplication:
+        concurrent callers asking for the same key wait for one request instead of each sending their own.
+        Values are deep copied in and out so callers can mutate what they get back.
+
+        Args:
+            max_entries (int): Max number of results kept, least recently used are evicted first.
+            ttl (float): Default seconds a result stays fresh.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    def get_or_fetch(self, key: str, fetch, ttl: float = None, should_cache=None):
+        """
+        Returns the cached value for key, or calls fetch once and shares the result with every caller waiting on the same key.
+
+        Args:
+            key (str): Cache key, usually the url.
+            fetch (callable): Called with no arguments to get the value on a miss.
+            ttl (float): Seconds the result stays fresh. Defaults to the cache ttl.
+            should_cache (callable): Takes the fetched value, returns False to skip caching it (e.g. failed responses).
+        Returns:
+            value (any): Cached or freshly fetched value.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            elif entry:
+                del self.entries[key]
+
+            flight = self.in_flight.get(key)
+            if flight:
+                self.shared += 1
+                is_leader = False
+            else:
+                flight = {'event': threading.Event(), 'value': None, 'error': None}
+                self.in_flight[key] = flight
+                self.misses += 1
+                is_leader = True
+
+        if not is_leader:
+            flight['event'].wait()
+            if flight['error']:
+                raise flight['error']
+            return copy.deepcopy(flight['value'])
+
+        try:
+            value = fetch()
+            flight['value'] = copy.deepcopy(value)
+
+            if should_cache is None or should_cache(value):
+                with self.lock:
+                    self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), flight['value'])
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+                        self.evictions += 1
+
+            return value
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            flight['event'].set()
+
+    def invalidate(self, key: str = None):
+        """
+        Drops one key, or every key when none is given.
+
+        Args:
+            key (str): Cache key to drop.
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {hits, misses, shared, evictions, entries, hit_ratio}.
+            shared counts callers that joined an identical request already in flight.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses + self.shared
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'hit_ratio': round((self.hits + self.shared) / lookups, 3) if lookups else 0.0,
+            }
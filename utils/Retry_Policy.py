@@ -0,0 +1,125 @@
+#ETLs\utils\Retry_Policy.py
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random, threading, time
+
+class Retry_Policy:
+    #Statuses that are transient on Graph, ServiceDesk and Vector and are worth sending again.
+    retryable_statuses = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, max_elapsed: float = 300.0):
+        """
+        Decides whether and when a failed request is retried: exponential backoff with full jitter, honoring Retry-After.
+        Also counts the retries spent so runs can report them.
+
+        Args:
+            max_attempts (int): Max number of attempts per call, including the first one.
+            base_delay (float): Backoff for the first retry in seconds, doubled on every attempt.
+            max_delay (float): Cap on the computed backoff in seconds.
+            max_elapsed (float): Max seconds a single call may spend, waits included, before it gives up.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+
+        self.retries = 0
+        self.retry_wait_seconds = 0.0
+        self.gave_up = 0
+        self.lock = threading.Lock()
+
+    def is_retryable(self, status_code: int) -> bool:
+        """
+        Checks if a status code is transient.
+
+        Args:
+            status_code (int): HTTP status code.
+        Returns:
+            bool: True if the request should be sent again.
+        """
+        return status_code in self.retryable_statuses
+
+    def parse_retry_after(self, retry_after) -> float:
+        """
+        Parses a Retry-After header, which is either a number of seconds or an HTTP date.
+
+        Args:
+            retry_after (str): Raw header value.
+        Returns:
+            seconds (float): Seconds to wait, None if the header is missing or unreadable.
+        """
+        if retry_after in (None, ''):
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            retry_date = parsedate_to_datetime(str(retry_after))
+            return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def get_delay(self, attempt: int, retry_after=None) -> float:
+        """
+        Gets how long to wait before the next attempt. Retry-After wins when the server sent one.
+        Otherwise full jitter: a random delay between 0 and base_delay * 2^(attempt-1), capped at max_delay.
+
+        Args:
+            attempt (int): Attempt that just failed, starting at 1.
+            retry_after (str): Retry-After header of the failed response.
+        Returns:
+            delay (float): Seconds to wait.
+        """
+        retry_after_seconds = self.parse_retry_after(retry_after)
+        if retry_after_seconds is not None:
+            return retry_after_seconds
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def should_retry(self, attempt: int, started_at: float, delay: float) -> bool:
+        """
+        Checks that another attempt fits in both the attempt and the elapsed time budget of the call.
+
+        Args:
+            attempt (int): Attempt that just failed, starting at 1.
+            started_at (float): time.monotonic() when the call started.
+            delay (float): Delay that would be waited before the next attempt.
+        Returns:
+            bool: True if the call should be retried.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        return (time.monotonic() - started_at) + delay <= self.max_elapsed
+
+    def record_retry(self, delay: float):
+        """
+        Counts a retry and the time waited for it.
+
+        Args:
+            delay (float): Seconds waited before the retry.
+        """
+        with self.lock:
+            self.retries += 1
+            self.retry_wait_seconds += delay
+
+    def record_give_up(self):
+        """
+        Counts a call that ran out of retries.
+        """
+        with self.lock:
+            self.gave_up += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {retries: int, retry_wait_seconds: float, gave_up: int}
+        """
+        with self.lock:
+            return {
+                'retries': self.retries,
+                'retry_wait_seconds': round(self.retry_wait_seconds, 2),
+                'gave_up': self.gave_up,
+            }
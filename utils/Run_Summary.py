@@ -0,0 +1,66 @@
+#ETLs\utils\Run_Summary.py
+from datetime import datetime
+from utils.Logger import log_directory
+import json
+
+#Section name -> (callable returning a stats dict, optional callable formatting it as lines), collected when the ETL finishes.
+summary_sections = {}
+
+def register_summary_section(name: str, get_stats, format_stats=None):
+    """
+    Adds a section to the run summary. Registering the same name again replaces it.
+
+    Args:
+        name (str): Section name shown in the summary.
+        get_stats (callable): Called with no arguments at the end of the run, returns a dict.
+        format_stats (callable): Takes the stats dict and returns lines to log instead of the raw json, e.g. a table.
+    """
+    summary_sections[name] = (get_stats, format_stats)
+
+def collect_run_summary() -> dict:
+    """
+    Returns:
+        run_summary (dict): Dict with format {section_name: stats_dict}. Sections that fail to report are skipped.
+    """
+    run_summary = {}
+    for name, (get_stats, format_stats) in summary_sections.items():
+        try:
+            run_summary[name] = get_stats()
+        except Exception as e:
+            run_summary[name] = {'error': str(e)}
+    return run_summary
+
+def log_run_summary(logger, output_dir=log_directory) -> dict:
+    """
+    Logs every registered section and writes the whole summary as json next to the run's log file.
+
+    Args:
+        logger (object): Logger object for logging, its name is used in the file name.
+        output_dir (Path): Folder the json summary is written to. None skips writing.
+    Returns:
+        run_summary (dict): Dict with format {section_name: stats_dict}.
+    """
+    run_summary = collect_run_summary()
+    if not run_summary:
+        return run_summary
+
+    logger.info("Run Summary:")
+    for name, stats in run_summary.items():
+        format_stats = summary_sections[name][1]
+        if format_stats and stats and 'error' not in stats:
+            logger.info(f"Run Summary: {name}:")
+            for line in format_stats(stats):
+                logger.info(f"Run Summary:   {line}")
+        else:
+            logger.info(f"Run Summary: {name}: {json.dumps(stats)}")
+
+    if output_dir is not None:
+        summary_path = output_dir / f"{datetime.now().strftime('%Y_%m_%d_%H%M')}_{logger.name}_run_summary.json"
+        try:
+            with open(summary_path, 'w', encoding='utf-8') as summary_file:
+                json.dump({'script': logger.name, 'finished_at': datetime.now().isoformat(timespec='seconds'), **run_summary}, summary_file, indent=4)
+            logger.info(f"Run Summary: Written to {summary_path}")
+        except Exception as e:
+            logger.error(f"Run Summary: Could not write {summary_path}: {e}")
+
+    return run_summary
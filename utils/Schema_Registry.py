@@ -0,0 +1,363 @@
+#ETLs\utils\Schema_Registry.py
+from datetime import date, datetime
+from utils.Run_Summary import register_summary_section
+from utils.Utils import atomic_write_json
+import json, os, re, threading
+
+MISSING = 'MISSING'
+
+def to_text(value):
+    return value if value is None or isinstance(value, str) else str(value)
+
+def to_number(value):
+    if value is None or isinstance(value, bool) or isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(str(value).replace(',', ''))
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else number
+
+def to_boolean(value):
+    if isinstance(value, str) and value.strip().lower() in ('true', 'yes', '1', 'false', 'no', '0'):
+        return value.strip().lower() in ('true', 'yes', '1')
+    return value
+
+def to_date_time(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+#Coercers a schema can opt a field into with its coerce mapping, named after the Graph column facet they suit.
+column_coercers = {
+    'text': to_text,
+    'choice': to_text,
+    'number': to_number,
+    'currency': to_number,
+    'boolean': to_boolean,
+    'dateTime': to_date_time,
+}
+
+class List_Schema:
+    def __init__(self, list_name: str, fields: dict, unique_id_field: str = 'Unique_ID', columns: list = None, coerce: dict = None):
+        """
+        Columns of a SharePoint list and where their values come from, compiled once into project,
+        which builds the fields payload of an item without walking the mapping for every item.
+        Values are sent as they are, only the fields named in coerce are converted.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            fields (dict): Dict with format {sharepoint_column: key in the change dict}.
+            unique_id_field (str): Key of the change dict holding the item's unique id.
+            columns (list): Column definitions from the Graph columns endpoint, used to map lists without a registered schema.
+            coerce (dict): Dict with format {sharepoint_column: column_coercers key}, fields opted into a coercer.
+        """
+        self.list_name = list_name
+        self.fields = dict(fields)
+        self.unique_id_field = unique_id_field
+        self.columns = columns
+        self.coerce = dict(coerce or {})
+        unknown = set(self.coerce.values()) - set(column_coercers)
+        if unknown:
+            raise ValueError(f"Unknown coercers for {list_name}: {sorted(unknown)}")
+        self.project = self.compile_projector()
+
+    def compile_projector(self):
+        """
+        Returns:
+            project (function): Takes a change dict item, returns its fields payload. Missing keys are sent as 'MISSING'.
+        """
+        plain_fields = tuple((column, source) for column, source in self.fields.items() if column not in self.coerce)
+        coerced_fields = tuple((column, source, column_coercers[self.coerce[column]]) for column, source in self.fields.items() if column in self.coerce)
+
+        if not coerced_fields:
+            return lambda item: {column: item.get(source, MISSING) for column, source in plain_fields}
+
+        def project(item: dict) -> dict:
+            fields = {column: item.get(source, MISSING) for column, source in plain_fields}
+            for column, source, coerce in coerced_fields:
+                value = item.get(source, MISSING)
+                fields[column] = value if value is MISSING else coerce(value)
+            return fields
+        return project
+
+    def project_changed(self, item: dict, changed_fields) -> dict:
+        """
+        Builds the fields payload of a PATCH, holding only the columns whose source changed.
+        Annotations such as Licenses@odata.type go with their column.
+
+        Args:
+            item (dict): Change dict item.
+            changed_fields (list): Keys of the item whose value changed, from check_changes.
+        Returns:
+            fields (dict): Fields payload, empty when no mapped column changed.
+        """
+        changed_fields = set(changed_fields)
+        changed_columns = {column for column, source in self.fields.items() if source in changed_fields}
+        changed_columns |= {column for column in self.fields if column.split('@')[0] in changed_columns}
+        return {column: value for column, value in self.project(item).items() if column in changed_columns}
+
+class Schema_Registry:
+    #Field mappings for each list, SharePoint column -> key in the change dict. A schema can add coerce: {column: coercer} to opt fields into column_coercers.
+    default_schemas = {
+        'NewWorld_PO_Alert': {
+            'fields': {
+                "Title": "Title",
+                "PO_Type": "PO_Type",
+                "PO_Number": "PO_Number",
+                "Vendor_Name": "Vendor_Name",
+                "Description": "Description",
+                "PO_Amount": "PO_Amount",
+                "Expense": "Expense",
+                "Balance": "Balance",
+                "Expiration_Date": "Expiration_Date",
+                "Expired": "Expired",
+                'Days_Till_Expired' : "Days_Till_Expired",
+                "Unique_ID": "Unique_ID",
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'COT_Employees': {
+            'fields': {
+                "Email": "Email",
+                "Display_Name": "Display_Name",
+                "Department": "Department",
+                "Employee_Id": "Employee_Id",
+                "Job_Title": "Job_Title",
+                "Active": "Active",
+                "Azure_Id": "Azure_Id",
+                "Manager": "Manager",
+                "Licenses@odata.type": "licenses_data_type",
+                "Licenses": "Licenses"
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'Asset_Pickup_History': {
+            'fields': {
+                'Updated': 'Updated'
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'ServiceDesk_Assets': {
+            'fields': {
+                "name": "name",
+                "type": "type",
+                "state": "state",
+                "department": "department",
+                "asset_description": "asset_description",
+                "asset_assigned_user": "asset_assigned_user",
+                "asset_assigned_user_dept": "asset_assigned_user_dept",
+                "asset_assigned_user_email": "asset_assigned_user_email",
+                "saas_id": "saas_id",
+                "created_date": "created_date",
+                "last_updated_date": "last_updated_date",
+                "total_cost": "total_cost",
+                "lifecycle": "lifecycle",
+                "barcode": "barcode",
+                "depreciation_salvage_value": "depreciation_salvage_value",
+                "depreciation_useful_life": "depreciation_useful_life",
+                "ip_address": "ip_address",
+                "replaced_serial_number": "replaced_serial_number",
+                "service_request": "service_request",
+                "imei_number": "imei_number",
+                "cellular_provider": "cellular_provider",
+                "replacement_fund": "replacement_fund",
+                "replacement_date": "replacement_date",
+                "annual_replacement_amt": "annual_replacement_amt",
+                "acquisition_date": "acquisition_date",
+                "asset_vendor_name": "asset_vendor_name",
+                "asset_purchase_cost": "asset_purchase_cost",
+                "asset_product_type": "asset_product_type",
+                "asset_category": "asset_category",
+                "asset_manu": "asset_manu",
+                "asset_serial_no": "asset_serial_no",
+                "warranty_expiry_date": "warranty_expiry_date",
+                "missing_barcode": "missing_barcode",
+                "missing_annual_replacement_amoun": "missing_annual_replacement_amoun",
+                'in_use_date': "in_use_date",
+                'disposed_date': 'disposed_date',
+                'repl_fund': 'repl_fund'
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'ServiceDesk_Worklogs': {
+            'fields': {
+                'module': 'module',
+                'unique_id': 'Unique_ID',
+                'module_id': 'module_id',
+                'created_time': 'created_time',
+                'minutes': 'minutes',
+                'hours': 'hours',
+                'tech_name': 'tech_name',
+                'tech_email': 'tech_email',
+                'worklog_id': 'worklog_id'
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'INFAzureLicenseUsage' : {
+            'fields': {
+                'sku_id': 'sku_id',
+                'sku_name': 'sku_name',
+                'total_licenses': 'total_licenses',
+                'consumed_licenses': 'consumed_licenses',
+                'remaining_licenses': 'remaining_licenses'
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'TFD_Credential_List' : {
+            'fields': {
+                'unique_id': 'Unique_ID',
+                'credentialid': 'credentialid',
+                'categoryid': 'categoryid',
+                'userid': 'userid',
+                'credentialname': 'credentialname',
+                'startdate': 'startdate',
+                'expirationdate': 'expirationdate',
+                'days_till_expired': 'days_till_expired',
+                'status': 'status',
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'TFD_User_List' : {
+            'fields': {
+                'userid': 'userid',
+                'status': 'status',
+                'full_name': 'full_name',
+                'email': 'username',
+                'shift': 'shift',
+                'rank': 'rank',
+                'unit': 'unit',
+                'station': 'station',
+                'supervisor' : 'supervisor',
+            },
+            'unique_id_field': 'Unique_ID',
+        },
+        'TFD_Credential_Categories' : {
+            'fields': {
+                'categoryid': 'categoryid',
+                'categoryname': 'categoryname'
+            },
+            'unique_id_field': 'Unique_ID',
+        }
+
+    }
+    #Columns every list has, never mapped from discovered column definitions.
+    system_columns = {'ID', 'ContentType', 'Attachments', 'Edit', 'LinkTitle', 'LinkTitleNoMenu', 'DocIcon', 'ItemChildCount', 'FolderChildCount',
+                      'AppAuthor', 'AppEditor', 'ComplianceAssetId', '_ColorTag', '_ComplianceFlags', '_ComplianceTag', '_ComplianceTagWrittenTime',
+                      '_ComplianceTagUserId', '_IsRecord', '_UIVersionString'}
+
+    def __init__(self, schemas: dict = None, cache_dir: str = r'cache\sharepoint_schemas'):
+        """
+        Holds the List_Schema of every SharePoint list the ETLs write to, so formatting, change detection and uploads share one definition.
+        Column definitions discovered from Graph for lists without a registered schema are kept on disk, one json file per list.
+
+        Args:
+            schemas (dict): Dict with format {list_name: {fields: {sharepoint_column: source_key}, unique_id_field: str, coerce: dict}}. Defaults to default_schemas.
+            cache_dir (str): Folder holding the discovered column definitions.
+        """
+        self.cache_dir = cache_dir
+        self.schemas = {}
+        self.lock = threading.Lock()
+        self.discovered = 0
+
+        for list_name, schema in (schemas or self.default_schemas).items():
+            self.register(list_name, schema['fields'], schema.get('unique_id_field', 'Unique_ID'), coerce=schema.get('coerce'))
+
+    def register(self, list_name: str, fields: dict, unique_id_field: str = 'Unique_ID', columns: list = None, coerce: dict = None) -> List_Schema:
+        """
+        Adds or replaces a list's schema. Column definitions stored on disk are picked up when none are passed.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            fields (dict): Dict with format {sharepoint_column: key in the change dict}.
+            unique_id_field (str): Key of the change dict holding the item's unique id.
+            columns (list): Column definitions from the Graph columns endpoint.
+            coerce (dict): Dict with format {sharepoint_column: column_coercers key}.
+        Returns:
+            schema (List_Schema): The compiled schema.
+        """
+        schema = List_Schema(list_name, fields, unique_id_field, columns if columns is not None else self.load_columns(list_name), coerce)
+        with self.lock:
+            self.schemas[list_name] = schema
+        return schema
+
+    def get(self, list_name: str) -> List_Schema:
+        """
+        Args:
+            list_name (str): Name of the SharePoint list.
+        Returns:
+            schema (List_Schema): Schema of the list, None if it was never registered or discovered.
+        """
+        return self.schemas.get(list_name)
+
+    def get_columns_path(self, list_name: str) -> str:
+        """
+        Args:
+            list_name (str): Name of the SharePoint list.
+        Returns:
+            columns_path (str): Path of the list's column definitions file.
+        """
+        file_name = re.sub(r'[^\w.-]', '_', list_name)
+        return os.path.join(self.cache_dir, f"{file_name}.json")
+
+    def load_columns(self, list_name: str) -> list:
+        """
+        Args:
+            list_name (str): Name of the SharePoint list.
+        Returns:
+            columns (list): Stored column definitions, None if the list's columns were never discovered.
+        """
+        try:
+            with open(self.get_columns_path(list_name), 'r', encoding='utf-8') as columns_file:
+                return json.load(columns_file).get('columns')
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store_columns(self, list_name: str, columns: list):
+        """
+        Saves a list's column definitions, replacing its file atomically.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            columns (list): Column definitions from the Graph columns endpoint.
+        """
+        atomic_write_json({'list_name': list_name, 'columns': columns}, self.get_columns_path(list_name))
+
+    def add_columns(self, list_name: str, columns: list) -> List_Schema:
+        """
+        Stores discovered column definitions and recompiles the list's schema with them, its mapping and coercers unchanged.
+        A list without a registered schema gets one mapping every writable, non system column to the key of the same name.
+
+        Args:
+            list_name (str): Name of the SharePoint list.
+            columns (list): Column definitions from the Graph columns endpoint.
+        Returns:
+            schema (List_Schema): The compiled schema.
+        """
+        self.store_columns(list_name, columns)
+        with self.lock:
+            self.discovered += 1
+
+        schema = self.get(list_name)
+        if schema:
+            return self.register(list_name, schema.fields, schema.unique_id_field, columns, schema.coerce)
+
+        fields = {
+            column['name']: column['name'] for column in columns
+            if not column.get('readOnly') and not column.get('hidden') and column['name'] not in self.system_columns
+        }
+        return self.register(list_name, fields, columns=columns)
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {schemas, typed, discovered}.
+        """
+        with self.lock:
+            return {
+                'schemas': len(self.schemas),
+                'typed': sum(schema.columns is not None for schema in self.schemas.values()),
+                'discovered': self.discovered,
+            }
+
+#Shared by every connector and ETL in the process.
+schema_registry = Schema_Registry()
+register_summary_section('sharepoint_schemas', schema_registry.get_stats)
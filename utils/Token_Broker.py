@@ -0,0 +1,139 @@
+#ETLs\utils\Token_Broker.py
+from contextlib import contextmanager
+from utils.Utils import atomic_write_json
+import json, threading, time
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+class Token_Broker:
+    def __init__(self, token_file_path: str, logger, lock_timeout: float = 120.0):
+        """
+        Guards the shared token file so ETLs running at the same time on one box do not corrupt it or refresh the same token twice.
+        Every read and write holds an exclusive lock on a sidecar .lock file and writes go through an atomic rename.
+
+        Args:
+            token_file_path (str): Path of the token json file.
+            logger (object): Logger object for logging.
+            lock_timeout (float): Seconds to wait for another process to release the lock before giving up.
+        """
+        self.token_file_path = token_file_path
+        self.lock_file_path = f"{token_file_path}.lock"
+        self.logger = logger
+        self.lock_timeout = lock_timeout
+
+        #File locks are per process, the thread lock and depth counter make locked() reentrant within one thread.
+        self.thread_lock = threading.RLock()
+        self.lock_depth = 0
+        self.lock_file = None
+
+    def acquire_file_lock(self):
+        """
+        Takes the exclusive cross-process lock, polling until lock_timeout.
+        """
+        self.lock_file = open(self.lock_file_path, 'a+')
+        deadline = time.monotonic() + self.lock_timeout
+
+        while True:
+            try:
+                if msvcrt:
+                    self.lock_file.seek(0)
+                    msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.lock_file.close()
+                    self.lock_file = None
+                    raise TimeoutError(f"Token Broker: Timed out waiting for {self.lock_file_path}")
+                time.sleep(0.1)
+
+    def release_file_lock(self):
+        """
+        Releases the cross-process lock.
+        """
+        try:
+            if msvcrt:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.lock_file.close()
+            self.lock_file = None
+
+    @contextmanager
+    def locked(self):
+        """
+        Holds the token file lock for the duration of the with block. Nested use in the same thread is allowed.
+        """
+        with self.thread_lock:
+            if self.lock_depth == 0:
+                self.acquire_file_lock()
+            self.lock_depth += 1
+            try:
+                yield
+            finally:
+                self.lock_depth -= 1
+                if self.lock_depth == 0:
+                    self.release_file_lock()
+
+    def read_all(self) -> dict:
+        """
+        Reads every token key from the token file.
+
+        Returns:
+            all_tokens_data (dict): Token file contents, empty if the file does not exist.
+        """
+        with self.locked():
+            try:
+                with open(self.token_file_path, 'r', encoding='utf-8') as token_json_file:
+                    return json.load(token_json_file)
+            except FileNotFoundError:
+                self.logger.warning(f"Token Broker: {self.token_file_path} not found, returning {{}}.")
+                return {}
+
+    def read(self, token_key: str) -> dict:
+        """
+        Reads a single token key.
+
+        Args:
+            token_key (str): Key of the token in the token file.
+        Returns:
+            token_data (dict): Token data, empty if missing.
+        """
+        return self.read_all().get(token_key) or {}
+
+    def write(self, token_key: str, token_info: dict):
+        """
+        Saves token_info under token_key without touching the other keys, then atomically replaces the token file.
+        If the file holds a token that expires later than ours, another job refreshed it after us and it is kept.
+
+        Args:
+            token_key (str): Key of the token in the token file.
+            token_info (dict): Token data to save.
+        """
+        with self.locked():
+            all_tokens_data = self.read_all()
+            stored_info = all_tokens_data.get(token_key) or {}
+            merged_info = dict(token_info)
+
+            if (stored_info.get('expires_at') or 0) > (token_info.get('expires_at') or 0):
+                merged_info['access_token'] = stored_info.get('access_token')
+                merged_info['expires_at'] = stored_info.get('expires_at')
+
+            all_tokens_data[token_key] = merged_info
+            self.atomic_write(all_tokens_data)
+
+    def atomic_write(self, all_tokens_data: dict):
+        """
+        Writes to a temp file in the same folder and renames it over the token file, so readers never see a half written file.
+
+        Args:
+            all_tokens_data (dict): Full token file contents.
+        """
+        atomic_write_json(all_tokens_data, self.token_file_path, indent=4, fsync=True)
@@ -0,0 +1,247 @@
+#ETLs\utils\Transport.py
+from abc import ABC, abstractmethod
+from urllib.parse import urlencode
+from requests.structures import CaseInsensitiveDict
+import hashlib, json, os, random, re, threading, time, requests
+
+REPLAY_PAGE = re.compile(r'[?&]replay_page=(\d+)$')
+
+def build_response(method: str, url: str, status_code: int, headers: dict, body: str) -> requests.Response:
+    """
+    Builds a requests.Response that callers cannot tell apart from one read off the network, streamed or not.
+
+    Args:
+        method (str): Method of the request.
+        url (str): Url of the request.
+        status_code (int): Status code.
+        headers (dict): Response headers.
+        body (str): Response body.
+    Returns:
+        response (requests.Response): Response object.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict(headers or {})
+    response._content = (body or '').encode('utf-8')
+    response._content_consumed = True
+    response.request = requests.Request(method.upper(), url).prepare()
+    return response
+
+def get_request_url(method: str, url: str, kwargs: dict) -> str:
+    """
+    Args:
+        method (str): Method of the request.
+        url (str): Url of the request.
+        kwargs (dict): Keyword arguments of the request.
+    Returns:
+        request_url (str): Url as it goes on the wire, params included.
+    """
+    return requests.Request(method, url, params=kwargs.get('params')).prepare().url
+
+def get_body_hash(kwargs: dict) -> str:
+    """
+    Args:
+        kwargs (dict): Keyword arguments of the request.
+    Returns:
+        body_hash (str): Short hash of the request body, '' when there is none.
+    """
+    body = kwargs.get('data')
+    if body is None and kwargs.get('json') is not None:
+        body = json.dumps(kwargs['json'], sort_keys=True)
+    if body is None:
+        return ''
+    if isinstance(body, dict):
+        body = urlencode(body)
+    return hashlib.sha256(body if isinstance(body, bytes) else str(body).encode('utf-8')).hexdigest()[:16]
+
+class Transport(ABC):
+    """
+    The wire boundary of Http_Client. Rate limiting, circuit breaking, compression and metrics stay in Http_Client,
+    the transport only turns a request into a response, so ETLs can run against captured traffic instead of the network.
+    """
+    @abstractmethod
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Args:
+            session (requests.Session): Pooled session of the url's host.
+            method (str): GET/POST/PUT/PATCH/DELETE.
+            url (str): Url to call.
+            **kwargs: requests keyword arguments (headers, json, data, params, timeout, stream).
+        Returns:
+            response (requests.Response): Response object.
+        """
+
+class Network_Transport(Transport):
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        return session.request(method, url, **kwargs)
+
+class Record_Transport(Transport):
+    #Never written to disk, token responses are saved with these values replaced.
+    redact_keys = ('access_token', 'refresh_token', 'client_secret', 'id_token')
+
+    def __init__(self, cassette_dir: str, transport: Transport = None):
+        """
+        Sends through another transport (the network by default) and appends every exchange to cassette_dir\\cassette.jsonl.
+        Request headers are not saved, so the cassette holds no Authorization headers.
+
+        Args:
+            cassette_dir (str): Folder of the cassette.
+            transport (Transport): Transport that actually sends the request.
+        """
+        self.cassette_dir = cassette_dir
+        self.cassette_path = os.path.join(cassette_dir, 'cassette.jsonl')
+        self.transport = transport or Network_Transport()
+        self.lock = threading.Lock()
+
+    def redact(self, body: str) -> str:
+        """
+        Args:
+            body (str): Response body.
+        Returns:
+            body (str): Body with redact_keys replaced, unchanged if it is not a json object.
+        """
+        try:
+            body_json = json.loads(body)
+        except ValueError:
+            return body
+        if not isinstance(body_json, dict) or not any(key in body_json for key in self.redact_keys):
+            return body
+        return json.dumps({key: ('REDACTED' if key in self.redact_keys else value) for key, value in body_json.items()})
+
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        response = self.transport.send(session, method, url, **kwargs)
+        exchange = {
+            'method': method.upper(),
+            'url': get_request_url(method, url, kwargs),
+            'body_hash': get_body_hash(kwargs),
+            'status': response.status_code,
+            'headers': {key: value for key, value in response.headers.items() if key.lower() in ('content-type', 'retry-after', 'etag', 'last-modified')},
+            'body': self.redact(response.text),
+        }
+
+        with self.lock:
+            os.makedirs(self.cassette_dir, exist_ok=True)
+            with open(self.cassette_path, 'a', encoding='utf-8') as cassette_file:
+                cassette_file.write(json.dumps(exchange) + '\n')
+        return response
+
+class Replay_Transport(Transport):
+    def __init__(self, cassette_dir: str, latency=0.0, throttle_every: int = 0, retry_after: int = 1, page_size: int = None):
+        """
+        Answers requests from a cassette written by Record_Transport, without touching the network.
+        Exchanges are matched on method, url and request body, falling back to method and url, and replayed in recorded order.
+        The last recorded response of a request is repeated once its recordings are used up. Unrecorded requests get a 404.
+
+        Args:
+            cassette_dir (str): Folder of the cassette.
+            latency (float/tuple): Seconds added to every response, or a (min, max) range picked at random.
+            throttle_every (int): Answer every Nth request with a 429, 0 never does.
+            retry_after (int): Retry-After seconds of injected 429s.
+            page_size (int): Split recorded 'value' arrays into pages of this size, linked with @odata.nextLink.
+        """
+        self.cassette_dir = cassette_dir
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.page_size = page_size
+
+        self.exchanges = {}
+        self.positions = {}
+        self.request_count = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Reads the cassette into queues keyed by (method, url, body_hash) and (method, url).
+        """
+        with open(os.path.join(self.cassette_dir, 'cassette.jsonl'), 'r', encoding='utf-8') as cassette_file:
+            for line in cassette_file:
+                if not line.strip():
+                    continue
+                exchange = json.loads(line)
+                self.exchanges.setdefault((exchange['method'], exchange['url'], exchange['body_hash']), []).append(exchange)
+                self.exchanges.setdefault((exchange['method'], exchange['url']), []).append(exchange)
+
+    def next_exchange(self, key: tuple) -> dict:
+        """
+        Args:
+            key (tuple): Cassette key.
+        Returns:
+            exchange (dict): Next recorded exchange for key, None when the key was never recorded. Call with lock held.
+        """
+        exchanges = self.exchanges.get(key)
+        if not exchanges:
+            return None
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        return exchanges[min(position, len(exchanges) - 1)]
+
+    def get_page(self, recorded_url: str, page: int, exchange: dict) -> str:
+        """
+        Serves one page of a recorded 'value' array, the rest is reachable through @odata.nextLink.
+
+        Args:
+            recorded_url (str): Url of the recorded exchange.
+            page (int): Page number, carried in the replay_page query parameter of the nextLinks.
+            exchange (dict): Recorded exchange.
+        Returns:
+            body (str): Body of the requested page.
+        """
+        try:
+            body_json = json.loads(exchange['body'])
+        except ValueError:
+            return exchange['body']
+        if not isinstance(body_json, dict) or not isinstance(body_json.get('value'), list):
+            return exchange['body']
+
+        values = body_json['value']
+        body_json['value'] = values[page * self.page_size:(page + 1) * self.page_size]
+        body_json.pop('@odata.nextLink', None)
+        if (page + 1) * self.page_size < len(values):
+            body_json['@odata.nextLink'] = f"{recorded_url}{'&' if '?' in recorded_url else '?'}replay_page={page + 1}"
+        return json.dumps(body_json)
+
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        request_url = get_request_url(method, url, kwargs)
+        page_match = REPLAY_PAGE.search(request_url)
+        recorded_url = request_url[:page_match.start()] if page_match else request_url
+
+        if isinstance(self.latency, tuple):
+            time.sleep(random.uniform(*self.latency))
+        elif self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            self.request_count += 1
+            if self.throttle_every and self.request_count % self.throttle_every == 0:
+                return build_response(method, request_url, 429, {'Retry-After': str(self.retry_after), 'Content-Type': 'application/json'},
+                                      json.dumps({'error': {'code': 'TooManyRequests', 'message': 'Injected by Replay_Transport.'}}))
+
+            exchange = self.next_exchange((method.upper(), recorded_url, get_body_hash(kwargs))) or self.next_exchange((method.upper(), recorded_url))
+
+        if exchange is None:
+            return build_response(method, request_url, 404, {'Content-Type': 'application/json'},
+                                  json.dumps({'error': {'code': 'NotRecorded', 'message': f"{method.upper()} {recorded_url} is not in the cassette."}}))
+
+        body = self.get_page(recorded_url, int(page_match.group(1)) if page_match else 0, exchange) if self.page_size else exchange['body']
+        return build_response(method, request_url, exchange['status'], exchange['headers'], body)
+
+def get_default_transport() -> Transport:
+    """
+    Picks the process-wide transport from the ETL_TRANSPORT environment variable, so any ETL can be recorded or replayed unchanged:
+    record:<cassette_dir> records real traffic, replay:<cassette_dir> runs offline, anything else uses the network.
+
+    Returns:
+        transport (Transport): Transport used by every Http_Client that was not given one.
+    """
+    mode, _, cassette_dir = os.environ.get('ETL_TRANSPORT', '').partition(':')
+    if mode == 'record' and cassette_dir:
+        return Record_Transport(cassette_dir)
+    if mode == 'replay' and cassette_dir:
+        return Replay_Transport(cassette_dir)
+    return Network_Transport()
+
+default_transport = get_default_transport()
@@ -1,4 +1,4 @@
-import json,hashlib
+import json,hashlib,os,tempfile
 from pathlib import Path
 from typing import Tuple
 from collections import deque
@@ -52,12 +52,15 @@ def generate_checksum(data: dict, logger:object=None)-> Tuple[dict, str]:
     
     Returns:
         Tuple: A tuple containg the updated dict with checksums for each item and the checksum for the entire dict.
+            Each item also gets field_checksums, used by check_changes to find the fields a PATCH has to send.
     """
     checksum_list = []
     for key, inner_dict in data.items():
+        inner_dict.pop('field_checksums', None)
         sorted_inner= json.dumps(inner_dict, sort_keys=True)
         checksum = hashlib.md5(sorted_inner.encode()).hexdigest()
         inner_dict['checksum'] = checksum
+        inner_dict['field_checksums'] = generate_field_checksums(inner_dict)
         checksum_list.append(checksum)
     
     sorted_checksum_list = sorted(checksum_list)
@@ -66,27 +69,47 @@ def generate_checksum(data: dict, logger:object=None)-> Tuple[dict, str]:
     
     return [total_checksum, data]
 
+#Keys added by the caching itself, never compared field by field.
+bookkeeping_keys = {'checksum', 'field_checksums', 'operation', 'changed_fields', 'sharepoint_id', 'sharepoint_etag'}
+
+def generate_field_checksums(inner_dict: dict) -> dict:
+    """
+    Takes in a single item, returns a short checksum per field so changes can be found field by field.
+
+    Args:
+        inner_dict (dict): Item of a dict of dicts.
+    Returns:
+        field_checksums (dict): Dict with format {field: checksum}.
+    """
+    return {
+        field: hashlib.md5(json.dumps(value, sort_keys=True).encode()).hexdigest()[:12]
+        for field, value in inner_dict.items() if field not in bookkeeping_keys
+    }
+
 def update_cache(cache_list: list, sharepoint_dict: dict, id_key: str) -> list:
     """
     Takes in a list and a dict, cache_list and sharepoint_dict and a id_key used to create the key for each dict.
     Maps sharepoint_dict to the proper format to allow cache_dict to compare keys.
-    Takes the sharepoint_id from sharepoint_dict and saves it in cache.
+    Takes the sharepoint_id (and etag, when present) from sharepoint_dict and saves it in cache, patching the cache in place.
     Returns a single dict which will be the new cache.
 
     Args:
         cache_dict (dict): Current cache.
-        sharepoint_dict (dict): Dict that is currently storing the sharepoint information.
+        sharepoint_dict (dict): Dict that is currently storing the sharepoint information, e.g. SharePoint_Connector.get_uploaded_items.
 
     Returns:
         cache_dict (dict): Dict that will be the new cache.
     """
 
-    mapped_dict = {item[id_key]: item for item in sharepoint_dict.values()}
+    #Ids are compared as text, batch sub-request ids are strings while cache keys can be numbers.
+    mapped_dict = {str(item[id_key]): item for item in sharepoint_dict.values() if item.get(id_key)}
 
     for key, value in cache_list[1].items():
-        if key in mapped_dict:
-            value['sharepoint_id'] = mapped_dict[key]['id']
-    
+        if str(key) in mapped_dict:
+            value['sharepoint_id'] = mapped_dict[str(key)]['id']
+            if mapped_dict[str(key)].get('@odata.etag'):
+                value['sharepoint_etag'] = mapped_dict[str(key)]['@odata.etag']
+
     return cache_list
 
 def check_cache(previous_list: list, current_list: list) -> str:
@@ -120,7 +143,8 @@ def check_cache(previous_list: list, current_list: list) -> str:
 def check_changes(previous_list: list, current_list: list, delete, logger) -> list:
     """
     Checks the previous list to the current list. Iterate through each item checking for:
-    1. If the key is in the other dict and if the checksum has changed. Add an operation key with the value PATCH.
+    1. If the key is in the other dict and if the checksum has changed. Add an operation key with the value PATCH, and changed_fields.
+       Items whose fields are all unchanged (only bookkeeping keys differ) get NONE.
     2. If the key is missing from one or the other. If missing from previous Cache, add operation key with value POST. Otherwise, DELETE.
     3. If the key is in the other dict and the checksum matches, add operation with value "KEEP".
 
@@ -160,7 +184,14 @@ def check_changes(previous_list: list, current_list: list, delete, logger) -> li
                 operations['none'] += 1
             else:
                 # logger.info(f"Previous Checksum: {prev_value.get('checksum')} | Current Checksum: {current_dict[prev_key].get('checksum')}")
+                changed_fields = get_changed_fields(prev_value, current_dict[prev_key])
+                if not changed_fields:
+                    #Only bookkeeping keys differ (e.g. a sharepoint_etag the previous cache holds), nothing to send.
+                    current_dict[prev_key]['operation'] = 'NONE'
+                    operations['none'] += 1
+                    continue
                 current_dict[prev_key]['operation'] = 'PATCH'
+                current_dict[prev_key]['changed_fields'] = changed_fields
                 operations['patch'] += 1
 
     # Identify new items (POST)
@@ -173,6 +204,20 @@ def check_changes(previous_list: list, current_list: list, delete, logger) -> li
 
     return current_list
 
+def get_changed_fields(previous_item: dict, current_item: dict) -> list:
+    """
+    Compares the field_checksums of two versions of an item.
+
+    Args:
+        previous_item (dict): Item from the previous cache.
+        current_item (dict): Item from the current cache.
+    Returns:
+        changed_fields (list): Sorted fields that are new, whose value changed, or that were removed from current_item.
+    """
+    previous_checksums = previous_item.get('field_checksums') or generate_field_checksums(previous_item)
+    current_checksums = current_item.get('field_checksums') or generate_field_checksums(current_item)
+    return sorted(field for field in current_checksums.keys() | previous_checksums.keys() if previous_checksums.get(field) != current_checksums.get(field))
+
 def merge_sharepoint_ids(change_dict: dict, cached_dict: dict) -> dict:
     """
     Takes in a dict and downloads cached information.
@@ -202,6 +247,32 @@ def write_to_json(item, file_path: str):
     with open(file_path,'w', encoding='utf-8') as json_file:
         json.dump(item, json_file,indent=4)
 
+def atomic_write_json(item, file_path: str, indent: int = None, fsync: bool = False):
+    """
+    Writes to json through a temp file in the same folder that is renamed over file_path,
+    so readers never see a half written file and a crash leaves the previous one in place.
+
+    Args:
+        item (any): Any json serializable item.
+        file_path (str): File Path where the item will be written, its folder is created if missing.
+        indent (int): Indent of the json, None writes it on one line.
+        fsync (bool): Flush the temp file to disk before the rename, for files that must survive a power loss.
+    """
+    file_dir = os.path.dirname(file_path) or '.'
+    os.makedirs(file_dir, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=file_dir, prefix=f".{os.path.basename(file_path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(temp_fd, 'w', encoding='utf-8') as temp_file:
+            json.dump(item, temp_file, indent=indent)
+            if fsync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def read_from_json(file_path)-> dict:
     """
     Reads from json taking in the item and the filepath.
@@ -0,0 +1,153 @@
+#ETLs\utils\Validator_Cache.py
+from requests.structures import CaseInsensitiveDict
+from utils.Run_Summary import register_summary_section
+from utils.Utils import atomic_write_json
+import hashlib, json, os, threading, requests
+
+class Validator_Cache:
+    def __init__(self, cache_dir: str = r'cache\http_validators'):
+        """
+        On-disk store of ETag/Last-Modified validators and bodies for GETs that rarely change between runs.
+        Conditional GETs send If-None-Match/If-Modified-Since, and a 304 is answered with the stored body,
+        so unchanged reference data costs a few headers instead of a full download.
+
+        Args:
+            cache_dir (str): Folder holding one json file per url.
+        """
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bytes_saved = 0
+
+    def get_entry_path(self, url: str) -> str:
+        """
+        Args:
+            url (str): Url of the GET.
+        Returns:
+            entry_path (str): Path of the url's entry file.
+        """
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json")
+
+    def load(self, url: str) -> dict:
+        """
+        Args:
+            url (str): Url of the GET.
+        Returns:
+            entry (dict): Dict with format {url, etag, last_modified, headers, body}, empty if the url was never stored or the file is unreadable.
+        """
+        try:
+            with open(self.get_entry_path(url), 'r', encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+            return entry if entry.get('url') == url else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def add_validators(self, url: str, headers: dict) -> tuple:
+        """
+        Copies headers and adds the stored validators for url, if any.
+
+        Args:
+            url (str): Url of the GET.
+            headers (dict): Headers of the request, left untouched.
+        Returns:
+            (headers, entry) (tuple): Headers to send and the stored entry, passed on to resolve.
+        """
+        entry = self.load(url)
+        headers = dict(headers or {})
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers, entry
+
+    def resolve(self, url: str, response: requests.Response, entry: dict) -> requests.Response:
+        """
+        Turns a 304 into a 200 built from the stored body, and stores fresh 200s that carry validators.
+        Every other response is returned untouched.
+
+        Args:
+            url (str): Url of the GET.
+            response (requests.Response): Response of the conditional GET.
+            entry (dict): Entry returned by add_validators.
+        Returns:
+            response (requests.Response): Response the caller should use.
+        """
+        if response.status_code == 304 and entry:
+            with self.lock:
+                self.hits += 1
+                self.bytes_saved += len(entry['body'].encode('utf-8'))
+            return self.build_response(url, entry, response)
+
+        if response.status_code == 200:
+            with self.lock:
+                self.misses += 1
+            if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+                self.store(url, response)
+
+        return response
+
+    def store(self, url: str, response: requests.Response):
+        """
+        Saves the response's validators and body, replacing the url's entry file atomically.
+
+        Args:
+            url (str): Url of the GET.
+            response (requests.Response): 200 response carrying an ETag and/or Last-Modified header.
+        """
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {'Content-Type': response.headers.get('Content-Type', 'application/json')},
+            'body': response.text,
+        }
+
+        atomic_write_json(entry, self.get_entry_path(url))
+
+        with self.lock:
+            self.stores += 1
+
+    def build_response(self, url: str, entry: dict, not_modified: requests.Response) -> requests.Response:
+        """
+        Builds a 200 response from a stored entry so callers cannot tell it apart from a full download.
+
+        Args:
+            url (str): Url of the GET.
+            entry (dict): Stored entry.
+            not_modified (requests.Response): The 304, whose headers win over the stored ones.
+        Returns:
+            response (requests.Response): 200 response with the stored body.
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict(entry.get('headers') or {})
+        response.headers.update({key: value for key, value in not_modified.headers.items() if key.lower() not in ('content-length', 'content-encoding')})
+        response._content = entry['body'].encode('utf-8')
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        return response
+
+    def get_stats(self) -> dict:
+        """
+        Returns:
+            stats (dict): Dict with format {hits, misses, stores, bytes_saved, hit_ratio}.
+            hits are 304s answered from disk, misses are conditional GETs that downloaded a full body.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'bytes_saved': self.bytes_saved,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+#Shared by every Http_Client in the process, so hit ratios cover the whole run.
+validator_cache = Validator_Cache()
+register_summary_section('conditional_cache', validator_cache.get_stats)